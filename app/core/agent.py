@@ -1,26 +1,38 @@
+import asyncio
 import logging
 import os
-from collections.abc import Iterator
+import time
+from collections.abc import AsyncIterator
 from typing import Any
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 
+from app.core.budget import RebalanceStats, rebalance_itinerary
+from app.core.cache import TieredCache, cache_from_env, stable_hash
 from app.core.data import MOCK_ACTIVITIES
-from app.core.destinations import (
-    recommend_destinations,
-    requested_destination_terms,
-    requested_route_city_terms,
-)
-from app.core.images import search_real_image
+from app.core.destinations import recommend_destinations
+from app.core.image_index import default_image_index
+from app.core.images import CachedImageSearch, resolve_itinerary_images
 from app.core.parser import parse_llm_response
 from app.core.prompts import (
     MODEL_CANDIDATES,
     initial_plan_prompt,
     json_repair_prompt,
     refinement_prompt,
+    uses_activity_catalog,
+)
+from app.core.repair import RepairStats, repair_itinerary_json
+from app.core.routing import ModelRouter
+from app.core.streaming import DayStreamParser
+from app.core.validation import (
+    COST_VIOLATIONS,
+    ConstraintViolation,
+    ViolationCode,
+    itinerary_money,
+    validate_itinerary,
 )
-from app.models.domain import DestinationSuggestion, Itinerary, Preferences
+from app.models.domain import DayPlan, DestinationSuggestion, Itinerary, Preferences
 
 load_dotenv()
 
@@ -56,193 +68,390 @@ def budget_targets(preferences: Preferences) -> dict[str, float]:
     return targets
 
 
-def itinerary_money(value: float, preferences: Preferences) -> str:
-    return f"{value:g}"
+def response_cache_key(
+    model_name: str,
+    prompt: str,
+    *,
+    use_web_search: bool,
+    json_mode: bool,
+) -> str:
+    normalized_prompt = " ".join(prompt.split())
+    return stable_hash(
+        model_name,
+        stable_hash(normalized_prompt),
+        f"web_search={use_web_search}",
+        f"json_mode={json_mode}",
+    )
+
+
+DESTINATION_VIOLATIONS = frozenset(
+    {
+        ViolationCode.MISSING_DESTINATION,
+        ViolationCode.DESTINATION_MISMATCH,
+        ViolationCode.ROUTE_DAY_COVERAGE,
+    }
+)
 
 
 class TravelAgent:
-    def __init__(self):
+    def __init__(self, response_cache: TieredCache | None = None):
         self.activities = MOCK_ACTIVITIES
         self.client: Any | None = None
+        if response_cache is None:
+            response_cache = cache_from_env(
+                "LLM", "llm_responses", default_ttl_seconds=6 * 60 * 60
+            )
+        self.response_cache = response_cache
+        self.router = ModelRouter.from_env(MODEL_CANDIDATES)
+        self.repair_stats = RepairStats()
+        self.rebalance_stats = RebalanceStats()
+        self.image_search = CachedImageSearch.from_env()
+        self.image_index = default_image_index()
 
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             logger.warning("OPENAI_API_KEY not found in environment.")
         else:
-            self.client = OpenAI(api_key=api_key)
+            self.client = AsyncOpenAI(api_key=api_key)
+
+    def _response_cache_keys(
+        self, prompt: str, *, use_web_search: bool, json_mode: bool
+    ) -> dict[str, str]:
+        return {
+            model_name: response_cache_key(
+                model_name,
+                prompt,
+                use_web_search=use_web_search,
+                json_mode=json_mode,
+            )
+            for model_name in MODEL_CANDIDATES
+        }
 
-    def _call_model_with_fallback(
+    async def _call_model_with_fallback(
         self,
         prompt: str,
         *,
         use_web_search: bool = True,
         json_mode: bool = False,
+        hedge: bool = True,
     ) -> str:
+        cache_keys = self._response_cache_keys(
+            prompt, use_web_search=use_web_search, json_mode=json_mode
+        )
+        cached = await self.response_cache.get_first_async(cache_keys.values())
+        if cached is not None:
+            logger.info("Using cached model response for prompt")
+            return cached[1]
+
+        if not self.client:
+            raise RuntimeError("OPENAI_API_KEY not found. Cannot call OpenAI models.")
+
+        model_name, output_text = await self._race_model_candidates(
+            prompt,
+            use_web_search=use_web_search,
+            json_mode=json_mode,
+            hedge=hedge,
+        )
+        if output_text.strip():
+            await self.response_cache.set_async(cache_keys[model_name], output_text)
+        return output_text
+
+    async def _race_model_candidates(
+        self,
+        prompt: str,
+        *,
+        use_web_search: bool,
+        json_mode: bool,
+        hedge: bool,
+    ) -> tuple[str, str]:
+        """Walk MODEL_CANDIDATES, hedging slow calls with the next candidate.
+
+        A failed candidate immediately hands over to the next one. With
+        hedging enabled, a candidate that is still running after its hedge
+        delay gets the next candidate launched alongside it; the first
+        successful response wins and the remaining calls are cancelled. A
+        cancelled loser's elapsed time is recorded as a censored latency
+        sample, since its real latency is at least that long.
+        """
+        loop = asyncio.get_running_loop()
+        ordered_candidates = self.router.ordered_candidates()
+        if not ordered_candidates:
+            raise RuntimeError(
+                "All model candidates are temporarily unavailable (circuit open)."
+            )
+        candidates = iter(ordered_candidates)
+        pending: dict[asyncio.Task[str], str] = {}
+        started: dict[asyncio.Task[str], float] = {}
+        winner: asyncio.Task[str] | None = None
         last_error: Exception | None = None
+        hedge_at: float | None = None
+
+        def launch_next() -> bool:
+            nonlocal hedge_at
+            model_name = next(candidates, None)
+            while model_name is not None and not self.router.acquire(model_name):
+                logger.info("Skipping model %s: circuit open", model_name)
+                model_name = next(candidates, None)
+            if model_name is None:
+                hedge_at = None
+                return False
+            logger.info("Attempting generation with model %s", model_name)
+            task = asyncio.create_task(
+                self._request_model(
+                    model_name,
+                    prompt,
+                    use_web_search=use_web_search,
+                    json_mode=json_mode,
+                )
+            )
+            pending[task] = model_name
+            started[task] = loop.time()
+            hedge_at = (
+                loop.time() + self.router.latency.hedge_delay(model_name)
+                if hedge
+                else None
+            )
+            return True
+
+        launch_next()
+        try:
+            while pending:
+                timeout = (
+                    None if hedge_at is None else max(0.0, hedge_at - loop.time())
+                )
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    slow_model = list(pending.values())[-1]
+                    if launch_next():
+                        self.router.latency.record_hedge(slow_model)
+                        logger.info(
+                            "Model %s exceeded its hedge delay; racing the next candidate",
+                            slow_model,
+                        )
+                    continue
+
+                # In launch order, so a failure can hand over before a winner.
+                for task in [task for task in pending if task in done]:
+                    model_name = pending.pop(task)
+                    try:
+                        output_text = task.result()
+                    except Exception as exc:
+                        logger.warning("Model %s failed", model_name, exc_info=True)
+                        last_error = exc
+                        launch_next()
+                        continue
+                    logger.info("Generation succeeded with model %s", model_name)
+                    winner = task
+                    return model_name, output_text
+        finally:
+            for task, model_name in pending.items():
+                task.cancel()
+                # A task cancelled before it starts never reaches the release
+                # in _request_model, which would leave a half-open probe held.
+                self.router.release(model_name)
+                if winner is not None:
+                    self.router.latency.record_censored(
+                        model_name, loop.time() - started[task]
+                    )
+
+        if last_error is None:
+            raise RuntimeError(
+                "All model candidates are temporarily unavailable (circuit open)."
+            )
+        raise RuntimeError(f"All model candidates failed. Last error: {last_error}")
+
+    async def _stream_model_with_fallback(
+        self, prompt: str, *, use_web_search: bool = True
+    ) -> AsyncIterator[str | None]:
+        """Yield output text deltas from the healthiest candidate that streams.
+
+        Candidates are tried one after another (streamed calls are not
+        hedged). If a model fails after it has already produced text, ``None``
+        is yielded before the next candidate starts so the consumer can
+        discard the partial output.
+        """
+        cache_keys = self._response_cache_keys(
+            prompt, use_web_search=use_web_search, json_mode=False
+        )
+        cached = await self.response_cache.get_first_async(cache_keys.values())
+        if cached is not None:
+            logger.info("Using cached model response for prompt")
+            yield cached[1]
+            return
 
         if not self.client:
             raise RuntimeError("OPENAI_API_KEY not found. Cannot call OpenAI models.")
 
-        for model_name in MODEL_CANDIDATES:
+        request_kwargs: dict[str, Any] = {"input": prompt, "stream": True}
+        if use_web_search:
+            request_kwargs["tools"] = [{"type": "web_search"}]
+
+        last_error: Exception | None = None
+        for model_name in self.router.ordered_candidates():
+            if not self.router.acquire(model_name):
+                logger.info("Skipping model %s: circuit open", model_name)
+                continue
+
+            logger.info("Streaming generation with model %s", model_name)
+            chunks: list[str] = []
+            started = time.perf_counter()
             try:
-                logger.info("Attempting generation with model %s", model_name)
-                request_kwargs: dict[str, Any] = {
-                    "model": model_name,
-                    "input": prompt,
-                }
-                if use_web_search:
-                    request_kwargs["tools"] = [{"type": "web_search"}]
-                if json_mode:
-                    request_kwargs["text"] = {"format": {"type": "json_object"}}
-
-                response = self.client.responses.create(**request_kwargs)
-                logger.info("Generation succeeded with model %s", model_name)
-                return str(response.output_text)
+                stream = await self.client.responses.create(
+                    model=model_name, **request_kwargs
+                )
+                async for event in stream:
+                    event_type = getattr(event, "type", "")
+                    if event_type == "response.output_text.delta":
+                        chunks.append(event.delta)
+                        yield event.delta
+                    elif event_type in {"response.failed", "error"}:
+                        raise RuntimeError(f"Model stream failed: {event_type}")
+            except (asyncio.CancelledError, GeneratorExit):
+                self.router.release(model_name)
+                raise
             except Exception as exc:
                 logger.warning("Model %s failed", model_name, exc_info=True)
+                self.router.record_failure(
+                    model_name, fatal=getattr(exc, "status_code", None) == 404
+                )
                 last_error = exc
-
+                if chunks:
+                    yield None
+                continue
+
+            self.router.record_success(model_name, time.perf_counter() - started)
+            output_text = "".join(chunks)
+            if output_text.strip():
+                await self.response_cache.set_async(cache_keys[model_name], output_text)
+            return
+
+        if last_error is None:
+            raise RuntimeError(
+                "All model candidates are temporarily unavailable (circuit open)."
+            )
         raise RuntimeError(f"All model candidates failed. Last error: {last_error}")
 
-    def _parse_or_repair_response(
+    async def _request_model(
+        self,
+        model_name: str,
+        prompt: str,
+        *,
+        use_web_search: bool,
+        json_mode: bool,
+    ) -> str:
+        request_kwargs: dict[str, Any] = {
+            "model": model_name,
+            "input": prompt,
+        }
+        if use_web_search:
+            request_kwargs["tools"] = [{"type": "web_search"}]
+        if json_mode:
+            request_kwargs["text"] = {"format": {"type": "json_object"}}
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.responses.create(**request_kwargs)
+        except asyncio.CancelledError:
+            self.router.release(model_name)
+            raise
+        except Exception as exc:
+            self.router.record_failure(
+                model_name, fatal=getattr(exc, "status_code", None) == 404
+            )
+            raise
+        self.router.record_success(model_name, time.perf_counter() - started)
+        return str(response.output_text)
+
+    async def _parse_response(self, response_text: str) -> Itinerary:
+        # Images are resolved once on the final itinerary, not on every draft.
+        return parse_llm_response(response_text, resolve_images=False)
+
+    async def _resolve_images(self, itinerary: Itinerary) -> None:
+        # Image search is blocking DDGS I/O, so it runs in a worker thread to
+        # keep the event loop free for other sessions.
+        lookups = await asyncio.to_thread(
+            resolve_itinerary_images,
+            itinerary,
+            self.image_search,
+            image_index=self.image_index,
+        )
+        logger.debug("Resolved %d activity images", lookups)
+
+    async def _parse_or_repair_response(
         self, response_text: str, preferences: Preferences
     ) -> Itinerary:
-        itinerary = parse_llm_response(response_text, image_search=search_real_image)
+        itinerary = await self._parse_response(response_text)
         if itinerary.city != "Unknown" and itinerary.days:
             return itinerary
 
+        repaired = repair_itinerary_json(response_text)
+        if repaired is not None:
+            itinerary = await self._parse_response(repaired.text)
+            if itinerary.city != "Unknown" and itinerary.days:
+                logger.info(
+                    "Repaired itinerary JSON locally (%s)", ", ".join(repaired.rules)
+                )
+                self.repair_stats.record_local_repair(repaired.rules)
+                return itinerary
+
+        self.repair_stats.record_escalation()
         logger.info("Attempting LLM JSON schema repair for itinerary response")
-        repaired_text = self._call_model_with_fallback(
+        repaired_text = await self._call_model_with_fallback(
             json_repair_prompt(response_text, preferences),
             use_web_search=False,
             json_mode=True,
+            hedge=False,
         )
-        return parse_llm_response(repaired_text, image_search=search_real_image)
+        return await self._parse_response(repaired_text)
 
     def _check_constraints(
         self, itinerary: Itinerary, preferences: Preferences
     ) -> bool:
-        itinerary.calculate_total_cost()
-        itinerary.cost_breakdown.remaining_budget = (
-            preferences.budget - itinerary.cost_breakdown.total
-        )
-        itinerary.total_cost = itinerary.cost_breakdown.total
+        return not self._evaluate_constraints(itinerary, preferences)
 
-        if not itinerary.city or itinerary.city == "Unknown":
-            itinerary.valid = False
-            itinerary.validation_error = (
-                "Itinerary must include a recommended destination."
-            )
-            return False
-
-        if preferences.city and not self._covers_requested_destinations(
-            itinerary, preferences.city
-        ):
-            itinerary.valid = False
-            itinerary.validation_error = (
-                f"Itinerary destination '{itinerary.city}' does not match requested "
-                f"destination '{preferences.city}'."
-            )
-            return False
-
-        if preferences.city and not self._covers_requested_route_days(
-            itinerary, preferences.city
+    def _evaluate_constraints(
+        self, itinerary: Itinerary, preferences: Preferences
+    ) -> list[ConstraintViolation]:
+        """Validate the plan, recording the outcome on the itinerary itself."""
+        violations = validate_itinerary(itinerary, preferences)
+        destination_ok = not any(
+            violation.code in DESTINATION_VIOLATIONS for violation in violations
+        )
+        if (
+            destination_ok
+            and preferences.city
+            and itinerary.city.lower() != preferences.city.lower()
         ):
-            itinerary.valid = False
-            itinerary.validation_error = (
-                "Multi-city itineraries must assign each requested city to at "
-                "least one itinerary day."
-            )
-            return False
-
-        if preferences.city and itinerary.city.lower() != preferences.city.lower():
             itinerary.city = preferences.city
 
-        if len(itinerary.days) != preferences.days:
-            itinerary.valid = False
-            itinerary.validation_error = f"Itinerary has {len(itinerary.days)} days, expected {preferences.days}."
-            return False
-
-        if any(not day.activities for day in itinerary.days):
-            itinerary.valid = False
-            itinerary.validation_error = (
-                "Each itinerary day must include at least one curated activity."
-            )
-            return False
-
-        activity_total = sum(
-            sum(activity.cost for activity in day.activities)
-            for day in itinerary.days
+        itinerary.valid = not violations
+        itinerary.validation_error = (
+            " ".join(violation.message for violation in violations) or None
         )
-        if abs(activity_total - itinerary.cost_breakdown.activities) > 0.01:
-            itinerary.valid = False
-            itinerary.validation_error = (
-                "Activity costs do not match cost_breakdown.activities."
-            )
-            return False
-
-        total_cost = itinerary.cost_breakdown.total
+        return violations
 
-        category_total = (
-            itinerary.cost_breakdown.transport
-            + itinerary.cost_breakdown.stay
-            + itinerary.cost_breakdown.food
-            + itinerary.cost_breakdown.activities
+    def _rebalance_budget(
+        self, itinerary: Itinerary, preferences: Preferences
+    ) -> tuple[Itinerary, list[str]] | None:
+        """Fix cost violations locally; returns a plan that passes all checks."""
+        self.rebalance_stats.attempts += 1
+        destination = preferences.city or itinerary.city
+        result = rebalance_itinerary(
+            itinerary,
+            preferences.budget,
+            budget_targets(preferences),
+            self.activities if uses_activity_catalog(destination) else [],
         )
-        if abs(category_total - itinerary.cost_breakdown.total) > 0.01:
-            itinerary.valid = False
-            itinerary.validation_error = (
-                "Cost breakdown categories do not add up to the total."
-            )
-            return False
-
-        if total_cost > preferences.budget:
-            itinerary.valid = False
-            itinerary.validation_error = (
-                f"Total cost {itinerary_money(total_cost, preferences)} exceeds "
-                f"budget {itinerary_money(preferences.budget, preferences)}."
-            )
-            return False
-
-        itinerary.valid = True
-        itinerary.validation_error = None
-        return True
-
-    def _covers_requested_destinations(
-        self,
-        itinerary: Itinerary,
-        requested_destination: str,
-    ) -> bool:
-        requested_terms = requested_destination_terms(requested_destination)
-        if not requested_terms:
-            return True
-
-        destination_text = " ".join(
-            value
-            for value in [
-                itinerary.city,
-                itinerary.recommended_destination or "",
-                *(day.city or "" for day in itinerary.days),
-            ]
-            if value
-        ).lower()
-
-        return all(term.lower() in destination_text for term in requested_terms)
-
-    def _covers_requested_route_days(
-        self,
-        itinerary: Itinerary,
-        requested_destination: str,
-    ) -> bool:
-        route_terms = requested_route_city_terms(requested_destination)
-        if len(route_terms) <= 1:
-            return True
-
-        day_city_text = " ".join(day.city or "" for day in itinerary.days).lower()
-        if not day_city_text.strip():
-            return False
+        if result is None:
+            return None
 
-        return all(term.lower() in day_city_text for term in route_terms)
+        rebalanced, changes = result
+        if not self._check_constraints(rebalanced, preferences):
+            return None
+        self.rebalance_stats.rebalanced += 1
+        return rebalanced, changes
 
     def _prepare_destination_context(
         self, preferences: Preferences
@@ -283,25 +492,58 @@ class TravelAgent:
         )
         return itinerary
 
-    def generate_initial_plan(
+    async def generate_initial_plan(
         self,
         preferences: Preferences,
         destination_suggestions: list[DestinationSuggestion] | None = None,
     ) -> Itinerary:
         logger.debug("Generating initial itinerary")
+        prompt = self._initial_prompt(preferences, destination_suggestions)
+        response_text = await self._call_model_with_fallback(prompt)
+        return await self._parse_or_repair_response(response_text, preferences)
+
+    async def generate_initial_plan_stream(
+        self,
+        preferences: Preferences,
+        destination_suggestions: list[DestinationSuggestion] | None = None,
+    ) -> AsyncIterator[DayPlan | Itinerary]:
+        """Stream the initial plan, yielding each day as soon as it is complete.
+
+        Day previews are yielded in generation order and the parsed (or
+        repaired) itinerary is yielded last. A day may be yielded again if a
+        model fails mid-stream and the next candidate starts over.
+        """
+        logger.debug("Streaming initial itinerary")
+        prompt = self._initial_prompt(preferences, destination_suggestions)
+        parser = DayStreamParser(preferences.city)
+        chunks: list[str] = []
+        async for delta in self._stream_model_with_fallback(prompt):
+            if delta is None:
+                parser = DayStreamParser(preferences.city)
+                chunks.clear()
+                continue
+            chunks.append(delta)
+            for day in parser.feed(delta):
+                yield day
+        yield await self._parse_or_repair_response("".join(chunks), preferences)
+
+    def _initial_prompt(
+        self,
+        preferences: Preferences,
+        destination_suggestions: list[DestinationSuggestion] | None,
+    ) -> str:
         targets = budget_targets(preferences)
-        prompt = initial_plan_prompt(
+        return initial_plan_prompt(
             preferences, self.activities, destination_suggestions or [], targets
         )
-        response_text = self._call_model_with_fallback(prompt)
-        return self._parse_or_repair_response(response_text, preferences)
 
-    def refine_plan(
+    async def refine_plan(
         self,
         previous_plan: Itinerary,
         error: str,
         preferences: Preferences,
         destination_suggestions: list[DestinationSuggestion] | None = None,
+        violations: list[ConstraintViolation] | None = None,
     ) -> Itinerary:
         logger.debug("Refining itinerary after validation error: %s", error)
         targets = budget_targets(preferences)
@@ -312,11 +554,19 @@ class TravelAgent:
             self.activities,
             destination_suggestions or [],
             targets,
+            violations=violations or [],
         )
-        response_text = self._call_model_with_fallback(prompt)
-        return self._parse_or_repair_response(response_text, preferences)
+        response_text = await self._call_model_with_fallback(prompt)
+        return await self._parse_or_repair_response(response_text, preferences)
+
+    async def plan_trip_stream_async(
+        self, preferences: Preferences, *, stream_days: bool = False
+    ) -> AsyncIterator[str | DayPlan | Itinerary]:
+        """Yield status messages, optional day previews and the final itinerary.
 
-    def plan_trip_stream(self, preferences: Preferences) -> Iterator[str | Itinerary]:
+        With ``stream_days`` the initial generation uses the streaming model
+        API and every DayPlan is yielded as soon as the model finishes it.
+        """
         planning_preferences, destination_suggestions = self._prepare_destination_context(
             preferences
         )
@@ -327,9 +577,21 @@ class TravelAgent:
             )
 
         yield "Travel Agent: Step 1 - Breaking plan into days & allocating activities..."
-        itinerary = self.generate_initial_plan(
-            planning_preferences, destination_suggestions
-        )
+        if stream_days:
+            itinerary: Itinerary | None = None
+            async for item in self.generate_initial_plan_stream(
+                planning_preferences, destination_suggestions
+            ):
+                if isinstance(item, DayPlan):
+                    yield item
+                else:
+                    itinerary = item
+            if itinerary is None:
+                raise RuntimeError("Planning failed to produce an itinerary result.")
+        else:
+            itinerary = await self.generate_initial_plan(
+                planning_preferences, destination_suggestions
+            )
         itinerary = self._attach_destination_context(
             itinerary, destination_suggestions, planning_preferences
         )
@@ -337,43 +599,61 @@ class TravelAgent:
         yield f"Initial allocation complete. Estimated Cost: {itinerary_money(cost, planning_preferences)}"
 
         yield "Travel Agent: Step 2 - Verifying budget & time constraints..."
-        is_valid = self._check_constraints(itinerary, planning_preferences)
-
         max_retries = 3
         attempts = 0
-        if not is_valid:
-            yield "Travel Agent: Step 3 - Budget exceeded. Initiating Re-planning Loop..."
-
-        while not is_valid and attempts < max_retries:
+        while True:
+            violations = self._evaluate_constraints(itinerary, planning_preferences)
+            is_valid = not violations
+            if violations and all(
+                violation.code in COST_VIOLATIONS for violation in violations
+            ):
+                rebalanced = self._rebalance_budget(itinerary, planning_preferences)
+                if rebalanced is not None:
+                    itinerary, changes = rebalanced
+                    is_valid = True
+                    yield "Budget rebalanced locally: " + (
+                        "; ".join(changes) or "cost breakdown totals corrected."
+                    )
+            if is_valid or attempts >= max_retries:
+                break
+
+            if attempts == 0:
+                yield "Travel Agent: Step 3 - Budget exceeded. Initiating Re-planning Loop..."
             attempts += 1
-            yield f"Constraint Violation: {itinerary.validation_error}"
+            for violation in violations:
+                yield f"Constraint Violation: {violation.message}"
             yield f"Re-planning attempt {attempts}/{max_retries}..."
 
-            itinerary = self.refine_plan(
+            itinerary = await self.refine_plan(
                 itinerary,
                 itinerary.validation_error or "Unknown Validation Error",
                 planning_preferences,
                 destination_suggestions,
+                violations=violations,
             )
             itinerary = self._attach_destination_context(
                 itinerary, destination_suggestions, planning_preferences
             )
             itinerary.calculate_total_cost()
-            is_valid = self._check_constraints(itinerary, planning_preferences)
 
         if not is_valid:
             yield "Warning: Constraints not fully met after re-planning. Returning validation error."
 
         yield "Travel Agent: Step 4 - Finalizing itinerary & generating artifacts..."
+        await self._resolve_images(itinerary)
         yield itinerary
 
-    def plan_trip(self, preferences: Preferences) -> Itinerary:
+    async def plan_trip_async(self, preferences: Preferences) -> Itinerary:
         result: Itinerary | None = None
-        for item in self.plan_trip_stream(preferences):
+        async for item in self.plan_trip_stream_async(preferences):
             if isinstance(item, Itinerary):
                 result = item
-            else:
+            elif isinstance(item, str):
                 logger.debug("Planning status: %s", item)
         if result is None:
             raise RuntimeError("Planning failed to produce an itinerary result.")
         return result
+
+    def plan_trip(self, preferences: Preferences) -> Itinerary:
+        """Blocking wrapper around plan_trip_async for callers without a loop."""
+        return asyncio.run(self.plan_trip_async(preferences))
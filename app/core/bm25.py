@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Sequence
+from itertools import pairwise
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("travel_agent_server.bm25")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+INDEX_FORMAT_VERSION = 1
+STOPWORDS = frozenset(
+    {
+        "a",
+        "all",
+        "also",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "but",
+        "by",
+        "can",
+        "for",
+        "from",
+        "has",
+        "have",
+        "in",
+        "into",
+        "is",
+        "it",
+        "its",
+        "more",
+        "of",
+        "on",
+        "or",
+        "that",
+        "the",
+        "their",
+        "this",
+        "to",
+        "where",
+        "while",
+        "with",
+        "you",
+        "your",
+    }
+)
+
+
+def stem(token: str) -> str:
+    """Fold plurals so "cafes"/"cafe" and "galleries"/"gallery" meet."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("ches", "shes", "sses", "xes")):
+        return token[:-2]
+    if (
+        len(token) > 3
+        and token.endswith("s")
+        and not token.endswith(("ss", "us", "is"))
+    ):
+        return token[:-1]
+    return token
+
+
+def words(text: str) -> list[str]:
+    folded = unicodedata.normalize("NFKD", text.casefold())
+    ascii_only = folded.encode("ascii", "ignore").decode("ascii")
+    return [stem(word) for word in re.findall(r"[a-z0-9]+", ascii_only)]
+
+
+def document_terms(text: str) -> list[str]:
+    """Whole-word unigrams plus adjacent-word bigrams, without stopwords."""
+    tokens = words(text)
+    terms = [token for token in tokens if token not in STOPWORDS]
+    terms.extend(
+        f"{left} {right}"
+        for left, right in pairwise(tokens)
+        if left not in STOPWORDS and right not in STOPWORDS
+    )
+    return terms
+
+
+def query_terms(phrase: str) -> list[str]:
+    """Index terms for a query word or phrase: its stem, or its bigrams."""
+    tokens = [token for token in words(phrase) if token not in STOPWORDS]
+    if len(tokens) <= 1:
+        return tokens
+    return [f"{left} {right}" for left, right in pairwise(tokens)]
+
+
+def fingerprint(texts: Iterable[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class BM25Index:
+    """Okapi BM25 with per-document term impacts computed at build time.
+
+    BM25 without query-term saturation is a sum of independent
+    ``idf * tf-saturation`` impacts, so each posting stores that product
+    and scoring a query is a weighted sum over the postings of its terms.
+    """
+
+    def __init__(
+        self,
+        postings: dict[str, tuple[Sequence[int], Sequence[float]]],
+        size: int,
+        source_fingerprint: str = "",
+    ):
+        self._postings = postings
+        self.size = size
+        self.fingerprint = source_fingerprint
+
+    @classmethod
+    def build(
+        cls, texts: Sequence[str], k1: float = BM25_K1, b: float = BM25_B
+    ) -> "BM25Index":
+        documents = [Counter(document_terms(text)) for text in texts]
+        lengths = [sum(counts.values()) for counts in documents]
+        average_length = sum(lengths) / len(lengths) if lengths else 0.0
+        frequencies: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for position, counts in enumerate(documents):
+            for term, count in counts.items():
+                frequencies[term].append((position, count))
+
+        postings = {}
+        for term, found in frequencies.items():
+            idf = math.log(1 + (len(texts) - len(found) + 0.5) / (len(found) + 0.5))
+            impacts = []
+            for position, count in found:
+                norm = 1 - b + b * lengths[position] / (average_length or 1)
+                impacts.append(round(idf * count * (k1 + 1) / (count + k1 * norm), 4))
+            postings[term] = (tuple(p for p, _ in found), tuple(impacts))
+        return cls(postings, len(texts), fingerprint(texts))
+
+    def postings(self, term: str) -> tuple[Sequence[int], Sequence[float]]:
+        return self._postings.get(term, ((), ()))
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._postings
+
+    def scores(self, weights: dict[str, float]) -> list[float]:
+        scores = [0.0] * self.size
+        for term, weight in weights.items():
+            positions, impacts = self.postings(term)
+            for position, impact in zip(positions, impacts):
+                scores[position] += weight * impact
+        return scores
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": INDEX_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "size": self.size,
+            "terms": {
+                term: [list(positions), list(impacts)]
+                for term, (positions, impacts) in sorted(self._postings.items())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "BM25Index":
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported BM25 index version {data.get('version')}")
+        return cls(
+            {
+                term: (tuple(positions), tuple(impacts))
+                for term, (positions, impacts) in data["terms"].items()
+            },
+            data["size"],
+            data["fingerprint"],
+        )
+
+    def save(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as fp:
+            json.dump(self.to_dict(), fp, separators=(",", ":"))
+            fp.write("\n")
+
+
+def load_or_build(path: Path, texts: Sequence[str]) -> BM25Index:
+    """Load the prebuilt index at ``path`` unless it was built from other texts."""
+    expected = fingerprint(texts)
+    try:
+        with path.open(encoding="utf-8") as fp:
+            index = BM25Index.from_dict(json.load(fp))
+    except FileNotFoundError:
+        index = None
+    except (OSError, ValueError, KeyError, TypeError):
+        logger.warning("Could not read BM25 index %s", path, exc_info=True)
+        index = None
+    if index is not None and index.fingerprint == expected:
+        return index
+    if index is not None:
+        logger.warning("BM25 index %s is stale; rebuilding in memory", path)
+    return BM25Index.build(texts)
@@ -0,0 +1,253 @@
+import math
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from app.models.domain import Activity, Itinerary
+
+FLEX_CATEGORIES = ("transport", "stay", "food")
+# The largest haircut applied to a model-estimated category before the plan
+# is considered unfixable locally and goes back to the model.
+MAX_CATEGORY_CUT = 0.35
+MAX_KNAPSACK_UNITS = 2000
+SWAP_PENALTY = 0.5
+TOLERANCE = 0.005
+
+
+@dataclass
+class RebalanceStats:
+    attempts: int = 0
+    rebalanced: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "rebalanced": self.rebalanced,
+            "llm_refinements_avoided": self.rebalanced,
+        }
+
+
+@dataclass
+class _Slot:
+    day_index: int
+    activity_index: int
+    activity: Activity
+    swap: Activity | None = None
+
+
+def rebalance_itinerary(
+    itinerary: Itinerary,
+    budget: float,
+    targets: Mapping[str, float],
+    swap_pool: Sequence[Activity] = (),
+) -> tuple[Itinerary, list[str]] | None:
+    """Fit an itinerary under the hard budget without another model call.
+
+    Works on a copy in three stages, each only as far as needed: trim
+    transport/stay/food down to their budget targets, then drop or swap
+    optional activities (a multiple-choice knapsack that keeps at least one
+    activity per day and maximizes kept activity time), then trim the
+    categories further, never below ``1 - MAX_CATEGORY_CUT`` of the model's
+    estimate. The cost breakdown sums are rebuilt from the result. Returns
+    the rebalanced copy and a description of each change, or None if the
+    budget cannot be met within those bounds.
+    """
+    plan = itinerary.model_copy(deep=True)
+    original = {
+        category: max(0.0, float(getattr(plan.cost_breakdown, category)))
+        for category in FLEX_CATEGORIES
+    }
+    categories = dict(original)
+    floors = {
+        category: _floor_cents(value * (1 - MAX_CATEGORY_CUT))
+        for category, value in original.items()
+    }
+    activity_total = sum(day.calculate_cost() for day in plan.days)
+    over = sum(categories.values()) + activity_total - budget
+    notes: list[str] = []
+
+    if over > TOLERANCE:
+        target_floors = {
+            category: max(floors[category], min(value, targets.get(category, value)))
+            for category, value in categories.items()
+        }
+        over -= _trim(categories, target_floors, over)
+
+    if over > TOLERANCE:
+        over -= _select_activities(plan, over, swap_pool, notes)
+
+    if over > TOLERANCE:
+        over -= _trim(categories, floors, over)
+
+    if over > TOLERANCE:
+        return None
+
+    for category in FLEX_CATEGORIES:
+        if categories[category] < original[category]:
+            notes.append(
+                f"Reduced {category} from {original[category]:g} "
+                f"to {categories[category]:g}"
+            )
+        setattr(plan.cost_breakdown, category, categories[category])
+    plan.cost_breakdown.activities = round(
+        sum(day.calculate_cost() for day in plan.days), 2
+    )
+    plan.total_cost = plan.cost_breakdown.calculate_total(budget)
+    return plan, notes
+
+
+def _floor_cents(value: float) -> float:
+    return math.floor(value * 100 + 1e-6) / 100
+
+
+def _trim(
+    categories: dict[str, float], lower: Mapping[str, float], needed: float
+) -> float:
+    """Cut categories toward ``lower`` in proportion to their headroom."""
+    headroom = {
+        category: value - lower[category]
+        for category, value in categories.items()
+        if value - lower[category] > 0
+    }
+    available = sum(headroom.values())
+    if available <= 0:
+        return 0.0
+
+    cut = min(needed, available)
+    before = sum(categories.values())
+    for category, room in headroom.items():
+        reduced = categories[category] - room * cut / available
+        categories[category] = max(lower[category], _floor_cents(reduced))
+    return before - sum(categories.values())
+
+
+def _activity_value(activity: Activity) -> float:
+    return 1.0 + min(max(activity.duration_hours, 0.0), 8.0)
+
+
+def _select_activities(
+    plan: Itinerary,
+    needed: float,
+    swap_pool: Sequence[Activity],
+    notes: list[str],
+) -> float:
+    """Drop or swap optional activities to save ``needed``; returns the saving."""
+    slots: list[_Slot] = []
+    for day_index, day in enumerate(plan.days):
+        if len(day.activities) < 2:
+            continue
+        anchor = min(range(len(day.activities)), key=lambda i: day.activities[i].cost)
+        slots.extend(
+            _Slot(day_index, activity_index, activity)
+            for activity_index, activity in enumerate(day.activities)
+            if activity_index != anchor
+        )
+    if not slots:
+        return 0.0
+
+    _assign_swaps(plan, slots, swap_pool)
+    optional_total = sum(slot.activity.cost for slot in slots)
+    allowance = max(0.0, optional_total - needed)
+    choices = _knapsack(slots, allowance)
+
+    dropped: dict[int, set[int]] = {}
+    for slot, choice in zip(slots, choices):
+        day = plan.days[slot.day_index]
+        if choice == "swap" and slot.swap is not None:
+            day.activities[slot.activity_index] = slot.swap.model_copy(deep=True)
+            notes.append(
+                f"Swapped {slot.activity.name} for {slot.swap.name} "
+                f"on day {day.day_number}"
+            )
+        elif choice == "drop":
+            dropped.setdefault(slot.day_index, set()).add(slot.activity_index)
+            notes.append(f"Dropped {slot.activity.name} on day {day.day_number}")
+
+    for day_index, indexes in dropped.items():
+        day = plan.days[day_index]
+        day.activities = [
+            activity
+            for index, activity in enumerate(day.activities)
+            if index not in indexes
+        ]
+
+    return optional_total - sum(
+        slot.swap.cost if choice == "swap" and slot.swap else slot.activity.cost
+        for slot, choice in zip(slots, choices)
+        if choice != "drop"
+    )
+
+
+def _assign_swaps(
+    plan: Itinerary, slots: list[_Slot], swap_pool: Sequence[Activity]
+) -> None:
+    """Give each slot, most expensive first, the best unused cheaper alternative."""
+    used = {
+        activity.name.casefold() for day in plan.days for activity in day.activities
+    }
+    for slot in sorted(slots, key=lambda slot: -slot.activity.cost):
+        candidates = [
+            activity
+            for activity in swap_pool
+            if activity.name.casefold() not in used
+            and activity.cost < slot.activity.cost
+        ]
+        if not candidates:
+            continue
+        best = max(
+            candidates, key=lambda activity: (_activity_value(activity), -activity.cost)
+        )
+        slot.swap = best
+        used.add(best.name.casefold())
+
+
+def _knapsack(slots: list[_Slot], allowance: float) -> list[str]:
+    """Pick keep/swap/drop per slot maximizing value within ``allowance``.
+
+    Costs are rounded up to a grid of at most MAX_KNAPSACK_UNITS steps so
+    the selection can never exceed the allowance.
+    """
+    unit = max(0.01, allowance / MAX_KNAPSACK_UNITS)
+    capacity = int(allowance / unit + 1e-9)
+
+    def units(cost: float) -> int:
+        return math.ceil(cost / unit - 1e-9)
+
+    options_per_slot: list[list[tuple[str, int, float]]] = []
+    for slot in slots:
+        options = [
+            ("drop", 0, 0.0),
+            ("keep", units(slot.activity.cost), _activity_value(slot.activity)),
+        ]
+        if slot.swap is not None:
+            options.append(
+                (
+                    "swap",
+                    units(slot.swap.cost),
+                    min(_activity_value(slot.swap), _activity_value(slot.activity))
+                    - SWAP_PENALTY,
+                )
+            )
+        options_per_slot.append(options)
+
+    best = [0.0] * (capacity + 1)
+    picks: list[list[int]] = []
+    for options in options_per_slot:
+        next_best = [-1.0] * (capacity + 1)
+        pick = [0] * (capacity + 1)
+        for weight in range(capacity + 1):
+            for index, (_, cost, value) in enumerate(options):
+                if cost <= weight and best[weight - cost] + value > next_best[weight]:
+                    next_best[weight] = best[weight - cost] + value
+                    pick[weight] = index
+        best = next_best
+        picks.append(pick)
+
+    choices: list[str] = []
+    weight = capacity
+    for options, pick in zip(reversed(options_per_slot), reversed(picks)):
+        name, cost, _ = options[pick[weight]]
+        choices.append(name)
+        weight -= cost
+    choices.reverse()
+    return choices
@@ -0,0 +1,320 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("travel_agent_server.cache")
+
+
+class HitRateStats:
+    """Adds ``hit_rate`` to the ``as_dict`` of a stats dataclass."""
+
+    hits: int
+    misses: int
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            **asdict(self),
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+@dataclass
+class CacheStats(HitRateStats):
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+
+class MemoryCache:
+    """Thread-safe LRU of string values with a per-entry expiry timestamp."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, now: float) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, expires_at: float) -> int:
+        """Store a value and return how many entries were evicted."""
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Size-bounded on-disk tier shared by every worker process on the host."""
+
+    def __init__(self, path: str | Path, namespace: str, max_entries: int = 10_000):
+        self.path = Path(path)
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, timeout=5
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed "
+                "ON cache_entries (namespace, accessed_at)"
+            )
+
+    def get(self, key: str, now: float) -> tuple[str, float] | None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries "
+                "WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? "
+                "WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            return str(value), float(expires_at)
+
+    def set(self, key: str, value: str, expires_at: float, now: float) -> int:
+        """Store a value and return how many entries were evicted."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(namespace, key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, value, expires_at, now),
+            )
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, now),
+            )
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchone()
+            overflow = count - self.max_entries
+            if overflow <= 0:
+                return 0
+            self._conn.execute(
+                """
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY accessed_at ASC LIMIT ?
+                )
+                """,
+                (self.namespace, self.namespace, overflow),
+            )
+            return overflow
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchone()
+        return int(count)
+
+
+class TieredCache:
+    """In-process LRU in front of an optional SQLite tier, with TTLs and counters."""
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        memory: MemoryCache | None = None,
+        disk: SQLiteCache | None = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.memory = memory if memory is not None else MemoryCache()
+        self.disk = disk
+        self.stats = CacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, key: str) -> str | None:
+        found = self.get_first([key])
+        return found[1] if found is not None else None
+
+    def get_first(self, keys: Iterable[str]) -> tuple[str, str] | None:
+        """Return the first cached ``(key, value)`` pair, counted as one lookup."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        for key in keys:
+            value = self._lookup(key, now)
+            if value is not None:
+                self.stats.hits += 1
+                return key, value
+
+        self.stats.misses += 1
+        return None
+
+    def _lookup(self, key: str, now: float) -> str | None:
+        value = self.memory.get(key, now)
+        if value is not None:
+            self.stats.memory_hits += 1
+            return value
+
+        if self.disk is None:
+            return None
+        try:
+            entry = self.disk.get(key, now)
+        except sqlite3.Error:
+            logger.warning("Disk cache lookup failed", exc_info=True)
+            return None
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        self.stats.disk_hits += 1
+        self.stats.evictions += self.memory.set(key, value, expires_at)
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if not self.enabled or ttl <= 0:
+            return
+
+        now = time.time()
+        expires_at = now + ttl
+        self.stats.stores += 1
+        self.stats.evictions += self.memory.set(key, value, expires_at)
+        if self.disk is not None:
+            try:
+                self.stats.evictions += self.disk.set(key, value, expires_at, now)
+            except sqlite3.Error:
+                logger.warning("Disk cache write failed", exc_info=True)
+
+    async def get_first_async(self, keys: Iterable[str]) -> tuple[str, str] | None:
+        """``get_first`` for coroutines; the SQLite tier is read off the loop."""
+        if self.disk is None:
+            return self.get_first(keys)
+        return await asyncio.to_thread(self.get_first, list(keys))
+
+    async def set_async(
+        self, key: str, value: str, ttl_seconds: float | None = None
+    ) -> None:
+        if self.disk is None:
+            self.set(key, value, ttl_seconds)
+            return
+        await asyncio.to_thread(self.set, key, value, ttl_seconds)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk) if self.disk is not None else None,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+def cache_from_env(
+    prefix: str,
+    namespace: str,
+    *,
+    default_ttl_seconds: float,
+    default_max_entries: int = 512,
+    default_disk_max_entries: int = 10_000,
+) -> TieredCache:
+    """Build a TieredCache from ``<PREFIX>_CACHE_*`` environment variables.
+
+    The SQLite tier is only enabled when ``<PREFIX>_CACHE_PATH`` is set, and a
+    TTL of 0 disables the cache entirely.
+    """
+    ttl_seconds = float(
+        os.environ.get(f"{prefix}_CACHE_TTL_SECONDS", str(default_ttl_seconds))
+    )
+    memory = MemoryCache(
+        int(os.environ.get(f"{prefix}_CACHE_MAX_ENTRIES", str(default_max_entries)))
+    )
+    disk = None
+    path = os.environ.get(f"{prefix}_CACHE_PATH")
+    if path:
+        disk = SQLiteCache(
+            path,
+            namespace,
+            int(
+                os.environ.get(
+                    f"{prefix}_CACHE_DISK_MAX_ENTRIES", str(default_disk_max_entries)
+                )
+            ),
+        )
+    return TieredCache(ttl_seconds, memory=memory, disk=disk)
+
+
+def stable_hash(*parts: object) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+from app.core.cache import stable_hash
+from app.models.domain import DayPlan, Itinerary, Preferences
+
+logger = logging.getLogger("travel_agent_server.coalesce")
+
+PlanEvent = str | DayPlan | Itinerary
+
+
+def _normalize_text(value: str | None) -> str:
+    return " ".join((value or "").split()).casefold()
+
+
+def preferences_key(preferences: Preferences) -> str:
+    """Hash the fields that affect planning, ignoring case, spacing and order."""
+    interests = sorted(
+        {_normalize_text(interest) for interest in preferences.interests} - {""}
+    )
+    return stable_hash(
+        _normalize_text(preferences.city),
+        preferences.budget,
+        preferences.uses_local_budget,
+        preferences.days,
+        "|".join(interests),
+        _normalize_text(preferences.vibe),
+        preferences.work_friendly,
+        (preferences.start_date or "").strip(),
+    )
+
+
+class _PlanFlight:
+    """Replayable event log of one planning run shared by every subscriber."""
+
+    def __init__(self) -> None:
+        self.events: list[PlanEvent] = []
+        self.error: BaseException | None = None
+        self.done = False
+        self._changed = asyncio.Condition()
+
+    async def publish(self, event: PlanEvent) -> None:
+        async with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    async def finish(self, error: BaseException | None = None) -> None:
+        async with self._changed:
+            self.error = error
+            self.done = True
+            self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[PlanEvent]:
+        position = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda seen=position: seen < len(self.events) or self.done
+                )
+                pending = self.events[position:]
+                position += len(pending)
+                finished = self.done and position == len(self.events)
+
+            for event in pending:
+                if isinstance(event, (DayPlan, Itinerary)):
+                    yield event.model_copy(deep=True)
+                else:
+                    yield event
+
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class PlanCoalescer:
+    """Fan one in-flight planning run out to identical concurrent requests.
+
+    The first request for a normalized set of preferences becomes the leader
+    and runs ``agent.plan_trip_stream_async`` in a background task. Requests
+    that arrive while it is running replay the status messages published so
+    far and then receive the same events, including the final itinerary, at
+    the same time as the leader.
+
+    Only subscribers that want day previews start a streaming run; the rest
+    use the hedged non-streaming model call, and may join either kind of run.
+    """
+
+    def __init__(self, agent: Any):
+        self.agent = agent
+        self.leaders = 0
+        self.followers = 0
+        self._flights: dict[tuple[str, bool], _PlanFlight] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def stream(
+        self, preferences: Preferences, *, stream_days: bool = True
+    ) -> AsyncIterator[PlanEvent]:
+        key = (preferences_key(preferences), stream_days)
+        flight = self._flights.get(key)
+        if flight is None and not stream_days:
+            flight = self._flights.get((key[0], True))
+        if flight is None:
+            self.leaders += 1
+            flight = _PlanFlight()
+            self._flights[key] = flight
+            task = asyncio.create_task(self._run(key, flight, preferences))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self.followers += 1
+            logger.info("Joining in-flight planning run for identical preferences")
+
+        async for event in flight.subscribe():
+            yield event
+
+    async def plan(self, preferences: Preferences) -> Itinerary:
+        result: Itinerary | None = None
+        async for event in self.stream(preferences, stream_days=False):
+            if isinstance(event, Itinerary):
+                result = event
+        if result is None:
+            raise RuntimeError("Planning failed to produce an itinerary result.")
+        return result
+
+    async def _run(
+        self, key: tuple[str, bool], flight: _PlanFlight, preferences: Preferences
+    ) -> None:
+        error: BaseException | None = None
+        try:
+            async for event in self.agent.plan_trip_stream_async(
+                preferences, stream_days=key[1]
+            ):
+                await flight.publish(event)
+        except asyncio.CancelledError:
+            error = RuntimeError("Planning run was cancelled.")
+            raise
+        except Exception as exc:
+            logger.warning("Shared planning run failed", exc_info=True)
+            error = exc
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            await flight.finish(error)
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
@@ -0,0 +1,277 @@
+import heapq
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from typing import Any
+
+# Other spellings of catalog places. Keys and values are compared after
+# normalize_place; aliases whose target is not in the catalog are ignored.
+DESTINATION_ALIASES = {
+    "bombay": "Mumbai",
+    "cracow": "Krakow",
+    "cuzco": "Cusco",
+    "czechia": "Czech Republic",
+    "england": "UK",
+    "firenze": "Florence",
+    "great britain": "UK",
+    "holland": "Netherlands",
+    "hongkong": "Hong Kong",
+    "lisboa": "Lisbon",
+    "marrakesh": "Marrakech",
+    "milano": "Milan",
+    "new york": "New York City",
+    "nyc": "New York City",
+    "praha": "Prague",
+    "roma": "Rome",
+    "the netherlands": "Netherlands",
+    "turkiye": "Turkey",
+    "united kingdom": "UK",
+    "united states of america": "USA",
+    "us": "USA",
+    "vegas": "Las Vegas",
+    "wien": "Vienna",
+}
+
+_END = ""
+# Typo matching: minimum similarity (1 - edit distance / length) and the
+# shortest term considered, since short names are too close to each other.
+FUZZY_MIN_SIMILARITY = 0.8
+FUZZY_MIN_LENGTH = 5
+# A term is taken for the closest catalog name when no other name comes
+# within this margin. Real places one letter apart ("Paros"/"Paris",
+# "Chiang Rai"/"Chiang Mai") are common, so each misspelt word must also
+# have this many letters per edit, or differ only by two swapped letters.
+FUZZY_RESOLVE_MARGIN = 0.05
+FUZZY_LETTERS_PER_EDIT = 6
+# Names sharing the most trigrams with a term that get an exact edit distance.
+FUZZY_CANDIDATES = 8
+# Trigrams found in more spellings than this are too common to rank by.
+FUZZY_MAX_POSTINGS = 512
+
+
+def normalize_place(value: object) -> str:
+    """Casefold, strip accents and reduce punctuation to single spaces."""
+    folded = unicodedata.normalize("NFKD", str(value).casefold())
+    ascii_only = folded.encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.findall(r"[a-z0-9]+", ascii_only))
+
+
+def trigrams(normalized: str) -> set[str]:
+    padded = f"  {normalized} "
+    return {padded[start : start + 3] for start in range(len(padded) - 2)}
+
+
+def edit_distance(left: str, right: str) -> int:
+    """Levenshtein distance where swapping two adjacent letters costs one."""
+    previous_row = None
+    row = list(range(len(right) + 1))
+    for i in range(1, len(left) + 1):
+        previous_row, last_row = row, previous_row
+        row = [i] + [0] * len(right)
+        for j in range(1, len(right) + 1):
+            cost = left[i - 1] != right[j - 1]
+            row[j] = min(
+                previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost
+            )
+            if (
+                i > 1
+                and j > 1
+                and left[i - 1] == right[j - 2]
+                and left[i - 2] == right[j - 1]
+            ):
+                row[j] = min(row[j], last_row[j - 2] + 1)
+    return row[-1]
+
+
+def is_transposition(left: str, right: str) -> bool:
+    """Whether ``right`` is ``left`` with two adjacent letters swapped."""
+    if len(left) != len(right):
+        return False
+    differences = [i for i, (a, b) in enumerate(zip(left, right)) if a != b]
+    return (
+        len(differences) == 2
+        and differences[1] == differences[0] + 1
+        and left[differences[0]] == right[differences[1]]
+        and left[differences[1]] == right[differences[0]]
+    )
+
+
+def is_word_typo(word: str, intended: str) -> bool:
+    if word == intended or is_transposition(word, intended):
+        return True
+    longest = max(len(word), len(intended))
+    return edit_distance(word, intended) * FUZZY_LETTERS_PER_EDIT <= longest
+
+
+def similarity(left: str, right: str) -> float:
+    longest = max(len(left), len(right))
+    return 1 - edit_distance(left, right) / longest if longest else 1.0
+
+
+class DestinationLookup:
+    """Constant-time city/country recognition for requested destinations.
+
+    Built once per catalog: normalized city and country sets, an alias table
+    mapping other spellings to catalog names, a token trie that finds
+    multi-word names inside longer text and a trigram index for typos.
+    ``positions`` lists, for each name, the destinations whose city or
+    country contains it as whole words.
+    """
+
+    def __init__(
+        self,
+        destinations: Sequence[dict[str, Any]],
+        aliases: dict[str, str] = DESTINATION_ALIASES,
+    ):
+        self.cities = frozenset(
+            normalize_place(item["city"]) for item in destinations if item.get("city")
+        )
+        self.countries = frozenset(
+            normalize_place(item["country"])
+            for item in destinations
+            if item.get("country")
+        )
+        names = self.cities | self.countries
+        self.aliases = {
+            normalize_place(alias): normalize_place(target)
+            for alias, target in aliases.items()
+            if normalize_place(target) in names
+        }
+        self.spellings: dict[str, set[str]] = {name: {name} for name in names}
+        for alias, name in self.aliases.items():
+            self.spellings[name].add(alias)
+
+        self._trie: dict[str, Any] = {}
+        self._trigrams: dict[str, list[str]] = defaultdict(list)
+        for name, spellings in self.spellings.items():
+            for spelling in spellings:
+                self._add_to_trie(spelling.split(), name)
+                for trigram in trigrams(spelling):
+                    self._trigrams[trigram].append(spelling)
+
+        positions: dict[str, list[int]] = defaultdict(list)
+        for position, item in enumerate(destinations):
+            found = self.names_in(str(item.get("city", "")), longest=False)
+            found += self.names_in(str(item.get("country", "")), longest=False)
+            for name in dict.fromkeys(found):
+                positions[name].append(position)
+        self.positions = {name: tuple(found) for name, found in positions.items()}
+
+    def _add_to_trie(self, tokens: list[str], name: str) -> None:
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[_END] = name
+
+    def canonical(self, term: str) -> str | None:
+        """Catalog name (normalized) that ``term`` spells, if any."""
+        normalized = normalize_place(term)
+        if normalized in self.spellings:
+            return normalized
+        return self.aliases.get(normalized)
+
+    def fuzzy(
+        self,
+        term: str,
+        limit: int = 3,
+        threshold: float = FUZZY_MIN_SIMILARITY,
+    ) -> list[tuple[str, float]]:
+        """Catalog names within ``threshold`` similarity of ``term``, best first.
+
+        Trigram overlap picks a handful of candidate spellings; only those
+        get an exact edit distance, so the cost barely grows with the catalog.
+        """
+        normalized = normalize_place(term)
+        if len(normalized) < FUZZY_MIN_LENGTH:
+            return []
+        shared = Counter()
+        for trigram in trigrams(normalized):
+            postings = self._trigrams.get(trigram, ())
+            if len(postings) <= FUZZY_MAX_POSTINGS:
+                shared.update(postings)
+        candidates = heapq.nlargest(
+            FUZZY_CANDIDATES, shared.items(), key=lambda item: (item[1], item[0])
+        )
+
+        best: dict[str, float] = {}
+        for spelling, _ in candidates:
+            longest = max(len(spelling), len(normalized))
+            if abs(len(spelling) - len(normalized)) > (1 - threshold) * longest:
+                continue
+            score = similarity(normalized, spelling)
+            if score >= threshold:
+                name = self.aliases.get(spelling, spelling)
+                best[name] = max(score, best.get(name, 0.0))
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def resolve(self, term: str) -> str | None:
+        """Catalog name for ``term``, allowing for an unambiguous typo."""
+        name = self.canonical(term)
+        if name is not None:
+            return name
+        matches = self.fuzzy(term, limit=2)
+        if not matches:
+            return None
+        if len(matches) > 1 and matches[0][1] - matches[1][1] < FUZZY_RESOLVE_MARGIN:
+            return None
+        name = matches[0][0]
+        words = normalize_place(term).split()
+        for spelling in self.spellings[name]:
+            intended = spelling.split()
+            if len(intended) == len(words) and all(
+                is_word_typo(word, expected) for word, expected in zip(words, intended)
+            ):
+                return name
+        return None
+
+    def is_city(self, term: str) -> bool:
+        return self.canonical(term) in self.cities
+
+    def is_country(self, term: str) -> bool:
+        return self.canonical(term) in self.countries
+
+    def names_in(self, text: str, longest: bool = True) -> list[str]:
+        """Catalog names mentioned in ``text`` as whole words, in order.
+
+        With ``longest`` only the longest name starting at each word is kept
+        and scanning resumes after it; otherwise nested names are reported too.
+        """
+        tokens = normalize_place(text).split()
+        found = []
+        start = 0
+        while start < len(tokens):
+            node = self._trie
+            matches = []
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if _END in node:
+                    matches.append((end, node[_END]))
+            if matches and longest:
+                end, name = matches[-1]
+                found.append(name)
+                start = end + 1
+                continue
+            found.extend(name for _, name in matches)
+            start += 1
+        return found
+
+    def mentions(self, text: str, term: str) -> bool:
+        """Whether ``text`` contains ``term`` or another spelling of its place.
+
+        The term itself may match inside a word, as the plain substring check
+        did; alternative spellings, and the catalog name of a clear typo, must
+        match whole words.
+        """
+        haystack = normalize_place(text)
+        normalized = normalize_place(term)
+        if normalized and normalized in haystack:
+            return True
+        name = self.resolve(term)
+        if name is None:
+            return False
+        padded = f" {haystack} "
+        return any(f" {spelling} " in padded for spelling in self.spellings[name])
@@ -1,27 +1,64 @@
+import bisect
+import heapq
 import json
 import re
+from collections import defaultdict
+from collections.abc import Sequence
 from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+from app.core.bm25 import BM25Index, load_or_build, query_terms
+from app.core.destination_lookup import DestinationLookup
 from app.models.domain import DestinationSuggestion, Preferences
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; without it DestinationMatrix is unused.
+    np = None
+
 DESTINATIONS_PATH = Path(__file__).resolve().parents[1] / "data" / "destinations.json"
+# Built by scripts/build_destination_index.py; rebuilt in memory when stale.
+RELEVANCE_INDEX_PATH = DESTINATIONS_PATH.with_name("destination_bm25.json")
 
 INTEREST_KEYWORDS = {
-    "adventure": {"adventure", "hiking", "trek", "surf", "diving", "rafting"},
-    "art": {"art", "gallery", "museum", "architecture", "creative"},
+    "adventure": {
+        "adventure",
+        "hiking",
+        "trek",
+        "trekking",
+        "surf",
+        "surfing",
+        "diving",
+        "rafting",
+    },
+    "art": {"art", "artistic", "gallery", "museum", "architecture", "creative"},
     "cafes": {"cafe", "cafes", "coffee", "street food", "food"},
     "food": {"food", "cuisine", "street food", "cafe", "cafes", "dining"},
-    "history": {"history", "historic", "ancient", "heritage", "monastery"},
+    "history": {
+        "history",
+        "historic",
+        "historical",
+        "ancient",
+        "heritage",
+        "monastery",
+    },
     "nature": {"nature", "beach", "mountain", "forest", "lake", "wildlife"},
     "nightlife": {"nightlife", "bars", "music", "lively"},
-    "romantic": {"romantic", "relaxed", "sunset", "charm"},
+    "romantic": {"romantic", "relaxed", "sunset", "charm", "charming"},
     "shopping": {"market", "shopping", "shops", "boutique"},
 }
 
 VIBE_KEYWORDS = {
-    "ancient": {"ancient", "historic", "heritage", "temple", "medieval", "old town"},
+    "ancient": {
+        "ancient",
+        "historic",
+        "historical",
+        "heritage",
+        "temple",
+        "medieval",
+        "old town",
+    },
     "beach": {"beach", "coastal", "ocean", "island", "reef", "turquoise"},
     "budget": {"budget", "affordable", "cheap", "shoestring", "reasonable"},
     "cafes": {"cafe", "cafes", "coffee", "street food", "food"},
@@ -31,9 +68,9 @@ VIBE_KEYWORDS = {
     "digital": {"cafe", "cafes", "city", "markets", "affordable", "culture"},
     "foodie": {"food", "cuisine", "street food", "dining", "flavors"},
     "luxury": {"luxury", "glamour", "high-end", "opulent", "designer"},
-    "mountain": {"mountain", "hike", "hiking", "trek", "alps", "andes"},
+    "mountain": {"mountain", "hike", "hiking", "trek", "trekking", "alps", "andes"},
     "quiet": {"tranquil", "serene", "laid-back", "relaxed", "hidden"},
-    "romantic": {"romantic", "sunset", "charm", "palaces", "canals"},
+    "romantic": {"romantic", "sunset", "charm", "charming", "palaces", "canals"},
 }
 
 WORK_FRIENDLY_CITIES = {
@@ -62,6 +99,15 @@ REMOTE_WORK_RISK_TERMS = {
     "outback",
 }
 
+WORK_FRIENDLY_QUERY = "digital quiet cafes budget city"
+# Free-text query words whose hit lists are remembered between requests.
+MAX_CACHED_QUERY_TERMS = 4096
+# Below this many destinations the plain loop beats NumPy's per-call overhead.
+MATRIX_MIN_DESTINATIONS = 500
+# Converts BM25 impacts (typically 1-4) to the point scale of substring
+# matching (an index without ``relevance``), where a hit adds its weight once.
+RELEVANCE_WEIGHT_SCALE = 0.5
+
 
 @lru_cache
 def load_destinations() -> list[dict[str, Any]]:
@@ -69,26 +115,305 @@ def load_destinations() -> list[dict[str, Any]]:
         return json.load(fp)
 
 
+class DestinationIndex:
+    """Destination catalog prepared once for repeated scoring.
+
+    Without a ``relevance`` index, the searchable text of every destination
+    is joined into one corpus, so the destinations containing a term are
+    found with a few ``str.find`` calls instead of an ``in`` check per
+    destination. Hit lists for the keyword maps, tags and the
+    preference-independent part of the work-friendly score are computed up
+    front; hit lists for free-text query words are memoized.
+
+    With a ``relevance`` index, text terms match whole words of the
+    description and rationale and add their BM25 weight instead of a flat
+    amount per substring hit.
+    """
+
+    def __init__(
+        self,
+        destinations: Sequence[dict[str, Any]],
+        relevance: BM25Index | None = None,
+    ):
+        self.destinations = destinations
+        self.relevance = relevance
+        self.cities = [str(item.get("city", "")).lower() for item in destinations]
+        self.countries = [
+            str(item.get("country", "")).lower() for item in destinations
+        ]
+        self.costs = [float(item.get("estimated_cost") or 0) for item in destinations]
+
+        self._corpus = ""
+        self._starts: list[int] = []
+        if relevance is None:
+            texts = [_destination_text(item) for item in destinations]
+            # "\x00" never occurs in the text, so no term can match across items.
+            self._corpus = "\x00".join(texts)
+            offset = 0
+            for text in texts:
+                self._starts.append(offset)
+                offset += len(text) + 1
+
+        self._keyword_hits: dict[str, tuple[int, ...]] = {}
+        for keywords in (
+            *INTEREST_KEYWORDS.values(),
+            *VIBE_KEYWORDS.values(),
+            REMOTE_WORK_RISK_TERMS,
+        ):
+            for keyword in keywords:
+                self._keyword_hits[keyword] = self._matching(keyword)
+        self._query_hits: dict[str, tuple[int, ...]] = {}
+
+        self.tags: list[list[str]] = [[] for _ in destinations]
+        for tag, keywords in sorted(INTEREST_KEYWORDS.items()):
+            tagged = set()
+            for keyword in keywords:
+                tagged.update(self._keyword_hits[keyword])
+            for position in tagged:
+                self.tags[position].append(tag.title())
+
+        work_weights: dict[str, float] = defaultdict(float)
+        _add_semantic_weights(work_weights, WORK_FRIENDLY_QUERY, VIBE_KEYWORDS, 3)
+        self.work_bonus = self._weighted_hits(self._index_weights(work_weights))
+        for position, item in enumerate(destinations):
+            if item.get("city") in WORK_FRIENDLY_CITIES:
+                self.work_bonus[position] += 28
+        for position in {
+            position
+            for term in REMOTE_WORK_RISK_TERMS
+            for position in self._keyword_hits[term]
+        }:
+            self.work_bonus[position] -= 35
+
+        self.matrix = None
+        if np is not None and len(destinations) >= MATRIX_MIN_DESTINATIONS:
+            self.matrix = DestinationMatrix(self)
+
+    def __len__(self) -> int:
+        return len(self.destinations)
+
+    def _search(self, term: str) -> tuple[int, ...]:
+        positions = []
+        start = self._corpus.find(term)
+        while start != -1:
+            position = bisect.bisect_right(self._starts, start) - 1
+            positions.append(position)
+            if position + 1 == len(self._starts):
+                break
+            start = self._corpus.find(term, self._starts[position + 1])
+        return tuple(positions)
+
+    def hits(self, term: str) -> tuple[int, ...]:
+        """Positions of the destinations whose text contains ``term``."""
+        found = self._keyword_hits.get(term)
+        if found is None:
+            found = self._query_hits.get(term)
+        if found is None:
+            if len(self._query_hits) >= MAX_CACHED_QUERY_TERMS:
+                self._query_hits.clear()
+            found = self._query_hits[term] = self._matching(term)
+        return found
+
+    def _matching(self, keyword: str) -> tuple[int, ...]:
+        if self.relevance is None:
+            return self._search(keyword)
+        positions = set()
+        for term in query_terms(keyword):
+            positions.update(self.relevance.postings(term)[0])
+        return tuple(sorted(positions))
+
+    def _index_weights(self, weights: dict[str, float]) -> dict[str, float]:
+        """Map query-term weights onto the terms the index scores by."""
+        if self.relevance is None:
+            return weights
+        converted: dict[str, float] = defaultdict(float)
+        for term, weight in weights.items():
+            for index_term in query_terms(term):
+                converted[index_term] += weight * RELEVANCE_WEIGHT_SCALE
+        return converted
+
+    def query_weights(self, preferences: Preferences) -> dict[str, float]:
+        return self._index_weights(_query_weights(preferences))
+
+    def postings(self, term: str) -> tuple[Sequence[int], Sequence[float] | None]:
+        """Destinations matching an index term and, with BM25, their weights."""
+        if self.relevance is None:
+            return self.hits(term), None
+        return self.relevance.postings(term)
+
+    def _weighted_hits(self, weights: dict[str, float]) -> list[float]:
+        if self.relevance is not None:
+            return self.relevance.scores(weights)
+        scores = [0.0] * len(self.destinations)
+        for term, weight in weights.items():
+            for position in self.hits(term):
+                scores[position] += weight
+        return scores
+
+    def scores(self, preferences: Preferences) -> list[float]:
+        scores = self._weighted_hits(self.query_weights(preferences))
+
+        if preferences.city:
+            requested = preferences.city.lower()
+            for position, city in enumerate(self.cities):
+                if requested == city:
+                    scores[position] += 200
+                elif requested in city or requested in self.countries[position]:
+                    scores[position] += 80
+
+        budget = preferences.budget
+        for position, estimated_cost in enumerate(self.costs):
+            score = scores[position]
+            if estimated_cost and budget:
+                if estimated_cost <= budget:
+                    score += 45
+                    budget_room = max(budget - estimated_cost, 0)
+                    score += max(0, 25 * (1 - budget_room / budget))
+                    if estimated_cost <= budget * 0.75:
+                        score += 8
+                else:
+                    over_ratio = (estimated_cost - budget) / budget
+                    score -= 85 + (over_ratio * 90)
+            if preferences.work_friendly:
+                bonus = self.work_bonus[position]
+                if estimated_cost and estimated_cost <= budget:
+                    bonus += 10
+                score += bonus
+            scores[position] = score
+        return scores
+
+    def top(self, preferences: Preferences, limit: int) -> list[int]:
+        if self.matrix is not None:
+            return self.matrix.top(preferences, limit)
+        scores = self.scores(preferences)
+        # nlargest keeps catalog order among ties, like a stable sort.
+        return heapq.nlargest(limit, range(len(scores)), key=scores.__getitem__)
+
+    def suggestion(self, position: int) -> DestinationSuggestion:
+        item = self.destinations[position]
+        return DestinationSuggestion(
+            city=str(item.get("city", "")),
+            country=item.get("country"),
+            rationale=item.get("rationale") or item.get("description"),
+            estimated_total_cost=self.costs[position],
+            tags=self.tags[position],
+        )
+
+
+class DestinationMatrix:
+    """Columnar NumPy scorer over a DestinationIndex, for large catalogs.
+
+    Keyword hits form a destination x keyword 0/1 matrix, so all keyword
+    weights of a request are applied with one matrix-vector product; the
+    budget and work-friendly terms are whole-column operations. Scores are
+    bit-for-bit those of ``DestinationIndex.scores``; with a BM25 index the
+    matrix holds term weights and scores agree up to float rounding.
+    """
+
+    def __init__(self, index: DestinationIndex):
+        self.index = index
+        if index.relevance is None:
+            terms = list(index._keyword_hits)
+            dtype = np.uint8
+        else:
+            terms = sorted(
+                {term for keyword in index._keyword_hits for term in query_terms(keyword)}
+            )
+            dtype = np.float32
+        self.keywords = {keyword: column for column, keyword in enumerate(terms)}
+        self.keyword_hits = np.zeros((len(index), len(self.keywords)), dtype=dtype)
+        for keyword, column in self.keywords.items():
+            positions, values = index.postings(keyword)
+            self.keyword_hits[list(positions), column] = 1 if values is None else values
+        self.costs = np.asarray(index.costs, dtype=np.float64)
+        self.work_bonus = np.asarray(index.work_bonus, dtype=np.float64)
+
+    def scores(self, preferences: Preferences) -> "np.ndarray":
+        index = self.index
+        keyword_weights = np.zeros(len(self.keywords), dtype=np.float64)
+        scores = np.zeros(len(index), dtype=np.float64)
+        for term, weight in index.query_weights(preferences).items():
+            column = self.keywords.get(term)
+            if column is not None:
+                keyword_weights[column] = weight
+                continue
+            positions, values = index.postings(term)
+            if values is None:
+                scores[list(positions)] += weight
+            else:
+                scores[list(positions)] += weight * np.asarray(values)
+        # 0/1 hits with whole-number weights sum exactly in any order. BM25
+        # impacts are float32 here, so with a BM25 index the scores match
+        # DestinationIndex.scores only up to float rounding.
+        scores += self.keyword_hits @ keyword_weights
+
+        if preferences.city:
+            requested = preferences.city.lower()
+            for position, city in enumerate(index.cities):
+                if requested == city:
+                    scores[position] += 200
+                elif requested in city or requested in index.countries[position]:
+                    scores[position] += 80
+
+        costs = self.costs
+        budget = preferences.budget
+        if budget:
+            priced = costs != 0
+            within = priced & (costs <= budget)
+            over = priced & (costs > budget)
+            budget_room = np.maximum(budget - costs[within], 0)
+            scores[within] += 45
+            scores[within] += np.maximum(0, 25 * (1 - budget_room / budget))
+            scores[within & (costs <= budget * 0.75)] += 8
+            over_ratio = (costs[over] - budget) / budget
+            scores[over] -= 85 + (over_ratio * 90)
+        if preferences.work_friendly:
+            affordable = (costs != 0) & (costs <= budget)
+            scores += self.work_bonus + np.where(affordable, 10, 0)
+        return scores
+
+    def top(self, preferences: Preferences, limit: int) -> list[int]:
+        scores = self.scores(preferences)
+        if limit <= 0:
+            return []
+        if limit < len(scores):
+            # Keep every destination tied with the k-th best so ties resolve
+            # in catalog order, as the stable sort does.
+            kth = -np.partition(-scores, limit - 1)[limit - 1]
+            candidates = np.flatnonzero(scores >= kth)
+        else:
+            candidates = np.arange(len(scores))
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order[:limit]].tolist()
+
+
+@lru_cache
+def destination_relevance() -> BM25Index:
+    texts = [_relevance_text(item) for item in load_destinations()]
+    return load_or_build(RELEVANCE_INDEX_PATH, texts)
+
+
+@lru_cache
+def destination_index() -> DestinationIndex:
+    return DestinationIndex(load_destinations(), relevance=destination_relevance())
+
+
+@lru_cache
+def destination_lookup() -> DestinationLookup:
+    return DestinationLookup(load_destinations())
+
+
 def recommend_destinations(
     preferences: Preferences,
     limit: int = 3,
 ) -> list[DestinationSuggestion]:
     requested_terms = requested_destination_terms(preferences.city)
-    destinations = load_destinations()
+    index = destination_index()
     if requested_terms:
-        matches = [
-            item
-            for item in destinations
-            if _matches_requested_destination(item, requested_terms)
-        ]
-        return [_to_suggestion(item) for item in matches[:limit]]
+        matches = _requested_positions(index, requested_terms)
+        return [index.suggestion(position) for position in matches[:limit]]
 
-    candidates = sorted(
-        destinations,
-        key=lambda item: _score_destination(item, preferences),
-        reverse=True,
-    )
-    return [_to_suggestion(item) for item in candidates[:limit]]
+    return [index.suggestion(position) for position in index.top(preferences, limit)]
 
 
 def destination_context(suggestions: list[DestinationSuggestion]) -> str:
@@ -110,17 +435,6 @@ def destination_context(suggestions: list[DestinationSuggestion]) -> str:
     return "\n".join(lines)
 
 
-def _to_suggestion(item: dict[str, Any]) -> DestinationSuggestion:
-    text = _destination_text(item)
-    return DestinationSuggestion(
-        city=str(item.get("city", "")),
-        country=item.get("country"),
-        rationale=item.get("rationale") or item.get("description"),
-        estimated_total_cost=float(item.get("estimated_cost") or 0),
-        tags=sorted(_matched_tags(text)),
-    )
-
-
 def requested_destination_terms(value: str | None) -> list[str]:
     if not value:
         return []
@@ -131,15 +445,11 @@ def requested_destination_terms(value: str | None) -> list[str]:
 
 
 def requested_route_city_terms(value: str | None) -> list[str]:
-    countries = {
-        str(item.get("country", "")).lower()
-        for item in load_destinations()
-        if item.get("country")
-    }
+    lookup = destination_lookup()
     return [
         term
         for term in requested_destination_terms(value)
-        if term.lower() not in countries
+        if not lookup.is_country(term)
     ]
 
 
@@ -147,77 +457,36 @@ def _without_incomplete_destination_fragments(terms: list[str]) -> list[str]:
     if len(terms) <= 1:
         return terms
 
-    known_cities = {
-        str(item.get("city", "")).lower()
-        for item in load_destinations()
-        if item.get("city")
-    }
-    has_known_city = any(term.lower() in known_cities for term in terms)
+    lookup = destination_lookup()
+    has_known_city = any(lookup.is_city(term) for term in terms)
     if not has_known_city:
         return terms
 
-    return [
-        term
-        for term in terms
-        if term.lower() in known_cities or len(term) > 4
-    ]
-
+    return [term for term in terms if lookup.is_city(term) or len(term) > 4]
 
-def _matches_requested_destination(
-    item: dict[str, Any],
-    requested_terms: list[str],
-) -> bool:
-    city = str(item.get("city", "")).lower()
-    country = str(item.get("country", "")).lower()
 
+def _requested_positions(index: DestinationIndex, requested_terms: list[str]) -> list[int]:
+    """Catalog positions of the destinations named by any requested term."""
+    lookup = destination_lookup()
+    positions = set()
     for term in requested_terms:
+        name = lookup.canonical(term)
+        if name is not None:
+            positions.update(lookup.positions.get(name, ()))
+            continue
+        # Not a catalog name: fall back to matching part of a city or country.
         requested = term.lower()
-        if requested == city or requested == country:
-            return True
-        if requested in city or requested in country:
-            return True
-    return False
-
-
-def _score_destination(item: dict[str, Any], preferences: Preferences) -> float:
-    text = _destination_text(item)
-    score = 0.0
-
-    if preferences.city:
-        city = str(item.get("city", "")).lower()
-        country = str(item.get("country", "")).lower()
-        requested = preferences.city.lower()
-        if requested == city:
-            score += 200
-        elif requested in city or requested in country:
-            score += 80
-
-    score += _text_score(preferences.vibe or "", text, weight=9)
-    score += _semantic_score(preferences.vibe or "", text, VIBE_KEYWORDS, weight=6)
-    for interest in preferences.interests:
-        normalized_interest = _clean_interest(interest)
-        score += _text_score(normalized_interest, text, weight=8)
-        score += _keyword_score(normalized_interest, text, INTEREST_KEYWORDS, weight=7)
-        score += _semantic_score(
-            normalized_interest, text, VIBE_KEYWORDS, weight=4
-        )
-
-    estimated_cost = float(item.get("estimated_cost") or 0)
-    if estimated_cost and preferences.budget:
-        if estimated_cost <= preferences.budget:
-            score += 45
-            budget_room = max(preferences.budget - estimated_cost, 0)
-            score += max(0, 25 * (1 - budget_room / preferences.budget))
-            if estimated_cost <= preferences.budget * 0.75:
-                score += 8
-        else:
-            over_ratio = (estimated_cost - preferences.budget) / preferences.budget
-            score -= 85 + (over_ratio * 90)
-
-    if preferences.work_friendly:
-        score += _work_friendly_score(item, text, preferences)
-
-    return score
+        found = {
+            position
+            for position, city in enumerate(index.cities)
+            if requested in city or requested in index.countries[position]
+        }
+        if not found:
+            # Only a clear typo of a catalog name; other places get no picks.
+            name = lookup.resolve(term)
+            found = set(lookup.positions.get(name, ())) if name else set()
+        positions.update(found)
+    return sorted(positions)
 
 
 def _destination_text(item: dict[str, Any]) -> str:
@@ -227,66 +496,44 @@ def _destination_text(item: dict[str, Any]) -> str:
     ).lower()
 
 
-def _clean_interest(value: str) -> str:
-    return re.sub(r"^[^\w]+", "", value).strip().lower()
+def _relevance_text(item: dict[str, Any]) -> str:
+    return " ".join(str(item.get(key) or "") for key in ("description", "rationale"))
 
 
-def _text_score(query: str, text: str, weight: float) -> float:
-    words = [word for word in re.findall(r"[a-z0-9]+", query.lower()) if len(word) > 2]
-    return sum(weight for word in words if word in text)
+def _query_weights(preferences: Preferences) -> dict[str, float]:
+    """Total weight each text term adds to a destination containing it."""
+    weights: dict[str, float] = defaultdict(float)
+    vibe = preferences.vibe or ""
+    _add_text_weights(weights, vibe, 9)
+    _add_semantic_weights(weights, vibe, VIBE_KEYWORDS, 6)
+    for interest in preferences.interests:
+        normalized_interest = _clean_interest(interest)
+        _add_text_weights(weights, normalized_interest, 8)
+        for keyword in INTEREST_KEYWORDS.get(normalized_interest, set()):
+            weights[keyword] += 7
+        _add_semantic_weights(weights, normalized_interest, VIBE_KEYWORDS, 4)
+    return weights
 
 
-def _keyword_score(
-    interest: str,
-    text: str,
-    keyword_map: dict[str, set[str]],
-    weight: float,
-) -> float:
-    keywords = keyword_map.get(interest, set())
-    return sum(weight for keyword in keywords if keyword in text)
+def _add_text_weights(weights: dict[str, float], query: str, weight: float) -> None:
+    for word in re.findall(r"[a-z0-9]+", query.lower()):
+        if len(word) > 2:
+            weights[word] += weight
 
 
-def _semantic_score(
+def _add_semantic_weights(
+    weights: dict[str, float],
     query: str,
-    text: str,
     keyword_map: dict[str, set[str]],
     weight: float,
-) -> float:
+) -> None:
     query_words = {
         word for word in re.findall(r"[a-z0-9]+", query.lower()) if len(word) > 2
     }
-    score = 0.0
     for word in query_words:
-        keywords = keyword_map.get(word, set())
-        score += sum(weight for keyword in keywords if keyword in text)
-    return score
+        for keyword in keyword_map.get(word, set()):
+            weights[keyword] += weight
 
 
-def _work_friendly_score(
-    item: dict[str, Any],
-    text: str,
-    preferences: Preferences,
-) -> float:
-    score = 0.0
-    if item.get("city") in WORK_FRIENDLY_CITIES:
-        score += 28
-    score += _semantic_score(
-        "digital quiet cafes budget city",
-        text,
-        VIBE_KEYWORDS,
-        weight=3,
-    )
-    if any(term in text for term in REMOTE_WORK_RISK_TERMS):
-        score -= 35
-    estimated_cost = float(item.get("estimated_cost") or 0)
-    if estimated_cost and estimated_cost <= preferences.budget:
-        score += 10
-    return score
-
-
-def _matched_tags(text: str) -> set[str]:
-    tags = set()
-    for tag, keywords in INTEREST_KEYWORDS.items():
-        if any(keyword in text for keyword in keywords):
-            tags.add(tag.title())
-    return tags
+def _clean_interest(value: str) -> str:
+    return re.sub(r"^[^\w]+", "", value).strip().lower()
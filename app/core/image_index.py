@@ -0,0 +1,253 @@
+import json
+import logging
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from app.core.cache import HitRateStats
+from app.core.destinations import load_destinations
+
+logger = logging.getLogger("travel_agent_server.image_index")
+
+LEARNED_INDEX_PATH = Path(__file__).resolve().parents[1] / "data" / "image_index.json"
+# Share of an entry's landmark tokens an activity has to mention to match.
+MIN_MATCH_SCORE = 0.5
+# Kinds of scenery, food or lodging found in many destinations. They count
+# towards the match score but cannot make a match on their own: "Mountain
+# biking" in Cusco is not a photo of Cusco's mountains.
+GENERIC_TOKENS = frozenset(
+    {
+        "bar",
+        "bay",
+        "beach",
+        "boat",
+        "bridge",
+        "cafe",
+        "camel",
+        "canal",
+        "castle",
+        "cathedral",
+        "city",
+        "club",
+        "coast",
+        "coral",
+        "desert",
+        "district",
+        "diving",
+        "food",
+        "forest",
+        "fort",
+        "garden",
+        "harbor",
+        "hotel",
+        "lake",
+        "luxury",
+        "market",
+        "mountain",
+        "national",
+        "nightlife",
+        "old",
+        "palace",
+        "palm",
+        "park",
+        "reef",
+        "resort",
+        "river",
+        "road",
+        "sea",
+        "shopping",
+        "ski",
+        "skyline",
+        "snow",
+        "square",
+        "street",
+        "temple",
+        "tree",
+        "valley",
+        "water",
+        "winter",
+    }
+)
+# Words that describe a photo rather than the place in it.
+IGNORED_TOKENS = frozenset(
+    {
+        "a",
+        "aerial",
+        "along",
+        "an",
+        "and",
+        "at",
+        "cityscape",
+        "day",
+        "during",
+        "for",
+        "illuminated",
+        "in",
+        "night",
+        "of",
+        "on",
+        "panorama",
+        "panoramic",
+        "photo",
+        "reflection",
+        "scene",
+        "sunny",
+        "sunrise",
+        "sunset",
+        "sweeping",
+        "the",
+        "to",
+        "tour",
+        "twilight",
+        "vibrant",
+        "view",
+        "visit",
+        "vista",
+        "with",
+    }
+)
+
+
+def image_tokens(text: str) -> list[str]:
+    folded = unicodedata.normalize("NFKD", text.casefold())
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", folded):
+        if len(token) > 4 and token.endswith(("ches", "shes", "sses", "xes")):
+            token = token[:-2]
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+@dataclass(frozen=True)
+class ImageIndexEntry:
+    url: str
+    landmark_tokens: frozenset[str]
+    city_tokens: frozenset[str]
+    source: str
+
+
+@dataclass
+class ImageIndexStats(HitRateStats):
+    hits: int = 0
+    misses: int = 0
+
+
+class ImageIndex:
+    """Local landmark -> image URL index consulted before any live search.
+
+    Entries come from the curated ``image_key``/``image_urls`` of each
+    destination plus learned ``{query, city, url}`` records. An activity
+    matches an entry when it names the entry's city and at least
+    MIN_MATCH_SCORE of its landmark tokens, one of which is not in
+    GENERIC_TOKENS; entries learned without a city must match all of their
+    tokens. Entries with only generic landmark tokens are not indexed.
+    """
+
+    def __init__(self, entries: Iterable[ImageIndexEntry] = ()):
+        self.entries: list[ImageIndexEntry] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.stats = ImageIndexStats()
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def from_sources(
+        cls,
+        destinations: Iterable[dict[str, Any]],
+        learned: Iterable[dict[str, Any]] = (),
+    ) -> "ImageIndex":
+        index = cls()
+        for item in destinations:
+            urls = item.get("image_urls") or []
+            if item.get("image_key") and urls:
+                index.add_record(
+                    item["image_key"], item.get("city"), urls[0], "curated"
+                )
+        for record in learned:
+            if record.get("query") and record.get("url"):
+                index.add_record(
+                    record["query"], record.get("city"), record["url"], "learned"
+                )
+        return index
+
+    def add_record(
+        self, text: str, city: str | None, url: str, source: str
+    ) -> ImageIndexEntry | None:
+        city_tokens = frozenset(image_tokens(city or ""))
+        landmark_tokens = frozenset(
+            token
+            for token in image_tokens(text)
+            if token not in city_tokens and token not in IGNORED_TOKENS
+        )
+        if landmark_tokens <= GENERIC_TOKENS:
+            return None
+        entry = ImageIndexEntry(url, landmark_tokens, city_tokens, source)
+        self.add(entry)
+        return entry
+
+    def add(self, entry: ImageIndexEntry) -> None:
+        with self._lock:
+            position = len(self.entries)
+            self.entries.append(entry)
+            for token in entry.landmark_tokens:
+                self._postings[token].append(position)
+
+    def lookup(self, query: str, city: str | None = None) -> str | None:
+        tokens = set(image_tokens(query)) | set(image_tokens(city or ""))
+        overlaps: dict[int, int] = defaultdict(int)
+        distinctive: set[int] = set()
+        for token in tokens:
+            for position in self._postings.get(token, ()):
+                overlaps[position] += 1
+                if token not in GENERIC_TOKENS:
+                    distinctive.add(position)
+
+        best: tuple[float, int] | None = None
+        best_url = None
+        for position, overlap in overlaps.items():
+            entry = self.entries[position]
+            if position not in distinctive or not entry.city_tokens <= tokens:
+                continue
+            score = overlap / len(entry.landmark_tokens)
+            required = MIN_MATCH_SCORE if entry.city_tokens else 1.0
+            if score < required:
+                continue
+            if best is None or (score, overlap) > best:
+                best = (score, overlap)
+                best_url = entry.url
+
+        if best_url is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return best_url
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**self.stats.as_dict(), "entries": len(self.entries)}
+
+
+def load_learned_images(path: Path = LEARNED_INDEX_PATH) -> list[dict[str, Any]]:
+    try:
+        with path.open(encoding="utf-8") as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError):
+        logger.warning("Could not read learned image index %s", path, exc_info=True)
+        return []
+
+
+@lru_cache
+def default_image_index() -> ImageIndex:
+    index = ImageIndex.from_sources(load_destinations(), load_learned_images())
+    logger.info("Loaded image index with %d entries", len(index.entries))
+    return index
@@ -1,49 +1,164 @@
 import logging
+import os
 import urllib.parse
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any
 from urllib.parse import urlparse
 
 from ddgs import DDGS
 
+from app.core.cache import TieredCache, cache_from_env
+from app.core.image_index import ImageIndex
+from app.models.domain import Activity, Itinerary
+
 logger = logging.getLogger("travel_agent_server.images")
 
+IMAGE_SEARCH_WORKERS = int(os.environ.get("IMAGE_SEARCH_WORKERS", "8"))
+IMAGE_RESOLVE_DEADLINE_SECONDS = float(
+    os.environ.get("IMAGE_RESOLVE_DEADLINE_SECONDS", "10.0")
+)
+# Cached in place of a URL for queries that produced no usable image.
+NO_IMAGE = ""
+IMAGE_CACHE_KEY_PREFIX = "image-search:"
+
 
 def generated_image_url(query: str) -> str:
     safe_query = urllib.parse.quote(f"{query} aesthetic")
     return f"https://image.pollinations.ai/prompt/{safe_query}?width=800&height=600&nologo=true"
 
 
+def find_real_image(query: str) -> str | None:
+    """Search DDGS for a photo; raises if the search itself fails."""
+    with DDGS() as ddgs:
+        results = list(ddgs.images(query, max_results=1, safesearch="on"))
+    if results and "image" in results[0]:
+        logger.debug("Found real image for %r: %s", query, results[0]["image"])
+        return str(results[0]["image"])
+    return None
+
+
 def search_real_image(query: str) -> str | None:
     try:
-        with DDGS() as ddgs:
-            results = list(ddgs.images(query, max_results=1, safesearch="on"))
-            if results and "image" in results[0]:
-                logger.debug("Found real image for %r: %s", query, results[0]["image"])
-                return str(results[0]["image"])
+        return find_real_image(query)
     except Exception:
         logger.warning("Image search failed for %r", query, exc_info=True)
 
     return None
 
 
+@dataclass
+class NegativeCacheStats:
+    empty_results: int = 0
+    errors: int = 0
+    negative_hits: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class CachedImageSearch:
+    """Image search with a tiered query -> URL cache.
+
+    Found URLs are kept for the cache TTL. Searches that found nothing are
+    cached as misses for ``negative_ttl_seconds`` and failed searches (rate
+    limits, network errors) for the shorter ``error_ttl_seconds``, so neither
+    is retried on every plan.
+    """
+
+    def __init__(
+        self,
+        cache: TieredCache,
+        search: Callable[[str], str | None] = find_real_image,
+        *,
+        negative_ttl_seconds: float = 60 * 60,
+        error_ttl_seconds: float = 5 * 60,
+    ):
+        self.cache = cache
+        self.search = search
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.error_ttl_seconds = error_ttl_seconds
+        self.stats = NegativeCacheStats()
+
+    @classmethod
+    def from_env(
+        cls, search: Callable[[str], str | None] = find_real_image
+    ) -> "CachedImageSearch":
+        return cls(
+            cache_from_env(
+                "IMAGE",
+                "image_search",
+                default_ttl_seconds=7 * 24 * 60 * 60,
+                default_max_entries=2048,
+            ),
+            search,
+            negative_ttl_seconds=float(
+                os.environ.get("IMAGE_CACHE_NEGATIVE_TTL_SECONDS", str(60 * 60))
+            ),
+            error_ttl_seconds=float(
+                os.environ.get("IMAGE_CACHE_ERROR_TTL_SECONDS", str(5 * 60))
+            ),
+        )
+
+    def __call__(self, query: str) -> str | None:
+        key = image_cache_key(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if cached == NO_IMAGE:
+                self.stats.negative_hits += 1
+                return None
+            return cached
+
+        try:
+            image_url = self.search(query)
+        except Exception:
+            logger.warning("Image search failed for %r", query, exc_info=True)
+            self.stats.errors += 1
+            self.cache.set(key, NO_IMAGE, self.error_ttl_seconds)
+            return None
+
+        if image_url:
+            self.cache.set(key, image_url)
+        else:
+            self.stats.empty_results += 1
+            self.cache.set(key, NO_IMAGE, self.negative_ttl_seconds)
+        return image_url
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **self.cache.snapshot(),
+            **self.stats.as_dict(),
+            "negative_ttl_seconds": self.negative_ttl_seconds,
+            "error_ttl_seconds": self.error_ttl_seconds,
+        }
+
+
+def image_cache_key(query: str) -> str:
+    # Kept readable so scripts/extend_image_index.py can mine past hits.
+    return IMAGE_CACHE_KEY_PREFIX + " ".join(query.casefold().split())
+
+
 def is_renderable_image_url(value: str) -> bool:
     parsed = urlparse(value.strip())
     return parsed.scheme in {"http", "https"} and bool(parsed.netloc)
 
 
+def image_query(activity: dict, city: str) -> str:
+    current_image = activity.get("image_url")
+    if isinstance(current_image, str) and current_image.strip():
+        return current_image.strip()
+    return f"{activity.get('name', 'Travel activity')} {city}".strip()
+
+
 def resolve_activity_image(
     activity: dict,
     city: str,
     image_search: Callable[[str], str | None] | None = None,
 ) -> str:
-    current_image = activity.get("image_url")
-    if isinstance(current_image, str) and current_image.strip():
-        current_image = current_image.strip()
-        if is_renderable_image_url(current_image):
-            return current_image
-        query = current_image
-    else:
-        query = f"{activity.get('name', 'Travel activity')} {city}".strip()
+    query = image_query(activity, city)
+    if is_renderable_image_url(query):
+        return query
 
     if image_search:
         real_image = image_search(query)
@@ -51,3 +166,69 @@ def resolve_activity_image(
         real_image = search_real_image(query)
 
     return real_image or generated_image_url(query)
+
+
+def resolve_itinerary_images(
+    itinerary: Itinerary,
+    image_search: Callable[[str], str | None] | None = None,
+    *,
+    image_index: ImageIndex | None = None,
+    max_workers: int = IMAGE_SEARCH_WORKERS,
+    deadline_seconds: float = IMAGE_RESOLVE_DEADLINE_SECONDS,
+) -> int:
+    """Give every activity a renderable image_url; returns the searches made.
+
+    Runs as the last planning stage, on the accepted itinerary only, so
+    drafts rejected by validation never pay for image searches. Queries are
+    answered from ``image_index`` when it has a curated match, otherwise
+    deduplicated and searched concurrently on a bounded thread pool; any
+    still pending at the deadline fall back to a generated image.
+    """
+    pending: dict[str, list[Activity]] = {}
+    indexed: dict[str, str | None] = {}
+    for day in itinerary.days:
+        city = day.city or itinerary.city or "destination"
+        for activity in day.activities:
+            if activity.image_url and is_renderable_image_url(activity.image_url):
+                continue
+            query = image_query(
+                {"name": activity.name, "image_url": activity.image_url}, city
+            )
+            if image_index is not None and query not in pending:
+                if query not in indexed:
+                    indexed[query] = image_index.lookup(query, city)
+                if indexed[query]:
+                    activity.image_url = indexed[query]
+                    continue
+            pending.setdefault(query, []).append(activity)
+    if not pending:
+        return 0
+
+    search = image_search or search_real_image
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(pending))),
+        thread_name_prefix="image-search",
+    )
+    try:
+        futures = {executor.submit(search, query): query for query in pending}
+        done, not_done = wait(futures, timeout=deadline_seconds)
+    finally:
+        # Searches past the deadline are abandoned rather than waited for.
+        executor.shutdown(wait=False, cancel_futures=True)
+    if not_done:
+        logger.warning(
+            "Image search deadline hit; %d of %d queries use generated images",
+            len(not_done),
+            len(futures),
+        )
+
+    for future, query in futures.items():
+        image_url = None
+        if future in done:
+            try:
+                image_url = future.result()
+            except Exception:
+                logger.warning("Image search failed for %r", query, exc_info=True)
+        for activity in pending[query]:
+            activity.image_url = image_url or generated_image_url(query)
+    return len(futures)
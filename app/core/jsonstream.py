@@ -0,0 +1,261 @@
+import json
+import re
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+JsonPath = tuple[str | int, ...]
+
+_ROOT_START = {
+    "{": re.compile(r"\{"),
+    "{[": re.compile(r"[{\[]"),
+    "[": re.compile(r"\["),
+}
+_TOKEN = re.compile(
+    r"""
+    [ \t\r\n]*
+    (?:
+        (?P<string>"[^"\\]*(?:\\.[^"\\]*)*")
+      | (?P<punct>[{}\[\],:])
+      | (?P<bare>[^ \t\r\n{}\[\],:"]+)
+    )
+    """,
+    re.VERBOSE,
+)
+_LITERALS = {"true": True, "false": False, "null": None}
+_DECODER = json.JSONDecoder()
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+class _Frame:
+    __slots__ = ("container", "expect", "is_dict", "key", "path")
+
+    def __init__(self, container: dict | list, path: JsonPath):
+        self.container = container
+        self.path = path
+        self.key: str | None = None
+        self.is_dict = isinstance(container, dict)
+        self.expect = "first_key" if self.is_dict else "first_value"
+
+    def expects_value(self) -> bool:
+        if self.is_dict:
+            return self.expect == "value"
+        return self.expect in ("first_value", "value")
+
+    def child_path(self) -> JsonPath:
+        if self.is_dict:
+            return (*self.path, self.key or "")
+        return (*self.path, len(self.container))
+
+
+class JsonStreamExtractor:
+    """Push parser that builds the first JSON value found in streamed text.
+
+    Chunks can split the text anywhere. Prose and markdown fences before the
+    root value are skipped, anything after it is ignored, and only the
+    current partial token is buffered, so memory is bounded by the size of
+    the decoded value rather than the raw response.
+
+    Containers whose path matches one of the ``watch`` patterns (``"*"``
+    matches any key or index) are returned from ``feed`` as ``(path, value)``
+    as soon as they close. ``close`` returns the root value, closing a
+    truncated document deterministically: incomplete array elements are
+    dropped and incomplete object members are kept with whatever they hold.
+    """
+
+    def __init__(
+        self,
+        watch: Iterable[Sequence[str | int]] = (),
+        root_types: str = "{",
+    ):
+        self.watch = [tuple(pattern) for pattern in watch]
+        self._root_start = _ROOT_START[root_types]
+        self._pending = ""
+        self._offset = 0
+        self._token_offset = 0
+        self._stack: list[_Frame] = []
+        self._committed = False
+        self.root: Any = None
+        self.done = False
+        self.truncated = False
+
+    def feed(self, chunk: str) -> list[tuple[JsonPath, Any]]:
+        if self.done:
+            return []
+        completed: list[tuple[JsonPath, Any]] = []
+        self._scan(self._pending + chunk, completed, final=False)
+        return completed
+
+    def close(self) -> Any:
+        """Finish the stream and return the root value."""
+        if not self.done:
+            self._scan(self._pending, [], final=True)
+        if self.done:
+            return self.root
+        if not self._stack:
+            raise JsonStreamError("No JSON value found in response")
+
+        self.truncated = True
+        while self._stack:
+            frame = self._stack.pop()
+            if not self._stack:
+                self.root = frame.container
+                break
+            parent = self._stack[-1]
+            if parent.is_dict and parent.key is not None:
+                parent.container[parent.key] = frame.container
+                parent.key = None
+        self.done = True
+        return self.root
+
+    def _scan(
+        self, text: str, completed: list[tuple[JsonPath, Any]], *, final: bool
+    ) -> None:
+        pos = 0
+        length = len(text)
+        while pos < length and not self.done:
+            if not self._stack:
+                match = self._root_start.search(text, pos)
+                if match is None:
+                    pos = length
+                    break
+                pos = match.start()
+
+            match = _TOKEN.match(text, pos)
+            if match is None:
+                if not text[pos:].strip():
+                    pos = length
+                break
+            bare = match.group("bare")
+            if bare is not None and match.end() == length and not final:
+                break
+            self._token_offset = self._offset + match.start()
+            pos = match.end()
+            try:
+                self._handle(match, completed)
+            except JsonStreamError:
+                if self._committed:
+                    raise
+                # A brace in prose such as "use {city}" opened a false root;
+                # drop it and keep looking for the real one.
+                self._stack.clear()
+                if match.group("punct") in ("{", "["):
+                    pos = match.start("punct")
+
+        self._pending = "" if self.done else text[pos:]
+        self._offset += pos
+
+    def _handle(self, match: re.Match, completed: list[tuple[JsonPath, Any]]) -> None:
+        punct = match.group("punct")
+        if not self._stack:
+            if punct not in ("{", "["):
+                return
+            self._stack.append(_Frame({} if punct == "{" else [], ()))
+            return
+
+        top = self._stack[-1]
+        string = match.group("string")
+        if string is not None:
+            value = _decode_string(string)
+            if top.is_dict and top.expect in ("first_key", "key"):
+                top.key = value
+                top.expect = "colon"
+                return
+            self._attach(top, value)
+            return
+
+        if punct is None:
+            self._attach(top, _decode_bare(match.group("bare")))
+            return
+
+        if punct in "{[":
+            if not top.expects_value():
+                raise JsonStreamError(
+                    f"Unexpected {punct!r} at offset {self._token_offset}"
+                )
+            self._stack.append(_Frame({} if punct == "{" else [], top.child_path()))
+        elif punct == ":":
+            if not top.is_dict or top.expect != "colon":
+                raise JsonStreamError(f"Unexpected ':' at offset {self._token_offset}")
+            top.expect = "value"
+            if len(self._stack) == 1:
+                self._committed = True
+        elif punct == ",":
+            if top.expect != "comma":
+                raise JsonStreamError(f"Unexpected ',' at offset {self._token_offset}")
+            top.expect = "key" if top.is_dict else "value"
+        else:
+            closes_dict = punct == "}"
+            if top.is_dict != closes_dict or top.expect not in (
+                "first_key" if closes_dict else "first_value",
+                "comma",
+            ):
+                raise JsonStreamError(
+                    f"Unexpected {punct!r} at offset {self._token_offset}"
+                )
+            self._stack.pop()
+            if self._matches_watch(top.path):
+                completed.append((top.path, top.container))
+            if self._stack:
+                self._attach(self._stack[-1], top.container)
+            else:
+                self.root = top.container
+                self.done = True
+
+    def _attach(self, frame: _Frame, value: Any) -> None:
+        if not frame.expects_value():
+            raise JsonStreamError(f"Unexpected value at offset {self._token_offset}")
+        if frame.is_dict:
+            frame.container[frame.key] = value
+            frame.key = None
+        else:
+            frame.container.append(value)
+            if len(self._stack) == 1:
+                self._committed = True
+        frame.expect = "comma"
+
+    def _matches_watch(self, path: JsonPath) -> bool:
+        return any(
+            len(pattern) == len(path)
+            and all(part == "*" or part == step for part, step in zip(pattern, path))
+            for pattern in self.watch
+        )
+
+
+def _decode_string(token: str) -> str:
+    if "\\" not in token:
+        return token[1:-1]
+    value, _ = json.decoder.scanstring(token, 1, False)
+    return value
+
+
+def _decode_bare(token: str) -> Any:
+    if token in _LITERALS:
+        return _LITERALS[token]
+    try:
+        value = json.loads(token)
+    except ValueError:
+        raise JsonStreamError(f"Invalid literal {token!r}") from None
+    if not isinstance(value, (int, float)):
+        raise JsonStreamError(f"Invalid literal {token!r}")
+    return value
+
+
+def extract_json(text: str, root_types: str = "{") -> tuple[Any, bool]:
+    """Parse the first JSON value in ``text``; returns ``(value, truncated)``.
+
+    Well-formed payloads are decoded by the C decoder directly; the push
+    parser handles everything else (false roots in prose, truncated tails).
+    """
+    start = _ROOT_START[root_types].search(text)
+    if start is not None:
+        try:
+            value, _ = _DECODER.raw_decode(text, start.start())
+            return value, False
+        except json.JSONDecodeError:
+            pass
+    extractor = JsonStreamExtractor(root_types=root_types)
+    extractor.feed(text)
+    return extractor.close(), extractor.truncated
@@ -1,10 +1,10 @@
-import json
 import logging
 import re
 from collections.abc import Callable
 from typing import Any
 
-from app.core.images import resolve_activity_image
+from app.core.images import resolve_activity_image, resolve_itinerary_images
+from app.core.jsonstream import JsonStreamError, extract_json
 from app.models.domain import Itinerary
 
 logger = logging.getLogger("travel_agent_server.parser")
@@ -29,30 +29,23 @@ def parse_duration(value: Any, default: float = 1.0) -> float:
 
 
 def extract_json_payload(response_text: str) -> Any:
-    cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
-    start_idx = cleaned_text.find("{")
-    end_idx = cleaned_text.rfind("}")
-
-    if start_idx == -1:
-        start_idx = cleaned_text.find("[")
-        end_idx = cleaned_text.rfind("]")
-
-    if start_idx == -1:
-        return json.loads(cleaned_text)
-
-    candidate_json = cleaned_text[start_idx:]
     try:
-        data, _ = json.JSONDecoder().raw_decode(candidate_json)
-        return data
-    except json.JSONDecodeError:
-        if end_idx == -1:
+        data, truncated = extract_json(response_text)
+    except JsonStreamError:
+        if "{" in response_text:
             raise
-        return json.loads(cleaned_text[start_idx : end_idx + 1])
+        data, truncated = extract_json(response_text, root_types="[")
+    if truncated:
+        # Closing a truncated tail is left to the local repair stage.
+        raise JsonStreamError("Model response JSON is truncated")
+    return data
 
 
 def normalize_itinerary_data(
     data: Any,
     image_search: Callable[[str], str | None] | None = None,
+    *,
+    resolve_images: bool = True,
 ) -> dict[str, Any]:
     if not isinstance(data, dict):
         raise ValueError("LLM response JSON must be an object")
@@ -67,7 +60,7 @@ def normalize_itinerary_data(
             if not isinstance(day, dict):
                 continue
             day_city = str(day.get("city") or data.get("city") or "destination")
-            normalize_day(day, day_city, image_search)
+            normalize_day(day, day_city, image_search, resolve_images=resolve_images)
             day_activity_total = sum(
                 parse_money(activity.get("cost", 0))
                 for activity in day.get("activities", [])
@@ -150,6 +143,8 @@ def normalize_day(
     day: dict[str, Any],
     city: str,
     image_search: Callable[[str], str | None] | None,
+    *,
+    resolve_images: bool = True,
 ) -> None:
     activities = day.get("activities", [])
     if not isinstance(activities, list):
@@ -158,13 +153,17 @@ def normalize_day(
     for activity in activities:
         if not isinstance(activity, dict):
             continue
-        normalize_activity(activity, city, image_search)
+        normalize_activity(
+            activity, city, image_search, resolve_images=resolve_images
+        )
 
 
 def normalize_activity(
     activity: dict[str, Any],
     city: str,
     image_search: Callable[[str], str | None] | None,
+    *,
+    resolve_images: bool = True,
 ) -> None:
     activity["cost"] = parse_money(activity.get("cost", 0))
 
@@ -181,7 +180,12 @@ def normalize_activity(
         activity["tags"] = ["General"]
     if not activity.get("description"):
         activity["description"] = activity.get("name", "Activity")
-    activity["image_url"] = resolve_activity_image(activity, city, image_search)
+    if resolve_images:
+        activity["image_url"] = resolve_activity_image(activity, city, image_search)
+    elif isinstance(activity.get("image_url"), str):
+        activity["image_url"] = activity["image_url"].strip() or None
+    else:
+        activity["image_url"] = None
 
 
 def normalize_cost_breakdown(data: dict[str, Any], activity_total: float) -> None:
@@ -213,13 +217,24 @@ def normalize_cost_breakdown(data: dict[str, Any], activity_total: float) -> Non
 def parse_llm_response(
     response_text: str,
     image_search: Callable[[str], str | None] | None = None,
+    *,
+    resolve_images: bool = True,
 ) -> Itinerary:
+    """Parse model output into an Itinerary.
+
+    With ``resolve_images=False`` activity images are left as the model gave
+    them, so callers can resolve them later with ``resolve_itinerary_images``.
+    """
     try:
         data = normalize_itinerary_data(
-            extract_json_payload(response_text), image_search
+            extract_json_payload(response_text), resolve_images=False
         )
-        return Itinerary(**data)
+        itinerary = Itinerary(**data)
     except Exception:
         logger.error("Error parsing LLM response", exc_info=True)
         logger.error("Raw response: %s", response_text)
         return Itinerary(city="Unknown", days=[])
+
+    if resolve_images:
+        resolve_itinerary_images(itinerary, image_search)
+    return itinerary
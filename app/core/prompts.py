@@ -1,8 +1,9 @@
 import json
+from collections.abc import Mapping, Sequence
 from datetime import datetime, timedelta
-from typing import Mapping
 
 from app.core.destinations import requested_route_city_terms
+from app.core.validation import ConstraintViolation, ViolationCode
 from app.models.domain import Activity, DestinationSuggestion, Itinerary, Preferences
 
 MODEL_CANDIDATES = [
@@ -159,11 +160,13 @@ def refinement_prompt(
     activities: list[Activity],
     destination_suggestions: list[DestinationSuggestion] | None = None,
     category_targets: Mapping[str, float] | None = None,
+    violations: Sequence[ConstraintViolation] = (),
 ) -> str:
     destination = (preferences.city or previous_plan.city or "").strip()
     activities_context = activities_context_for_destination(
         destination, activities, preferences, refinement=True
     )
+    violations_context = violations_checklist(violations, preferences)
     curated_context = destination_context(destination_suggestions or [], preferences)
     budget_context = budget_targets_context(preferences, category_targets)
     budget_cap = budget_cap_text(preferences)
@@ -180,6 +183,7 @@ def refinement_prompt(
     return f"""
         The previous itinerary for {destination or "the selected destination"} was INVALID.
         Error: {error}
+        {violations_context}
 
         Previous Plan Total Cost: {budget_amount_text(previous_plan.total_cost, preferences)}
         Budget: {budget_cap}
@@ -208,6 +212,46 @@ def refinement_prompt(
         """
 
 
+VIOLATION_FIXES = {
+    ViolationCode.MISSING_DESTINATION: "Set city to one concrete destination.",
+    ViolationCode.DESTINATION_MISMATCH: "Plan the requested destination only.",
+    ViolationCode.ROUTE_DAY_COVERAGE: "Give every requested city at least one DayPlan city value.",
+    ViolationCode.DAY_COUNT: "Return exactly {days} DayPlan objects numbered 1 to {days}.",
+    ViolationCode.EMPTY_DAY: "Add at least one realistic activity to this day.",
+    ViolationCode.ACTIVITY_SUM_MISMATCH: "Set cost_breakdown.activities to the sum of all activity costs.",
+    ViolationCode.CATEGORY_SUM_MISMATCH: "Set cost_breakdown.total to transport + stay + food + activities.",
+    ViolationCode.OVER_BUDGET: "Cut category estimates or swap activities until the total is <= {budget_cap}.",
+    ViolationCode.ACTIVITY_OVER_BUDGET: "Swap this activity for a cheaper one or drop it.",
+}
+
+
+def violations_checklist(
+    violations: Sequence[ConstraintViolation], preferences: Preferences
+) -> str:
+    """Numbered list of every violation so one revision can fix them all."""
+    if not violations:
+        return ""
+
+    lines = [
+        f"ALL VIOLATIONS ({len(violations)}) - fix every one of them in this single revision:"
+    ]
+    for number, violation in enumerate(violations, start=1):
+        location = ""
+        if violation.day_index is not None:
+            location = f" (days[{violation.day_index}]"
+            if violation.activity_index is not None:
+                location += f".activities[{violation.activity_index}]"
+            location += ")"
+        fix = VIOLATION_FIXES[violation.code].format(
+            days=preferences.days, budget_cap=budget_cap_text(preferences)
+        )
+        lines.append(
+            f"{number}. [{violation.code.value}]{location} {violation.message} Fix: {fix}"
+        )
+    lines.append("Keep every part of the plan that is not listed above unchanged.")
+    return "\n        ".join(lines)
+
+
 def json_repair_prompt(raw_response: str, preferences: Preferences) -> str:
     currency_mode = cost_currency_mode(preferences)
     cost_aliases = (
@@ -351,13 +395,18 @@ def cost_currency_mode(preferences: Preferences) -> str:
     )
 
 
+def uses_activity_catalog(destination: str) -> bool:
+    """Whether the curated MOCK_ACTIVITIES catalog applies to a destination."""
+    return destination.strip().lower() == "paris"
+
+
 def activities_context_for_destination(
     destination: str,
     activities: list[Activity],
     preferences: Preferences,
     refinement: bool = False,
 ) -> str:
-    if destination.lower() == "paris":
+    if uses_activity_catalog(destination):
         instruction = "AVAILABLE ACTIVITIES:"
         if not refinement:
             instruction = "AVAILABLE ACTIVITIES (You must ONLY use these, do not invent new ones):"
@@ -0,0 +1,192 @@
+import json
+import logging
+import re
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.jsonstream import JsonStreamError, extract_json
+
+logger = logging.getLogger("travel_agent_server.repair")
+
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+_SINGLE_QUOTED = re.compile(r"'[^'\\\n]*(?:\\.[^'\\\n]*)*'")
+_PLACEHOLDER = re.compile(r'"\x00(\d+)\x00"')
+_VALUE_END = r"(?:[}\]\"\d]|\btrue|\bfalse|\bnull)"
+
+_VALUE_STARTS = ("{", "[", ",", ":")
+_DAY_LIST_ALIASES = ("itinerary", "daily_plan", "daily_itinerary", "schedule", "plan")
+
+# Text rules run in order on the response with every string literal masked,
+# so they never touch quoted content.
+_TEXT_RULES: list[tuple[str, re.Pattern, str | Callable[[re.Match], str]]] = [
+    ("comments", re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL), ""),
+    (
+        "citation_markers",
+        re.compile(
+            r"\s*【[^】]*】"
+            r"|\s*\(\[[^\]\n]*\]\([^)\s]*\)\)"
+            rf"|(?P<value>{_VALUE_END})\s*\[\d+(?:\s*,\s*\d+)*\]"
+        ),
+        lambda match: match.group("value") or "",
+    ),
+    (
+        "python_literals",
+        re.compile(r"\b(True|False|None)\b"),
+        lambda match: {"True": "true", "False": "false", "None": "null"}[
+            match.group(1)
+        ],
+    ),
+    (
+        "unquoted_keys",
+        re.compile(r"(?<=[{,])(\s*)([A-Za-z_$][\w$-]*)(\s*):"),
+        r'\1"\2"\3:',
+    ),
+    ("trailing_commas", re.compile(r",(\s*[}\]])"), r"\1"),
+    (
+        "missing_commas",
+        re.compile(rf"({_VALUE_END})([ \t\r]*\n\s*)(?=[\"{{\[])"),
+        r"\1,\2",
+    ),
+]
+
+
+@dataclass
+class RepairResult:
+    text: str
+    rules: list[str]
+
+
+@dataclass
+class RepairStats:
+    local_repairs: int = 0
+    llm_escalations: int = 0
+    rules: Counter = field(default_factory=Counter)
+
+    def record_local_repair(self, rules: list[str]) -> None:
+        self.local_repairs += 1
+        self.rules.update(rules)
+
+    def record_escalation(self) -> None:
+        self.llm_escalations += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        attempts = self.local_repairs + self.llm_escalations
+        return {
+            "local_repairs": self.local_repairs,
+            "llm_escalations": self.llm_escalations,
+            "local_repair_rate": (
+                round(self.local_repairs / attempts, 4) if attempts else 0.0
+            ),
+            "rules": dict(self.rules),
+        }
+
+
+def repair_itinerary_json(response_text: str) -> RepairResult | None:
+    """Apply deterministic fixes until the response decodes to an itinerary.
+
+    Returns the repaired payload as JSON text with the names of the rules
+    that changed it, or None when the response still is not an object with
+    a non-empty ``days`` list (the caller then escalates to the model).
+    """
+    rules: list[str] = []
+    start = response_text.find("{")
+    if start == -1:
+        return None
+
+    masked, strings = _mask_strings(response_text[start:], rules)
+    for name, pattern, replacement in _TEXT_RULES:
+        masked, count = pattern.subn(replacement, masked)
+        if count:
+            rules.append(name)
+    repaired_text = _PLACEHOLDER.sub(lambda match: strings[int(match.group(1))], masked)
+
+    try:
+        data, truncated = extract_json(repaired_text)
+    except JsonStreamError:
+        logger.debug("Local JSON repair failed", exc_info=True)
+        return None
+    if truncated:
+        rules.append("truncated_tail")
+
+    data = _normalize_structure(data, rules)
+    if not isinstance(data, dict) or not isinstance(data.get("days"), list):
+        return None
+    if not data["days"]:
+        return None
+    return RepairResult(json.dumps(data), rules)
+
+
+def _mask_strings(text: str, rules: list[str]) -> tuple[str, list[str]]:
+    """Swap string literals for placeholders, converting single-quoted ones."""
+    strings: list[str] = []
+    parts: list[str] = []
+    position = 0
+    converted = False
+    next_double = text.find('"')
+    next_single = text.find("'")
+    while position < len(text):
+        if next_double != -1 and next_double < position:
+            next_double = text.find('"', position)
+        if next_single != -1 and next_single < position:
+            next_single = text.find("'", position)
+
+        if next_single != -1 and (next_double == -1 or next_single < next_double):
+            single = next_single
+            match = _SINGLE_QUOTED.match(text, single)
+            # Only treat quotes in key/value position as strings; apostrophes
+            # elsewhere are left alone.
+            if match is not None and _previous_token(text, single) in _VALUE_STARTS:
+                inner = match.group(0)[1:-1].replace("\\'", "'")
+                parts.append(text[position:single])
+                parts.append(f'"\x00{len(strings)}\x00"')
+                strings.append(json.dumps(inner))
+                position = match.end()
+                converted = True
+                continue
+            parts.append(text[position : single + 1])
+            position = single + 1
+            continue
+        if next_double == -1:
+            break
+        match = _STRING.match(text, next_double)
+        if match is None:
+            break
+        parts.append(text[position:next_double])
+        parts.append(f'"\x00{len(strings)}\x00"')
+        strings.append(match.group(0))
+        position = match.end()
+
+    parts.append(text[position:])
+    if converted:
+        rules.append("single_quotes")
+    return "".join(parts), strings
+
+
+def _previous_token(text: str, index: int) -> str:
+    index -= 1
+    while index >= 0 and text[index].isspace():
+        index -= 1
+    return text[index] if index >= 0 else ""
+
+
+def _normalize_structure(data: Any, rules: list[str]) -> Any:
+    if not isinstance(data, dict):
+        return data
+    if "days" not in data:
+        nested = [
+            value
+            for value in data.values()
+            if isinstance(value, dict) and isinstance(value.get("days"), list)
+        ]
+        if len(nested) == 1:
+            rules.append("unwrapped_payload")
+            data = nested[0]
+    if "days" not in data:
+        for alias in _DAY_LIST_ALIASES:
+            if isinstance(data.get(alias), list):
+                rules.append("alias_schema")
+                data = {**data, "days": data[alias]}
+                break
+    return data
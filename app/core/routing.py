@@ -0,0 +1,311 @@
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable, Sequence
+from enum import Enum
+from typing import Any
+
+
+class LatencyTracker:
+    """Rolling per-model latency samples used to derive hedge delays.
+
+    A hedge delay is the configured percentile of recent successful call
+    latencies for a model; calls cancelled after losing a hedged race
+    contribute their elapsed time as a lower bound. Until ``min_samples`` observations exist the
+    ``default_delay`` is used, and the result is clamped to
+    ``[min_delay, max_delay]``.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.9,
+        window: int = 50,
+        min_samples: int = 5,
+        default_delay: float = 20.0,
+        min_delay: float = 2.0,
+        max_delay: float = 60.0,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._samples: dict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=window)
+        )
+        self._hedges: dict[str, int] = defaultdict(int)
+        self._censored: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LatencyTracker":
+        return cls(
+            percentile=float(os.environ.get("MODEL_HEDGE_PERCENTILE", "0.9")),
+            default_delay=float(
+                os.environ.get("MODEL_HEDGE_DEFAULT_DELAY_SECONDS", "20.0")
+            ),
+        )
+
+    def record(self, model_name: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[model_name].append(seconds)
+
+    def record_censored(self, model_name: str, seconds: float) -> None:
+        """Record a call cancelled after ``seconds`` without finishing."""
+        with self._lock:
+            self._samples[model_name].append(seconds)
+            self._censored[model_name] += 1
+
+    def record_hedge(self, model_name: str) -> None:
+        with self._lock:
+            self._hedges[model_name] += 1
+
+    def latency_percentile(self, model_name: str, percentile: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(model_name, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(percentile * len(samples)) - 1))
+        return samples[index]
+
+    def hedge_delay(self, model_name: str) -> float:
+        with self._lock:
+            sample_count = len(self._samples.get(model_name, ()))
+        if sample_count < self.min_samples:
+            delay = self.default_delay
+        else:
+            delay = self.latency_percentile(model_name, self.percentile) or 0.0
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            models = set(self._samples) | set(self._hedges)
+        return {
+            model_name: {
+                "samples": len(self._samples.get(model_name, ())),
+                "p50_seconds": self.latency_percentile(model_name, 0.5),
+                "p90_seconds": self.latency_percentile(model_name, 0.9),
+                "hedge_delay_seconds": self.hedge_delay(model_name),
+                "hedges_launched": self._hedges.get(model_name, 0),
+                "censored_samples": self._censored.get(model_name, 0),
+            }
+            for model_name in sorted(models)
+        }
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by a rolling error-rate window.
+
+    The breaker opens once at least ``min_requests`` outcomes in the last
+    ``window_seconds`` have an error rate of ``error_rate_threshold`` or more,
+    or immediately on a fatal error such as an unknown model. After
+    ``open_seconds`` a single probe request is let through (half-open); its
+    outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        min_requests: int = 5,
+        error_rate_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = CircuitState.CLOSED
+        self.opened_at: float | None = None
+        self.times_opened = 0
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now: float) -> None:
+        self.state = CircuitState.OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._probe_in_flight = False
+
+    def _close(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._outcomes.clear()
+
+    def is_available(self) -> bool:
+        """Whether a request could be admitted, without claiming the probe."""
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+            if self.state == CircuitState.HALF_OPEN:
+                return not self._probe_in_flight
+            return self.clock() - (self.opened_at or 0.0) >= self.open_seconds
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+            if self.state == CircuitState.OPEN:
+                if self.clock() - (self.opened_at or 0.0) < self.open_seconds:
+                    return False
+                self.state = CircuitState.HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def release(self) -> None:
+        """Give back a half-open probe whose request was abandoned."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CircuitState.CLOSED:
+                self._close()
+            now = self.clock()
+            self._outcomes.append((now, True))
+            self._prune(now)
+
+    def record_failure(self, fatal: bool = False) -> None:
+        with self._lock:
+            now = self.clock()
+            if self.state == CircuitState.HALF_OPEN or fatal:
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            self._prune(now)
+            if (
+                len(self._outcomes) >= self.min_requests
+                and self._error_rate() >= self.error_rate_threshold
+            ):
+                self._open(now)
+
+    def _error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        failures = sum(1 for _, success in self._outcomes if not success)
+        return failures / len(self._outcomes)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            self._prune(self.clock())
+            return self._error_rate()
+
+    def request_count(self) -> int:
+        with self._lock:
+            self._prune(self.clock())
+            return len(self._outcomes)
+
+
+class ModelRouter:
+    """Orders model candidates by health and gates them with circuit breakers.
+
+    The health score is the rolling success rate (weighted by how many of the
+    breaker's ``min_requests`` have been observed), scaled down when a model's
+    p90 latency exceeds ``slow_latency_seconds``. Scores are compared in
+    quarter buckets (rounded up) so an occasional error never overrides the
+    configured preference order.
+    """
+
+    def __init__(
+        self,
+        candidates: Sequence[str],
+        latency: LatencyTracker | None = None,
+        breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker,
+        slow_latency_seconds: float = 45.0,
+    ):
+        self.candidates = list(candidates)
+        self.latency = latency if latency is not None else LatencyTracker()
+        self.slow_latency_seconds = slow_latency_seconds
+        self.breakers = {model_name: breaker_factory() for model_name in candidates}
+
+    @classmethod
+    def from_env(cls, candidates: Sequence[str]) -> "ModelRouter":
+        def breaker_factory() -> CircuitBreaker:
+            return CircuitBreaker(
+                window_seconds=float(
+                    os.environ.get("MODEL_CIRCUIT_WINDOW_SECONDS", "60.0")
+                ),
+                min_requests=int(os.environ.get("MODEL_CIRCUIT_MIN_REQUESTS", "5")),
+                error_rate_threshold=float(
+                    os.environ.get("MODEL_CIRCUIT_ERROR_RATE", "0.5")
+                ),
+                open_seconds=float(
+                    os.environ.get("MODEL_CIRCUIT_OPEN_SECONDS", "30.0")
+                ),
+            )
+
+        return cls(
+            candidates,
+            latency=LatencyTracker.from_env(),
+            breaker_factory=breaker_factory,
+        )
+
+    def health_score(self, model_name: str) -> float:
+        breaker = self.breakers[model_name]
+        confidence = min(1.0, breaker.request_count() / max(breaker.min_requests, 1))
+        score = 1.0 - breaker.error_rate() * confidence
+        p90 = self.latency.latency_percentile(model_name, 0.9)
+        if p90 and p90 > self.slow_latency_seconds:
+            score *= self.slow_latency_seconds / p90
+        if breaker.state != CircuitState.CLOSED:
+            score *= 0.5
+        return score
+
+    def ordered_candidates(self) -> list[str]:
+        """Candidates whose circuit can admit a request, healthiest first."""
+        available = [
+            (index, model_name)
+            for index, model_name in enumerate(self.candidates)
+            if self.breakers[model_name].is_available()
+        ]
+        available.sort(
+            key=lambda item: (-math.ceil(self.health_score(item[1]) * 4), item[0])
+        )
+        return [model_name for _, model_name in available]
+
+    def acquire(self, model_name: str) -> bool:
+        return self.breakers[model_name].allow_request()
+
+    def release(self, model_name: str) -> None:
+        self.breakers[model_name].release()
+
+    def record_success(self, model_name: str, seconds: float) -> None:
+        self.latency.record(model_name, seconds)
+        self.breakers[model_name].record_success()
+
+    def record_failure(self, model_name: str, fatal: bool = False) -> None:
+        self.breakers[model_name].record_failure(fatal=fatal)
+
+    def snapshot(self) -> dict[str, Any]:
+        latency = self.latency.snapshot()
+        return {
+            "order": self.ordered_candidates(),
+            "models": {
+                model_name: {
+                    "state": breaker.state.value,
+                    "health_score": round(self.health_score(model_name), 3),
+                    "error_rate": round(breaker.error_rate(), 3),
+                    "requests_in_window": breaker.request_count(),
+                    "times_opened": breaker.times_opened,
+                    "latency": latency.get(model_name),
+                }
+                for model_name, breaker in self.breakers.items()
+            },
+        }
@@ -0,0 +1,61 @@
+import copy
+import logging
+from typing import Any
+
+from pydantic import ValidationError
+
+from app.core.jsonstream import JsonStreamError, JsonStreamExtractor
+from app.core.parser import normalize_day, normalize_day_aliases
+from app.models.domain import DayPlan
+
+logger = logging.getLogger("travel_agent_server.streaming")
+
+
+class DayStreamParser:
+    """Pull complete ``days[i]`` objects out of a streamed itinerary JSON.
+
+    Text is fed in arbitrary chunks to a JsonStreamExtractor watching the
+    ``days`` array; each day object is normalized and validated as a DayPlan
+    preview as soon as it closes. Malformed output stops the previews, and
+    the full response is left to the regular parse/repair path.
+    """
+
+    def __init__(self, default_city: str | None = None):
+        self.default_city = default_city
+        self._extractor = JsonStreamExtractor(watch=[("days", "*")])
+        self._failed = False
+
+    def feed(self, chunk: str) -> list[DayPlan]:
+        if self._failed:
+            return []
+        try:
+            completed = self._extractor.feed(chunk)
+        except JsonStreamError:
+            logger.debug("Stopping day previews on malformed JSON", exc_info=True)
+            self._failed = True
+            return []
+
+        days = []
+        for _, value in completed:
+            day = self._decode_day(value)
+            if day is not None:
+                days.append(day)
+        return days
+
+    def _decode_day(self, value: Any) -> DayPlan | None:
+        if not isinstance(value, dict):
+            return None
+        # The extractor keeps building the full document, so normalize a copy.
+        day = copy.deepcopy(value)
+        try:
+            normalize_day_aliases(day)
+            city = str(day.get("city") or self.default_city or "destination")
+            # Previews never block on live image search; the final itinerary
+            # still goes through the regular parsing pipeline.
+            normalize_day(day, city, lambda _: None)
+            plan = DayPlan(**day)
+        except (ValidationError, TypeError, ValueError):
+            logger.debug("Skipping invalid streamed day object", exc_info=True)
+            return None
+        plan.calculate_cost()
+        return plan
@@ -0,0 +1,195 @@
+from dataclasses import dataclass
+from enum import Enum
+
+from app.core.destinations import (
+    destination_lookup,
+    requested_destination_terms,
+    requested_route_city_terms,
+)
+from app.models.domain import Itinerary, Preferences
+
+
+class ViolationCode(str, Enum):
+    MISSING_DESTINATION = "missing_destination"
+    DESTINATION_MISMATCH = "destination_mismatch"
+    ROUTE_DAY_COVERAGE = "route_day_coverage"
+    DAY_COUNT = "day_count"
+    EMPTY_DAY = "empty_day"
+    ACTIVITY_SUM_MISMATCH = "activity_sum_mismatch"
+    CATEGORY_SUM_MISMATCH = "category_sum_mismatch"
+    OVER_BUDGET = "over_budget"
+    ACTIVITY_OVER_BUDGET = "activity_over_budget"
+
+
+# Violations the local budget rebalancer can fix without the model.
+COST_VIOLATIONS = frozenset(
+    {
+        ViolationCode.ACTIVITY_SUM_MISMATCH,
+        ViolationCode.CATEGORY_SUM_MISMATCH,
+        ViolationCode.OVER_BUDGET,
+        ViolationCode.ACTIVITY_OVER_BUDGET,
+    }
+)
+
+# Share of the budget planned for activities (see agent.budget_targets). In an
+# over-budget plan, activities above their day's share are reported by position.
+ACTIVITY_BUDGET_SHARE = 0.2
+
+
+@dataclass(frozen=True)
+class ConstraintViolation:
+    code: ViolationCode
+    message: str
+    day_index: int | None = None
+    activity_index: int | None = None
+
+
+def itinerary_money(value: float, preferences: Preferences) -> str:
+    return f"{value:g}"
+
+
+def validate_itinerary(
+    itinerary: Itinerary, preferences: Preferences
+) -> list[ConstraintViolation]:
+    """Return every constraint the itinerary breaks, in a stable order.
+
+    Costs are recomputed first so the cost checks see the current activity
+    totals. Unlike a first-failure check, all violations are collected so a
+    single refinement round can address them together.
+    """
+    itinerary.calculate_total_cost()
+    itinerary.cost_breakdown.remaining_budget = (
+        preferences.budget - itinerary.cost_breakdown.total
+    )
+    itinerary.total_cost = itinerary.cost_breakdown.total
+    violations: list[ConstraintViolation] = []
+
+    if not itinerary.city or itinerary.city == "Unknown":
+        violations.append(
+            ConstraintViolation(
+                ViolationCode.MISSING_DESTINATION,
+                "Itinerary must include a recommended destination.",
+            )
+        )
+    elif preferences.city:
+        if not covers_requested_destinations(itinerary, preferences.city):
+            violations.append(
+                ConstraintViolation(
+                    ViolationCode.DESTINATION_MISMATCH,
+                    f"Itinerary destination '{itinerary.city}' does not match "
+                    f"requested destination '{preferences.city}'.",
+                )
+            )
+        elif not covers_requested_route_days(itinerary, preferences.city):
+            violations.append(
+                ConstraintViolation(
+                    ViolationCode.ROUTE_DAY_COVERAGE,
+                    "Multi-city itineraries must assign each requested city to at "
+                    "least one itinerary day.",
+                )
+            )
+
+    if len(itinerary.days) != preferences.days:
+        violations.append(
+            ConstraintViolation(
+                ViolationCode.DAY_COUNT,
+                f"Itinerary has {len(itinerary.days)} days, expected {preferences.days}.",
+            )
+        )
+
+    for day_index, day in enumerate(itinerary.days):
+        if not day.activities:
+            violations.append(
+                ConstraintViolation(
+                    ViolationCode.EMPTY_DAY,
+                    f"Day {day.day_number} must include at least one curated activity.",
+                    day_index=day_index,
+                )
+            )
+
+    breakdown = itinerary.cost_breakdown
+    activity_total = sum(
+        sum(activity.cost for activity in day.activities) for day in itinerary.days
+    )
+    if abs(activity_total - breakdown.activities) > 0.01:
+        violations.append(
+            ConstraintViolation(
+                ViolationCode.ACTIVITY_SUM_MISMATCH,
+                "Activity costs do not match cost_breakdown.activities.",
+            )
+        )
+
+    category_total = (
+        breakdown.transport + breakdown.stay + breakdown.food + breakdown.activities
+    )
+    if abs(category_total - breakdown.total) > 0.01:
+        violations.append(
+            ConstraintViolation(
+                ViolationCode.CATEGORY_SUM_MISMATCH,
+                "Cost breakdown categories do not add up to the total.",
+            )
+        )
+
+    if breakdown.total > preferences.budget:
+        violations.append(
+            ConstraintViolation(
+                ViolationCode.OVER_BUDGET,
+                f"Total cost {itinerary_money(breakdown.total, preferences)} exceeds "
+                f"budget {itinerary_money(preferences.budget, preferences)}.",
+            )
+        )
+        day_allowance = (
+            preferences.budget * ACTIVITY_BUDGET_SHARE / max(preferences.days, 1)
+        )
+        for day_index, day in enumerate(itinerary.days):
+            for activity_index, activity in enumerate(day.activities):
+                if activity.cost > day_allowance:
+                    violations.append(
+                        ConstraintViolation(
+                            ViolationCode.ACTIVITY_OVER_BUDGET,
+                            f"Day {day.day_number} activity '{activity.name}' costs "
+                            f"{itinerary_money(activity.cost, preferences)}, over the "
+                            f"daily activity budget of "
+                            f"{itinerary_money(round(day_allowance, 2), preferences)}.",
+                            day_index=day_index,
+                            activity_index=activity_index,
+                        )
+                    )
+
+    return violations
+
+
+def covers_requested_destinations(
+    itinerary: Itinerary, requested_destination: str
+) -> bool:
+    requested_terms = requested_destination_terms(requested_destination)
+    if not requested_terms:
+        return True
+
+    destination_text = " ".join(
+        value
+        for value in [
+            itinerary.city,
+            itinerary.recommended_destination or "",
+            *(day.city or "" for day in itinerary.days),
+        ]
+        if value
+    )
+
+    lookup = destination_lookup()
+    return all(lookup.mentions(destination_text, term) for term in requested_terms)
+
+
+def covers_requested_route_days(
+    itinerary: Itinerary, requested_destination: str
+) -> bool:
+    route_terms = requested_route_city_terms(requested_destination)
+    if len(route_terms) <= 1:
+        return True
+
+    day_city_text = " ".join(day.city or "" for day in itinerary.days)
+    if not day_city_text.strip():
+        return False
+
+    lookup = destination_lookup()
+    return all(lookup.mentions(day_city_text, term) for term in route_terms)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.core.cache import HitRateStats
+from app.models.domain import Itinerary
+from app.services.disk_cache import DiskLRU
+from app.services.http import ByteLRU
+
+logger = logging.getLogger("travel_agent_server.artifacts")
+
+# Bump when PDF or calendar layout changes so stale renders are not served.
+ARTIFACT_VERSION = 1
+
+
+def artifact_key(kind: str, itinerary: Itinerary, *extra: object) -> str:
+    """Hash of the canonical itinerary JSON, so equal bodies share a render."""
+    canonical = json.dumps(
+        [kind, ARTIFACT_VERSION, itinerary.model_dump(mode="json"), *map(str, extra)],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def artifact_etag(key: str) -> str:
+    return f'"{key[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@dataclass
+class ArtifactCacheStats(HitRateStats):
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0
+    stores: int = 0
+    evictions: int = 0
+    # Renders served without caching because an image failed to load.
+    incomplete: int = 0
+
+
+class ArtifactCache:
+    """Rendered PDF/ICS files on disk, keyed by ``artifact_key``.
+
+    Recent artifacts are also kept in memory. Files are evicted least
+    recently used first once their total size passes ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int = 256 * 1024 * 1024,
+        memory_max_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.files = DiskLRU(self.root, max_bytes)
+        self.memory = ByteLRU(memory_max_bytes)
+        self.stats = ArtifactCacheStats()
+
+    @classmethod
+    def from_env(cls) -> "ArtifactCache":
+        return cls(
+            os.environ.get("ARTIFACT_CACHE_DIR", ".cache/artifacts"),
+            int(os.environ.get("ARTIFACT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            int(
+                os.environ.get("ARTIFACT_CACHE_MEMORY_MAX_BYTES", str(16 * 1024 * 1024))
+            ),
+        )
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def get(self, key: str) -> bytes | None:
+        data = self.memory.get(key)
+        if data is None:
+            data = self.files.read(self._path(key))
+            if data is None:
+                self.stats.misses += 1
+                return None
+            self.memory.set(key, data)
+        self.stats.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        try:
+            evicted = self.files.write(self._path(key), data)
+        except OSError:
+            logger.warning("Could not store artifact %s", key, exc_info=True)
+        else:
+            self.stats.stores += 1
+            self.stats.evictions += evicted
+        self.memory.set(key, data)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "max_bytes": self.max_bytes,
+            "memory": self.memory.snapshot(),
+        }
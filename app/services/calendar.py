@@ -1,31 +1,31 @@
 from ics import Calendar, Event
 from app.models.domain import Itinerary
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 def itinerary_money(value: object, itinerary: Itinerary) -> str:
     return f"{value}"
 
 
-def generate_ics(itinerary: Itinerary, start_date_str: str | None = None) -> bytes:
-    """
-    Generates an iCalendar (.ics) file content from an itinerary.
-    If start_date_str is None, defaults to tomorrow.
-    """
-    # 1. Determine Start Date
-    # 1. Determine Start Date
-    start_date = None
+def resolve_start_date(start_date_str: str | None = None) -> date:
     if start_date_str:
         for fmt in ("%Y-%m-%d", "%d-%m-%Y"):
             try:
-                start_date = datetime.strptime(start_date_str, fmt).date()
-                break
+                return datetime.strptime(start_date_str, fmt).date()
             except ValueError:
                 continue
 
-    if not start_date:
-        # Default to tomorrow if parsing fails or no date provided
-        start_date = (datetime.now() + timedelta(days=1)).date()
+    # Default to tomorrow if parsing fails or no date provided
+    return (datetime.now() + timedelta(days=1)).date()
+
+
+def generate_ics(itinerary: Itinerary, start_date_str: str | None = None) -> bytes:
+    """
+    Generates an iCalendar (.ics) file content from an itinerary.
+    If start_date_str is None, defaults to tomorrow.
+    """
+    # 1. Determine Start Date
+    start_date = resolve_start_date(start_date_str)
 
     cal = Calendar()
 
@@ -0,0 +1,85 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class DiskLRU:
+    """Files under ``root`` evicted least recently used first past ``max_bytes``.
+
+    The directory is scanned once, on first use, to learn the files left by
+    earlier processes (ordered by mtime); after that the index is kept in
+    memory, so a write only touches the disk for the files it evicts. Reads
+    refresh a file's mtime so the order survives restarts.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._files: OrderedDict[Path, int] | None = None
+        self._lock = threading.Lock()
+
+    def read(self, path: Path) -> bytes | None:
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.discard(path)
+            return None
+        self.touch(path)
+        return data
+
+    def touch(self, path: Path) -> bool:
+        """Mark ``path`` as recently used; False when it no longer exists."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.discard(path)
+            return False
+        with self._lock:
+            files = self._index()
+            if path in files:
+                files.move_to_end(path)
+        return True
+
+    def write(self, path: Path, data: bytes) -> int:
+        """Atomically replace ``path``; returns how many files were evicted."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+        with self._lock:
+            files = self._index()
+            self.size_bytes -= files.pop(path, 0)
+            files[path] = len(data)
+            self.size_bytes += len(data)
+            evicted = 0
+            while self.size_bytes > self.max_bytes and files:
+                stale, size = files.popitem(last=False)
+                stale.unlink(missing_ok=True)
+                self.size_bytes -= size
+                evicted += 1
+            return evicted
+
+    def discard(self, path: Path) -> None:
+        path.unlink(missing_ok=True)
+        with self._lock:
+            self.size_bytes -= self._index().pop(path, 0)
+
+    def _index(self) -> OrderedDict[Path, int]:
+        if self._files is None:
+            found = []
+            if self.root.is_dir():
+                for path in self.root.rglob("*"):
+                    if path.name.startswith("."):
+                        continue
+                    try:
+                        stat = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    if path.is_file():
+                        found.append((stat.st_mtime, stat.st_size, path))
+            found.sort(key=lambda item: item[0])
+            self._files = OrderedDict((path, size) for _, size, path in found)
+            self.size_bytes = sum(size for _, size, _ in found)
+        return self._files
@@ -0,0 +1,237 @@
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import aiohttp
+import yarl
+from aiohttp.abc import AbstractResolver, ResolveResult
+
+from app.core.cache import HitRateStats
+
+logger = logging.getLogger("travel_agent_server.http")
+
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+
+
+class HttpFetchError(Exception):
+    pass
+
+
+class HttpRedirect(HttpFetchError):
+    """Raised instead of following a redirect when the caller asked not to."""
+
+    def __init__(self, url: str, location: str):
+        super().__init__(f"{url} redirects to {location}")
+        self.location = location
+
+
+class PublicAddressResolver(AbstractResolver):
+    """Resolver that drops private, loopback and link-local addresses.
+
+    Checking addresses here, rather than the host name beforehand, means the
+    connection is made to the very address that was checked.
+    """
+
+    def __init__(self, resolver: AbstractResolver | None = None):
+        self._resolver = resolver or aiohttp.DefaultResolver()
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        addresses = [
+            address
+            for address in await self._resolver.resolve(host, port, family)
+            if ipaddress.ip_address(address["host"]).is_global
+        ]
+        if not addresses:
+            raise OSError(f"{host} does not resolve to a public address")
+        return addresses
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+
+@dataclass
+class ByteCacheStats(HitRateStats):
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+
+class ByteLRU:
+    """LRU bounded by the total byte size of its values rather than count.
+
+    Values are usually ``bytes``; anything else needs an explicit ``size``.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.stats = ByteCacheStats()
+        self._entries: OrderedDict[Any, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def set(self, key: Any, value: Any, size: int | None = None) -> None:
+        size = len(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.size_bytes += size
+            self.stats.stores += 1
+            while self.size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class SharedHttpClient:
+    """Application-lifetime aiohttp session with a pooled, DNS-caching connector.
+
+    The session is created lazily on the running loop (and recreated if a
+    different loop uses it, as happens across test clients) and closed by
+    the server's lifespan handler.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 8,
+        dns_cache_seconds: int = 300,
+        timeout_seconds: float = 10.0,
+        public_only: bool = False,
+        resolver_factory: Callable[[], AbstractResolver] | None = None,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_seconds = dns_cache_seconds
+        self.timeout_seconds = timeout_seconds
+        # Host names resolving only to internal addresses fail to connect.
+        # IP literals skip the resolver, so callers still validate those.
+        self.public_only = public_only
+        self.resolver_factory = resolver_factory or aiohttp.DefaultResolver
+        self.requests = 0
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @classmethod
+    def from_env(cls) -> "SharedHttpClient":
+        return cls(
+            limit=int(os.environ.get("HTTP_POOL_LIMIT", "100")),
+            limit_per_host=int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", "8")),
+            dns_cache_seconds=int(os.environ.get("HTTP_DNS_CACHE_SECONDS", "300")),
+            timeout_seconds=float(os.environ.get("HTTP_TIMEOUT_SECONDS", "10.0")),
+            public_only=True,
+        )
+
+    def session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            resolver = self.resolver_factory()
+            if self.public_only:
+                resolver = PublicAddressResolver(resolver)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    ttl_dns_cache=self.dns_cache_seconds,
+                    resolver=resolver,
+                ),
+                headers={"User-Agent": USER_AGENT},
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+            )
+            self._loop = loop
+        return self._session
+
+    async def get_bytes(
+        self,
+        url: str,
+        max_bytes: int | None = None,
+        *,
+        follow_redirects: bool = True,
+    ) -> bytes:
+        """GET ``url`` and return the body, refusing bodies over ``max_bytes``.
+
+        With ``follow_redirects=False`` a redirect raises ``HttpRedirect``
+        carrying the absolute target, so the caller can vet it first.
+        """
+        self.requests += 1
+        async with self.session().get(
+            url, allow_redirects=follow_redirects
+        ) as response:
+            location = response.headers.get("Location")
+            if response.status in REDIRECT_STATUSES and location:
+                raise HttpRedirect(url, str(response.url.join(yarl.URL(location))))
+            if response.status != 200:
+                raise HttpFetchError(f"{url} returned HTTP {response.status}")
+            if max_bytes is None:
+                return await response.read()
+            if (response.content_length or 0) > max_bytes:
+                raise HttpFetchError(f"{url} is larger than {max_bytes} bytes")
+            chunks = []
+            received = 0
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                received += len(chunk)
+                if received > max_bytes:
+                    raise HttpFetchError(f"{url} is larger than {max_bytes} bytes")
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "dns_cache_seconds": self.dns_cache_seconds,
+            "public_only": self.public_only,
+        }
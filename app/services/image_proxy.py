@@ -0,0 +1,337 @@
+import asyncio
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode, urlparse
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.cache import HitRateStats
+from app.services.disk_cache import DiskLRU
+from app.services.http import ByteLRU, HttpRedirect, SharedHttpClient
+
+logger = logging.getLogger("travel_agent_server.image_proxy")
+
+# The 60x45mm PDF image slot at 150 DPI.
+PDF_IMAGE_MM = (60, 45)
+PDF_IMAGE_DPI = 150
+PDF_IMAGE_PX = (
+    round(PDF_IMAGE_MM[0] / 25.4 * PDF_IMAGE_DPI),
+    round(PDF_IMAGE_MM[1] / 25.4 * PDF_IMAGE_DPI),
+)
+PDF_IMAGE_MAX_BYTES = 40 * 1024
+PDF_IMAGE_QUALITIES = (80, 70, 60, 50)
+
+# Largest box each variant is shrunk into; "original" is served untouched.
+IMAGE_VARIANTS = {"card": (800, 600), "pdf": PDF_IMAGE_PX}
+ORIGINAL = "original"
+# Bump when a variant's rendering changes so stale files are not served.
+VARIANT_VERSION = 2
+MAX_IMAGE_BYTES = 15 * 1024 * 1024
+MAX_REDIRECTS = 5
+CACHE_CONTROL = "public, max-age=2592000, immutable"
+
+Fetcher = Callable[[str], Awaitable[bytes]]
+
+
+class ImageProxyError(Exception):
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class ProxiedImage:
+    content: bytes
+    media_type: str
+    etag: str
+
+
+@dataclass
+class ImageProxyStats(HitRateStats):
+    hits: int = 0
+    misses: int = 0
+    upstream_fetches: int = 0
+    upstream_errors: int = 0
+    upstream_bytes: int = 0
+    served_bytes: int = 0
+    evictions: int = 0
+
+
+def proxied_image_path(url: str, size: str = "card") -> str:
+    return "/img?" + urlencode({"url": url, "size": size})
+
+
+def validate_image_url(url: str) -> None:
+    """Only proxy public http(s) URLs so /img cannot reach internal hosts."""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if parsed.scheme not in {"http", "https"} or not host:
+        raise ImageProxyError("Image URL must be an absolute http(s) URL", 400)
+    if host == "localhost" or host.endswith(".localhost"):
+        raise ImageProxyError("Image URL host is not allowed", 400)
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return
+    if not address.is_global:
+        raise ImageProxyError("Image URL host is not allowed", 400)
+
+
+def image_media_type(data: bytes) -> str:
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format = image.format
+    except (UnidentifiedImageError, OSError) as exc:
+        raise ImageProxyError("Upstream response is not an image", 502) from exc
+    return Image.MIME.get(image_format or "", "application/octet-stream")
+
+
+def make_variant(data: bytes, variant: str) -> bytes:
+    """Shrink an image for ``variant`` and re-encode it as JPEG.
+
+    "card" fits inside its box as a progressive JPEG. "pdf" is cropped to
+    fill the PDF image slot, without metadata, and its quality is stepped
+    down until it fits PDF_IMAGE_MAX_BYTES, so exports embed it as-is.
+    """
+    size = IMAGE_VARIANTS[variant]
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            # Let the JPEG decoder downscale while decoding large originals.
+            image.draft("RGB", (size[0] * 2, size[1] * 2))
+            image = ImageOps.exif_transpose(image)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            if variant == "pdf":
+                image = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+            else:
+                image.thumbnail(size, Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, OSError) as exc:
+        raise ImageProxyError("Upstream response is not an image", 502) from exc
+
+    if variant != "pdf":
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=82, optimize=True, progressive=True)
+        return output.getvalue()
+    for quality in PDF_IMAGE_QUALITIES:
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=quality, optimize=True)
+        if output.tell() <= PDF_IMAGE_MAX_BYTES:
+            break
+    return output.getvalue()
+
+
+class ImageDiskCache:
+    """Content-addressed image files with least-recently-used eviction.
+
+    ``refs/`` maps a hashed source URL to the digest and media type of its
+    original bytes, ``objects/`` holds originals by digest (so URLs serving
+    the same file share it) and ``variants/`` the resized renditions. All
+    three count towards ``max_bytes``; a ref whose object was evicted is
+    dropped the next time it is read.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int = 512 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.files = DiskLRU(self.root, max_bytes)
+
+    def _ref_path(self, url: str) -> Path:
+        return self.root / "refs" / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest
+
+    def _variant_path(self, digest: str, variant: str) -> Path:
+        return self.root / "variants" / f"{digest}-{variant}-v{VARIANT_VERSION}.jpg"
+
+    def get_ref(self, url: str) -> tuple[str, str] | None:
+        ref_path = self._ref_path(url)
+        data = self.files.read(ref_path)
+        if data is None:
+            return None
+        digest, _, media_type = data.decode("utf-8").partition(" ")
+        if not self._object_path(digest).exists():
+            self.files.discard(ref_path)
+            return None
+        return digest, media_type
+
+    def get_original(self, digest: str) -> bytes | None:
+        return self.files.read(self._object_path(digest))
+
+    def get_variant(self, digest: str, variant: str) -> bytes | None:
+        return self.files.read(self._variant_path(digest, variant))
+
+    def put_original(self, url: str, data: bytes, media_type: str) -> tuple[str, int]:
+        """Store original bytes; returns their digest and the evicted file count."""
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+        evicted = 0
+        if not self.files.touch(object_path):
+            evicted += self.files.write(object_path, data)
+        evicted += self.files.write(
+            self._ref_path(url), f"{digest} {media_type}".encode()
+        )
+        return digest, evicted
+
+    def put_variant(self, digest: str, variant: str, data: bytes) -> int:
+        return self.files.write(self._variant_path(digest, variant), data)
+
+
+class ImageProxy:
+    """Fetch remote images once and serve cached, resized variants."""
+
+    def __init__(
+        self,
+        cache: ImageDiskCache,
+        fetcher: Fetcher | None = None,
+        http_client: SharedHttpClient | None = None,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.cache = cache
+        self.http_client = http_client or SharedHttpClient()
+        self.fetcher = fetcher or self._download
+        # Recently served images, so repeated exports skip the disk too.
+        self.memory = ByteLRU(memory_max_bytes)
+        self.stats = ImageProxyStats()
+        self._in_flight: dict[tuple[str, str], asyncio.Future[ProxiedImage]] = {}
+
+    @classmethod
+    def from_env(cls, http_client: SharedHttpClient | None = None) -> "ImageProxy":
+        return cls(
+            ImageDiskCache(
+                os.environ.get("IMAGE_PROXY_CACHE_DIR", ".cache/images"),
+                int(
+                    os.environ.get(
+                        "IMAGE_PROXY_CACHE_MAX_BYTES", str(512 * 1024 * 1024)
+                    )
+                ),
+            ),
+            http_client=http_client,
+            memory_max_bytes=int(
+                os.environ.get("IMAGE_PROXY_MEMORY_MAX_BYTES", str(64 * 1024 * 1024))
+            ),
+        )
+
+    async def get(self, url: str, variant: str = "card") -> ProxiedImage:
+        if variant != ORIGINAL and variant not in IMAGE_VARIANTS:
+            raise ImageProxyError(f"Unknown image size '{variant}'", 400)
+        validate_image_url(url)
+
+        key = (url, variant)
+        remembered = self.memory.get(key)
+        if remembered is not None:
+            self.stats.hits += 1
+            self.stats.served_bytes += len(remembered.content)
+            return remembered
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            image = await self._load(url, variant)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(image)
+            self.memory.set(key, image, len(image.content))
+        finally:
+            self._in_flight.pop(key, None)
+        self.stats.served_bytes += len(image.content)
+        return image
+
+    async def _load(self, url: str, variant: str) -> ProxiedImage:
+        ref = await asyncio.to_thread(self.cache.get_ref, url)
+        original = None
+        if ref is not None:
+            digest, media_type = ref
+            cached = await asyncio.to_thread(self._cached_variant, digest, variant)
+            if cached is not None:
+                self.stats.hits += 1
+                return ProxiedImage(
+                    cached,
+                    media_type if variant == ORIGINAL else "image/jpeg",
+                    _etag(digest, variant),
+                )
+            original = await asyncio.to_thread(self.cache.get_original, digest)
+
+        self.stats.misses += 1
+        if original is None:
+            original = await self._fetch(url)
+            media_type = await asyncio.to_thread(image_media_type, original)
+            digest, evicted = await asyncio.to_thread(
+                self.cache.put_original, url, original, media_type
+            )
+            self.stats.evictions += evicted
+
+        if variant == ORIGINAL:
+            return ProxiedImage(original, media_type, _etag(digest, variant))
+
+        content = await asyncio.to_thread(make_variant, original, variant)
+        self.stats.evictions += await asyncio.to_thread(
+            self.cache.put_variant, digest, variant, content
+        )
+        return ProxiedImage(content, "image/jpeg", _etag(digest, variant))
+
+    def _cached_variant(self, digest: str, variant: str) -> bytes | None:
+        if variant == ORIGINAL:
+            return self.cache.get_original(digest)
+        return self.cache.get_variant(digest, variant)
+
+    async def _fetch(self, url: str) -> bytes:
+        self.stats.upstream_fetches += 1
+        try:
+            data = await self.fetcher(url)
+        except ImageProxyError:
+            self.stats.upstream_errors += 1
+            raise
+        except Exception as exc:
+            self.stats.upstream_errors += 1
+            logger.warning("Image fetch failed for %s: %s", url, exc)
+            raise ImageProxyError("Could not fetch upstream image", 502) from exc
+        self.stats.upstream_bytes += len(data)
+        return data
+
+    async def _download(self, url: str) -> bytes:
+        # Follow redirects by hand so every hop passes the same URL checks.
+        for _ in range(MAX_REDIRECTS + 1):
+            try:
+                return await self.http_client.get_bytes(
+                    url, MAX_IMAGE_BYTES, follow_redirects=False
+                )
+            except HttpRedirect as redirect:
+                url = redirect.location
+            try:
+                validate_image_url(url)
+            except ImageProxyError as exc:
+                raise ImageProxyError(
+                    "Image URL redirects to a disallowed host"
+                ) from exc
+        raise ImageProxyError("Image URL redirects too many times")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "in_flight": len(self._in_flight),
+            "max_bytes": self.cache.max_bytes,
+            "memory": self.memory.snapshot(),
+        }
+
+
+def _etag(digest: str, variant: str) -> str:
+    return f'"{digest[:32]}-{variant}-v{VARIANT_VERSION}"'
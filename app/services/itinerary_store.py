@@ -0,0 +1,74 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from pydantic import ValidationError
+
+from app.core.cache import TieredCache, cache_from_env
+from app.models.domain import Itinerary
+from app.services.artifacts import artifact_key
+
+logger = logging.getLogger("travel_agent_server.itinerary_store")
+
+ITINERARY_ID_LENGTH = 16
+
+
+class ItineraryStore:
+    """Finished itineraries kept server-side under short content-derived ids.
+
+    The JSON lives in a TieredCache (``ITINERARY_CACHE_*``, SQLite when
+    ``ITINERARY_CACHE_PATH`` is set) and recently used ``Itinerary`` objects
+    are kept as-is, so renders by id skip parsing and validation entirely.
+    """
+
+    def __init__(self, cache: TieredCache, max_objects: int = 256):
+        self.cache = cache
+        self.max_objects = max_objects
+        self._objects: OrderedDict[str, Itinerary] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ItineraryStore":
+        return cls(
+            cache_from_env(
+                "ITINERARY",
+                "itineraries",
+                default_ttl_seconds=7 * 24 * 60 * 60,
+                default_max_entries=1024,
+            )
+        )
+
+    def save(self, itinerary: Itinerary) -> str:
+        itinerary_id = artifact_key("itinerary", itinerary)[:ITINERARY_ID_LENGTH]
+        self.cache.set(itinerary_id, itinerary.model_dump_json())
+        self._remember(itinerary_id, itinerary.model_copy(deep=True))
+        return itinerary_id
+
+    def get(self, itinerary_id: str) -> Itinerary | None:
+        with self._lock:
+            itinerary = self._objects.get(itinerary_id)
+            if itinerary is not None:
+                self._objects.move_to_end(itinerary_id)
+                return itinerary
+
+        stored = self.cache.get(itinerary_id)
+        if stored is None:
+            return None
+        try:
+            itinerary = Itinerary.model_validate_json(stored)
+        except ValidationError:
+            logger.warning("Discarding unreadable stored itinerary %s", itinerary_id)
+            return None
+        self._remember(itinerary_id, itinerary)
+        return itinerary
+
+    def _remember(self, itinerary_id: str, itinerary: Itinerary) -> None:
+        with self._lock:
+            self._objects[itinerary_id] = itinerary
+            self._objects.move_to_end(itinerary_id)
+            while len(self._objects) > self.max_objects:
+                self._objects.popitem(last=False)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**self.cache.snapshot(), "objects": len(self._objects)}
@@ -1,10 +1,29 @@
 from fpdf import FPDF
 from fpdf.errors import FPDFUnicodeEncodingException
 from fastapi import Response
+import hashlib
 import io
+import math
+import multiprocessing
+import os
+import time
 import aiohttp
 import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Any
 from app.models.domain import Itinerary
+from app.services.http import ByteLRU, HttpFetchError, SharedHttpClient
+from app.services.image_proxy import (
+    MAX_IMAGE_BYTES,
+    PDF_IMAGE_MM,
+    ImageProxy,
+    ImageProxyError,
+    make_variant,
+    validate_image_url,
+)
 import logging
 import re
 import unicodedata
@@ -12,6 +31,9 @@ import unicodedata
 logger = logging.getLogger("travel_agent_server")
 
 
+# Prepared images keyed by the digest of their source bytes.
+PREPARED_IMAGES = ByteLRU(32 * 1024 * 1024)
+
 PDF_TEXT_REPLACEMENTS = str.maketrans(
     {
         "\u2018": "'",
@@ -46,6 +68,28 @@ def pdf_safe_filename(value: object) -> str:
     return filename or "itinerary"
 
 
+def prepare_pdf_image(data: bytes) -> bytes:
+    """Turn downloaded image bytes into the proxy's ready-to-embed "pdf" variant.
+
+    Only images fetched without the proxy need this. Bytes Pillow cannot
+    decode are returned unchanged for fpdf to try.
+    """
+    key = hashlib.sha256(data).digest()
+    prepared = PREPARED_IMAGES.get(key)
+    if prepared is not None:
+        return prepared
+    try:
+        prepared = make_variant(data, "pdf")
+    except ImageProxyError:
+        return data
+    PREPARED_IMAGES.set(key, prepared)
+    return prepared
+
+
+def prepare_pdf_images(image_map: dict[str, bytes]) -> dict[str, bytes]:
+    return {url: prepare_pdf_image(data) for url, data in image_map.items()}
+
+
 def itinerary_money(value: object, itinerary: Itinerary) -> str:
     return f"{value}"
 
@@ -73,188 +117,400 @@ class ItineraryPDF(FPDF):
         self.cell(0, 10, f"Page {self.page_no()}", align="C")
 
 
-async def generate_pdf(itinerary: Itinerary):
-    logger.info(f"Starting PDF generation for {itinerary.city}")
-    try:
-        # 1. Fetch all images concurrently
-        image_tasks = []
-        image_map = {}  # url -> bytes
+def activity_image_urls(itinerary: Itinerary) -> set[str]:
+    return {
+        activity.image_url
+        for day in itinerary.days
+        for activity in day.activities
+        if activity.image_url
+    }
 
-        # Add User-Agent to avoid 403s
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
 
-        async with aiohttp.ClientSession(headers=headers) as session:
-            for day in itinerary.days:
-                for activity in day.activities:
-                    if activity.image_url:
-                        # Create a task for each image
-                        async def fetch_image(url):
-                            try:
-                                async with session.get(url, timeout=10) as resp:
-                                    if resp.status == 200:
-                                        return url, await resp.read()
-                            except Exception as e:
-                                logger.warning(f"Failed to fetch image {url}: {e}")
-                                pass
-                            return url, None
-
-                        image_tasks.append(fetch_image(activity.image_url))
-
-            # Run all tasks
-            if image_tasks:
-                results = await asyncio.gather(*image_tasks)
-                for url, data in results:
-                    if data:
-                        image_map[url] = data
+async def fetch_proxied_images(
+    itinerary: Itinerary, image_proxy: ImageProxy
+) -> dict[str, bytes]:
+    """Fetch PDF-sized images through the shared proxy cache."""
+    urls = activity_image_urls(itinerary)
 
-        # 2. Generate PDF
-        pdf = ItineraryPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
+    async def fetch_image(url):
+        try:
+            return url, (await image_proxy.get(url, "pdf")).content
+        except ImageProxyError as e:
+            logger.warning(f"Failed to fetch image {url}: {e}")
+            return url, None
 
-        # Title
-        pdf.set_font("helvetica", "B", 24)
-        pdf.set_text_color(31, 41, 55)  # Gray-800
-        pdf.cell(
-            0, 10, f"Trip to {itinerary.city}", new_x="LMARGIN", new_y="NEXT", align="C"
-        )
-        pdf.ln(5)
+    results = await asyncio.gather(*(fetch_image(url) for url in urls))
+    return {url: data for url, data in results if data}
 
-        # Summary Badge
-        pdf.set_fill_color(5, 150, 105)  # Emerald-600
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_font("helvetica", "B", 12)
-        # Estimate width of text
-        total_str = f" Total Estimated Cost: {itinerary_money(itinerary.total_cost, itinerary)} "
-        width = pdf.get_string_width(total_str) + 10
-        pdf.set_x((210 - width) / 2)  # Center
+
+async def fetch_images(
+    itinerary: Itinerary, http_client: SharedHttpClient
+) -> dict[str, bytes]:
+    """Download every activity image as-is when no proxy is available."""
+    urls = activity_image_urls(itinerary)
+
+    async def fetch_image(url):
+        try:
+            validate_image_url(url)
+            return url, await http_client.get_bytes(url, MAX_IMAGE_BYTES)
+        except (
+            ImageProxyError,
+            HttpFetchError,
+            aiohttp.ClientError,
+            TimeoutError,
+        ) as e:
+            logger.warning(f"Failed to fetch image {url}: {e}")
+            return url, None
+
+    results = await asyncio.gather(*(fetch_image(url) for url in urls))
+    return {url: data for url, data in results if data}
+
+
+def build_pdf(itinerary: Itinerary, image_map: dict[str, bytes]) -> bytes:
+    """Render the itinerary; ``image_map`` maps image URLs to embeddable bytes."""
+    pdf = ItineraryPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    # Title
+    pdf.set_font("helvetica", "B", 24)
+    pdf.set_text_color(31, 41, 55)  # Gray-800
+    pdf.cell(
+        0, 10, f"Trip to {itinerary.city}", new_x="LMARGIN", new_y="NEXT", align="C"
+    )
+    pdf.ln(5)
+
+    # Summary Badge
+    pdf.set_fill_color(5, 150, 105)  # Emerald-600
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font("helvetica", "B", 12)
+    # Estimate width of text
+    total_str = f" Total Estimated Cost: {itinerary_money(itinerary.total_cost, itinerary)} "
+    width = pdf.get_string_width(total_str) + 10
+    pdf.set_x((210 - width) / 2)  # Center
+    pdf.cell(
+        width,
+        8,
+        total_str,
+        fill=True,
+        align="C",
+        new_x="LMARGIN",
+        new_y="NEXT",
+        border=0,
+    )
+    pdf.ln(10)
+
+    # Reset Colors
+    pdf.set_text_color(0, 0, 0)
+
+    # Days
+    for day in itinerary.days:
+        # Smart Break for Header: Ensure space for Header (15mm) + 1 Activity (~50mm)
+        if 297 - pdf.get_y() - 15 < 65:
+            pdf.add_page()
+
+        # Day Header
+        pdf.set_fill_color(239, 246, 255)  # Blue-50
+        pdf.rect(10, pdf.get_y(), 190, 8, "F")
+
+        pdf.set_font("helvetica", "B", 16)
+        pdf.set_text_color(37, 99, 235)  # Blue-600
+
+        header_text = f" Day {day.day_number}"
+        if day.city:
+            header_text += f" - {day.city}"
+
+        pdf.cell(100, 8, header_text, border=0)
+
+        pdf.set_text_color(75, 85, 99)  # Gray-600
+        pdf.set_font("helvetica", "", 12)
+        day_cost = sum(
+            a.cost for a in day.activities if isinstance(a.cost, (int, float))
+        )
         pdf.cell(
-            width,
+            90,
             8,
-            total_str,
-            fill=True,
-            align="C",
+            f"{itinerary_money(day_cost, itinerary)}   ",
+            align="R",
             new_x="LMARGIN",
             new_y="NEXT",
             border=0,
         )
-        pdf.ln(10)
-
-        # Reset Colors
-        pdf.set_text_color(0, 0, 0)
+        pdf.ln(5)
 
-        # Days
-        for day in itinerary.days:
-            # Smart Break for Header: Ensure space for Header (15mm) + 1 Activity (~50mm)
-            if 297 - pdf.get_y() - 15 < 65:
+        for activity in day.activities:
+            # Smart Page Break for Activity
+            # A4 Height (297) - Bottom Margin (15) - Current Y < Needed (50mm for img)
+            if 297 - pdf.get_y() - 15 < 50:
                 pdf.add_page()
 
-            # Day Header
-            pdf.set_fill_color(239, 246, 255)  # Blue-50
-            pdf.rect(10, pdf.get_y(), 190, 8, "F")
+            # Layout: Image Left (60mm), Text Right
+            start_y = pdf.get_y()
+
+            # Content Box (Right - starts at 80mm from left margin)
+            pdf.set_left_margin(80)
+            pdf.set_font("helvetica", "B", 12)
+            pdf.set_text_color(0, 0, 0)
+            pdf.cell(0, 6, activity.name, new_x="LMARGIN", new_y="NEXT")
+
+            pdf.set_font("helvetica", "", 10)
+            pdf.set_text_color(55, 65, 81)
+            pdf.multi_cell(0, 5, activity.description)
+            pdf.ln(2)
+
+            # Meta tags
+            pdf.set_font("helvetica", "B", 9)
+            pdf.set_text_color(5, 150, 105)  # Green
+            if activity.cost is not None:
+                cost_text = (
+                    itinerary_money(activity.cost, itinerary)
+                    if isinstance(activity.cost, (int, float))
+                    else str(activity.cost)
+                )
+                pdf.cell(20, 5, cost_text)
+            pdf.set_text_color(107, 114, 128)  # Gray
+            if activity.duration_str:
+                pdf.cell(30, 5, f" {activity.duration_str}")
+
+            # Record height
+            end_y = pdf.get_y()
+
+            # Render Image (Left)
+            pdf.set_left_margin(10)
+            pdf.set_y(start_y)
+
+            if activity.image_url and activity.image_url in image_map:
+                try:
+                    img_data = io.BytesIO(image_map[activity.image_url])
+                    # Fixed size 60x45 (Smaller)
+                    pdf.image(
+                        img_data, x=10, y=start_y, w=PDF_IMAGE_MM[0], h=PDF_IMAGE_MM[1]
+                    )
+                except Exception:
+                    pdf.set_font("helvetica", "I", 8)
+                    pdf.cell(60, 45, "(Image Error)", border=1, align="C")
+            else:
+                # Placeholder if no image
+                pdf.set_font("helvetica", "I", 8)
+                pdf.set_text_color(156, 163, 175)
+                pdf.cell(60, 45, "(No Image)", border=1, align="C")
+
+            # Move cursor to bottom of section
+            max_y = max(start_y + 45, end_y)
+            pdf.set_y(max_y + 8)  # 8mm gap
+
+            # Add separator
+            pdf.set_draw_color(229, 231, 235)
+            pdf.line(10, max_y + 4, 200, max_y + 4)
+
+    return bytes(pdf.output())
+
+
+@dataclass
+class PdfRenderSpec:
+    """Everything a worker process needs to render one itinerary PDF."""
+
+    itinerary: dict[str, Any]
+    images: dict[str, bytes]
+
+
+def render_pdf_spec(spec: PdfRenderSpec) -> bytes:
+    return build_pdf(Itinerary.model_validate(spec.itinerary), spec.images)
+
+
+class PdfRenderSaturated(Exception):
+    def __init__(self, retry_after_seconds: int):
+        super().__init__("PDF renderer is saturated")
+        self.retry_after_seconds = retry_after_seconds
+
+
+@dataclass
+class PdfRenderStats:
+    rendered: int = 0
+    failed: int = 0
+    rejected: int = 0
+    restarts: int = 0
+    average_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "average_seconds": round(self.average_seconds, 4)}
+
+
+class PdfRenderPool:
+    """Bounded pool that renders PDFs off the event loop.
+
+    Layout runs in ``max_workers`` processes (threads with
+    ``use_processes=False``). Up to ``max_queue`` further requests wait for a
+    worker; beyond that ``PdfRenderSaturated`` carries a Retry-After estimate
+    derived from the average render time. A worker process that dies breaks
+    the whole process pool, so the pool is replaced and the render retried
+    once.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue: int = 8,
+        use_processes: bool = True,
+        renderer: Callable[[PdfRenderSpec], bytes] = render_pdf_spec,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.use_processes = use_processes
+        self.renderer = renderer
+        self.pending = 0
+        self.stats = PdfRenderStats()
+        self._executor: Executor | None = None
+
+    @classmethod
+    def from_env(cls) -> "PdfRenderPool":
+        return cls(
+            max_workers=int(os.environ.get("PDF_RENDER_WORKERS", "2")),
+            max_queue=int(os.environ.get("PDF_RENDER_MAX_QUEUE", "8")),
+            use_processes=os.environ.get("PDF_RENDER_PROCESSES", "1") != "0",
+        )
 
-            pdf.set_font("helvetica", "B", 16)
-            pdf.set_text_color(37, 99, 235)  # Blue-600
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
 
-            header_text = f" Day {day.day_number}"
-            if day.city:
-                header_text += f" - {day.city}"
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                # Spawned workers avoid inheriting the server's threads and locks.
+                self._executor = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="pdf-render"
+                )
+        return self._executor
+
+    def retry_after_seconds(self) -> int:
+        average = self.stats.average_seconds or 1.0
+        return max(1, math.ceil(average * self.pending / self.max_workers))
+
+    def ensure_capacity(self) -> None:
+        if self.pending >= self.capacity:
+            self.stats.rejected += 1
+            raise PdfRenderSaturated(self.retry_after_seconds())
+
+    async def render(self, itinerary: Itinerary, images: dict[str, bytes]) -> bytes:
+        self.ensure_capacity()
+        spec = PdfRenderSpec(itinerary.model_dump(mode="json"), images)
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            try:
+                pdf_bytes = await self._run(spec)
+            except BrokenProcessPool:
+                logger.warning("PDF render worker died; restarting the pool")
+                pdf_bytes = await self._run(spec)
+        except Exception:
+            self.stats.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        elapsed = time.perf_counter() - started
+        self.stats.rendered += 1
+        if self.stats.rendered == 1:
+            self.stats.average_seconds = elapsed
+        else:
+            self.stats.average_seconds += 0.2 * (elapsed - self.stats.average_seconds)
+        return pdf_bytes
+
+    async def _run(self, spec: PdfRenderSpec) -> bytes:
+        executor = self.executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, self.renderer, spec
+            )
+        except BrokenProcessPool:
+            # Concurrent renders share the broken pool; only replace it once.
+            if self._executor is executor:
+                self._executor = None
+                self.stats.restarts += 1
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "pending": self.pending,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "processes": self.use_processes,
+        }
 
-            pdf.cell(100, 8, header_text, border=0)
 
-            pdf.set_text_color(75, 85, 99)  # Gray-600
-            pdf.set_font("helvetica", "", 12)
-            day_cost = sum(
-                a.cost for a in day.activities if isinstance(a.cost, (int, float))
-            )
-            pdf.cell(
-                90,
-                8,
-                f"{itinerary_money(day_cost, itinerary)}   ",
-                align="R",
-                new_x="LMARGIN",
-                new_y="NEXT",
-                border=0,
+def pdf_response(itinerary: Itinerary, pdf_bytes: bytes, **headers: str) -> Response:
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename=Trip_to_{pdf_safe_filename(itinerary.city)}.pdf"
+            ),
+            **headers,
+        },
+    )
+
+
+async def render_pdf(
+    itinerary: Itinerary,
+    image_proxy: ImageProxy | None = None,
+    render_pool: PdfRenderPool | None = None,
+    http_client: SharedHttpClient | None = None,
+    missing_images: list[str] | None = None,
+) -> bytes:
+    """Fetch the itinerary's images and lay out its PDF.
+
+    URLs whose image could not be fetched are appended to ``missing_images``;
+    the PDF shows a placeholder for them.
+    """
+    logger.info(f"Starting PDF generation for {itinerary.city}")
+    if render_pool is not None:
+        # Refuse before fetching any images when the renderer is saturated.
+        render_pool.ensure_capacity()
+    try:
+        # 1. Fetch all images concurrently; the proxy's "pdf" variant is final.
+        if image_proxy is not None:
+            image_map = await fetch_proxied_images(itinerary, image_proxy)
+        else:
+            client = http_client or SharedHttpClient()
+            try:
+                image_map = await fetch_images(itinerary, client)
+            finally:
+                if http_client is None:
+                    await client.close()
+            image_map = await asyncio.to_thread(prepare_pdf_images, image_map)
+        if missing_images is not None:
+            missing_images.extend(
+                sorted(activity_image_urls(itinerary) - image_map.keys())
             )
-            pdf.ln(5)
-
-            for activity in day.activities:
-                # Smart Page Break for Activity
-                # A4 Height (297) - Bottom Margin (15) - Current Y < Needed (50mm for img)
-                if 297 - pdf.get_y() - 15 < 50:
-                    pdf.add_page()
-
-                # Layout: Image Left (60mm), Text Right
-                start_y = pdf.get_y()
-
-                # Content Box (Right - starts at 80mm from left margin)
-                pdf.set_left_margin(80)
-                pdf.set_font("helvetica", "B", 12)
-                pdf.set_text_color(0, 0, 0)
-                pdf.cell(0, 6, activity.name, new_x="LMARGIN", new_y="NEXT")
-
-                pdf.set_font("helvetica", "", 10)
-                pdf.set_text_color(55, 65, 81)
-                pdf.multi_cell(0, 5, activity.description)
-                pdf.ln(2)
-
-                # Meta tags
-                pdf.set_font("helvetica", "B", 9)
-                pdf.set_text_color(5, 150, 105)  # Green
-                if activity.cost is not None:
-                    cost_text = (
-                        itinerary_money(activity.cost, itinerary)
-                        if isinstance(activity.cost, (int, float))
-                        else str(activity.cost)
-                    )
-                    pdf.cell(20, 5, cost_text)
-                pdf.set_text_color(107, 114, 128)  # Gray
-                if activity.duration_str:
-                    pdf.cell(30, 5, f" {activity.duration_str}")
-
-                # Record height
-                end_y = pdf.get_y()
-
-                # Render Image (Left)
-                pdf.set_left_margin(10)
-                pdf.set_y(start_y)
-
-                if activity.image_url and activity.image_url in image_map:
-                    try:
-                        img_data = io.BytesIO(image_map[activity.image_url])
-                        # Fixed size 60x45 (Smaller)
-                        pdf.image(img_data, x=10, y=start_y, w=60, h=45)
-                    except Exception:
-                        pdf.set_font("helvetica", "I", 8)
-                        pdf.cell(60, 45, "(Image Error)", border=1, align="C")
-                else:
-                    # Placeholder if no image
-                    pdf.set_font("helvetica", "I", 8)
-                    pdf.set_text_color(156, 163, 175)
-                    pdf.cell(60, 45, "(No Image)", border=1, align="C")
-
-                # Move cursor to bottom of section
-                max_y = max(start_y + 45, end_y)
-                pdf.set_y(max_y + 8)  # 8mm gap
-
-                # Add separator
-                pdf.set_draw_color(229, 231, 235)
-                pdf.line(10, max_y + 4, 200, max_y + 4)
-
-        # Output
-        pdf_bytes = bytes(pdf.output())
-
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": (
-                    f"attachment; filename=Trip_to_{pdf_safe_filename(itinerary.city)}.pdf"
-                )
-            },
-        )
+
+        # 2. Generate PDF
+        if render_pool is not None:
+            return await render_pool.render(itinerary, image_map)
+        return build_pdf(itinerary, image_map)
+    except PdfRenderSaturated:
+        raise
     except Exception as e:
         logger.exception("PDF Generation Failed")
         raise e
+
+
+async def generate_pdf(
+    itinerary: Itinerary,
+    image_proxy: ImageProxy | None = None,
+    render_pool: PdfRenderPool | None = None,
+    http_client: SharedHttpClient | None = None,
+):
+    pdf_bytes = await render_pdf(itinerary, image_proxy, render_pool, http_client)
+    return pdf_response(itinerary, pdf_bytes)
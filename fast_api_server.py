@@ -1,11 +1,14 @@
-import json
 import asyncio
+import json
 import logging
+import os
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
 from logging.handlers import RotatingFileHandler
 from typing import Any, cast
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
@@ -13,9 +16,24 @@ from fastapi.staticfiles import StaticFiles
 from app.api.routers.auth import router as auth_router
 from app.api.routers.history import router as history_router
 from app.core.agent import TravelAgent
-from app.models.domain import Itinerary, Preferences
-from app.services.calendar import generate_ics
-from app.services.pdf import generate_pdf as generate_pdf_util
+from app.core.coalesce import PlanCoalescer
+from app.models.domain import DayPlan, Itinerary, Preferences
+from app.services.artifacts import (
+    ArtifactCache,
+    artifact_etag,
+    artifact_key,
+    etag_matches,
+)
+from app.services.calendar import generate_ics, resolve_start_date
+from app.services.http import SharedHttpClient
+from app.services.image_proxy import CACHE_CONTROL, ImageProxy, ImageProxyError
+from app.services.itinerary_store import ItineraryStore
+from app.services.pdf import (
+    PdfRenderPool,
+    PdfRenderSaturated,
+    pdf_response,
+    render_pdf,
+)
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -27,7 +45,15 @@ logger.addHandler(handler)
 
 load_dotenv()
 
-app = FastAPI(title="Travel Planner Agent API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await http_client.close()
+    pdf_render_pool.shutdown()
+
+
+app = FastAPI(title="Travel Planner Agent API", lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -49,6 +75,14 @@ app.include_router(auth_router)
 app.include_router(history_router)
 
 agent = TravelAgent()
+planner = PlanCoalescer(agent)
+http_client = SharedHttpClient.from_env()
+image_proxy = ImageProxy.from_env(http_client)
+pdf_render_pool = PdfRenderPool.from_env()
+artifact_cache = ArtifactCache.from_env()
+itinerary_store = ItineraryStore.from_env()
+# /metrics exposes routing and cache internals, so it is off unless enabled.
+metrics_enabled = os.environ.get("METRICS_ENABLED", "0") != "0"
 
 
 @app.get("/health")
@@ -56,13 +90,33 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    if not metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {
+        "llm_cache": agent.response_cache.snapshot(),
+        "image_cache": agent.image_search.snapshot(),
+        "image_index": agent.image_index.snapshot(),
+        "model_routing": agent.router.snapshot(),
+        "json_repair": agent.repair_stats.as_dict(),
+        "budget_rebalancer": agent.rebalance_stats.as_dict(),
+        "plan_coalescing": planner.snapshot(),
+        "image_proxy": image_proxy.snapshot(),
+        "http_client": http_client.snapshot(),
+        "pdf_render": pdf_render_pool.snapshot(),
+        "artifact_cache": artifact_cache.snapshot(),
+        "itinerary_store": itinerary_store.snapshot(),
+    }
+
+
 @app.post("/plan", response_model=Itinerary)
-def generate_plan(preferences: Preferences):
+async def generate_plan(preferences: Preferences):
     """
     Generates a travel itinerary based on user preferences.
     """
     try:
-        itinerary = agent.plan_trip(preferences)
+        itinerary = await planner.plan(preferences)
         itinerary.uses_local_budget = preferences.uses_local_budget
         return itinerary
     except Exception as e:
@@ -88,7 +142,7 @@ def generate_plan(preferences: Preferences):
 @app.post("/plan_stream")
 async def stream_plan_endpoint(preferences: Preferences):
     """
-    Streams status updates and the final itinerary as NDJSON.
+    Streams status updates, day previews and the final itinerary as NDJSON.
     """
     destination = preferences.city or "destination discovery"
     logger.info(
@@ -99,16 +153,19 @@ async def stream_plan_endpoint(preferences: Preferences):
 
     async def event_generator():
         try:
-            for item in agent.plan_trip_stream(preferences):
+            async for item in planner.stream(preferences):
                 if isinstance(item, str):
                     yield json.dumps({"type": "status", "message": item}) + "\n"
+                elif isinstance(item, DayPlan):
+                    yield json.dumps({"type": "day", "data": item.model_dump()}) + "\n"
                 else:
                     item.uses_local_budget = preferences.uses_local_budget
-                    yield (
-                        json.dumps({"type": "result", "data": item.model_dump()}) + "\n"
-                    )
-
-                await asyncio.sleep(0.05)
+                    result = {
+                        "type": "result",
+                        "data": item.model_dump(),
+                        "id": await asyncio.to_thread(itinerary_store.save, item),
+                    }
+                    yield json.dumps(result) + "\n"
         except Exception as e:
             error_msg = str(e)
             logger.error("SERVER ERROR: %s", error_msg)
@@ -125,22 +182,134 @@ async def stream_plan_endpoint(preferences: Preferences):
     return StreamingResponse(event_generator(), media_type="application/x-ndjson")
 
 
-@app.post("/pdf")
-async def generate_pdf(itinerary: Itinerary):
-    return await generate_pdf_util(itinerary)
+@app.get("/img")
+async def proxy_image(request: Request, url: str, size: str = "card"):
+    """Serve a remote image through the local cache, optionally resized."""
+    try:
+        image = await image_proxy.get(url, size)
+    except ImageProxyError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
 
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": image.etag}
+    if request.headers.get("if-none-match") == image.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=image.content, media_type=image.media_type, headers=headers)
 
-@app.post("/calendar")
-async def generate_calendar(itinerary: Itinerary, start_date: str | None = None):
-    ics_bytes = generate_ics(itinerary, start_date)
+
+async def cached_artifact(
+    request: Request,
+    key: str,
+    render: Callable[[], Awaitable[tuple[bytes, bool]]],
+) -> tuple[bytes | None, dict[str, str]]:
+    """Return the artifact for ``key`` (None for a 304) and its cache headers.
+
+    ``render`` returns the content and whether it is complete; incomplete
+    renders are neither cached nor given an ETag, so the next request retries.
+    """
+    etag = artifact_etag(key)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        artifact_cache.stats.not_modified += 1
+        return None, headers
+    content = await asyncio.to_thread(artifact_cache.get, key)
+    if content is None:
+        content, complete = await render()
+        if not complete:
+            artifact_cache.stats.incomplete += 1
+            return content, {"Cache-Control": "no-store"}
+        await asyncio.to_thread(artifact_cache.put, key, content)
+    return content, headers
+
+
+async def pdf_artifact(request: Request, itinerary: Itinerary) -> Response:
+    async def render() -> tuple[bytes, bool]:
+        missing_images: list[str] = []
+        content = await render_pdf(
+            itinerary,
+            image_proxy=image_proxy,
+            render_pool=pdf_render_pool,
+            missing_images=missing_images,
+        )
+        return content, not missing_images
+
+    try:
+        content, headers = await cached_artifact(
+            request, artifact_key("pdf", itinerary), render
+        )
+    except PdfRenderSaturated as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="PDF export is busy, please retry shortly",
+            headers={"Retry-After": str(exc.retry_after_seconds)},
+        )
+    if content is None:
+        return Response(status_code=304, headers=headers)
+    return pdf_response(itinerary, content, **headers)
+
+
+async def calendar_artifact(
+    request: Request, itinerary: Itinerary, start_date: str | None
+) -> Response:
+    # Key on the resolved date: an omitted start date means "tomorrow".
+    start = resolve_start_date(start_date)
+
+    async def render() -> tuple[bytes, bool]:
+        return generate_ics(itinerary, start.isoformat()), True
+
+    content, headers = await cached_artifact(
+        request, artifact_key("calendar", itinerary, start.isoformat()), render
+    )
+    if content is None:
+        return Response(status_code=304, headers=headers)
     filename = f"Trip_to_{itinerary.city.replace(' ', '_')}.ics"
     return Response(
-        content=ics_bytes,
+        content=content,
         media_type="text/calendar",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            **headers,
+        },
     )
 
 
+async def stored_itinerary(itinerary_id: str) -> Itinerary:
+    # The store may read SQLite and validate JSON; keep both off the loop.
+    itinerary = await asyncio.to_thread(itinerary_store.get, itinerary_id)
+    if itinerary is None:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    return itinerary
+
+
+@app.post("/pdf")
+async def generate_pdf(request: Request, itinerary: Itinerary):
+    return await pdf_artifact(request, itinerary)
+
+
+@app.post("/calendar")
+async def generate_calendar(
+    request: Request, itinerary: Itinerary, start_date: str | None = None
+):
+    return await calendar_artifact(request, itinerary, start_date)
+
+
+@app.get("/itineraries/{itinerary_id}", response_model=Itinerary)
+async def get_itinerary(itinerary_id: str):
+    return await stored_itinerary(itinerary_id)
+
+
+@app.get("/itineraries/{itinerary_id}/pdf")
+async def get_itinerary_pdf(request: Request, itinerary_id: str):
+    return await pdf_artifact(request, await stored_itinerary(itinerary_id))
+
+
+@app.get("/itineraries/{itinerary_id}/calendar")
+async def get_itinerary_calendar(
+    request: Request, itinerary_id: str, start_date: str | None = None
+):
+    itinerary = await stored_itinerary(itinerary_id)
+    return await calendar_artifact(request, itinerary, start_date)
+
+
 if __name__ == "__main__":
     import uvicorn
 
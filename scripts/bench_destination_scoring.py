@@ -0,0 +1,126 @@
+"""Compare the original destination scorer with DestinationIndex.
+
+Synthetic catalogs are made by repeating app/data/destinations.json with
+renamed cities and jittered costs. For each size it reports the one-off
+build times and the mean time to rank a set of preference profiles: with
+the per-destination scorer recommend_destinations used before the index
+("original"), through a substring DestinationIndex and through a BM25 one as
+destination_index() builds it, each by its Python loop and, when NumPy is
+installed, its DestinationMatrix. Substring rankings are checked against
+tests/reference_scoring.py.
+
+Usage: python scripts/bench_destination_scoring.py --sizes 100 10000 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from functools import partial
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.bm25 import BM25Index
+from app.core.destinations import (
+    DestinationIndex,
+    DestinationMatrix,
+    _relevance_text,
+    load_destinations,
+    np,
+)
+from app.models.domain import Preferences
+from tests.reference_scoring import BaselineRanker, reference_top
+
+PROFILES = [
+    Preferences(budget=1500, days=3, interests=["Food", "Art"], vibe="ancient cafes"),
+    Preferences(budget=900, days=3, interests=["Hiking"], vibe="mountain trekking"),
+    Preferences(budget=700, days=3, interests=["Nightlife"], vibe="music bars city"),
+    Preferences(
+        budget=800,
+        days=3,
+        interests=["Food"],
+        vibe="quiet digital nomad cafes",
+        work_friendly=True,
+    ),
+]
+
+
+def catalog(size: int) -> list[dict]:
+    base = load_destinations()
+    rng = random.Random(size)
+    items = []
+    for position in range(size):
+        item = dict(base[position % len(base)])
+        if position >= len(base):
+            item["city"] = f"{item['city']} {position // len(base)}"
+            item["estimated_cost"] = round(
+                float(item.get("estimated_cost") or 0) * rng.uniform(0.7, 1.3), 2
+            )
+        items.append(item)
+    return items
+
+
+def bm25_destination_index(destinations: list[dict]) -> DestinationIndex:
+    relevance = BM25Index.build([_relevance_text(item) for item in destinations])
+    return DestinationIndex(destinations, relevance=relevance)
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        destinations = catalog(size)
+        repeat = max(1, 20_000 // size)
+        build, index = timed(partial(DestinationIndex, destinations), 1)
+        bm25_build, bm25_index = timed(partial(bm25_destination_index, destinations), 1)
+        engines = {
+            "original": BaselineRanker(destinations),
+            "indexed": index,
+            "bm25": bm25_index,
+        }
+        if np is not None:
+            engines["matrix"] = DestinationMatrix(index)
+            engines["bm25_matrix"] = DestinationMatrix(bm25_index)
+        index.matrix = bm25_index.matrix = None
+
+        totals = dict.fromkeys(engines, 0.0)
+        for prefs in PROFILES:
+            found = {}
+            for name, engine in engines.items():
+                elapsed, found[name] = timed(
+                    partial(engine.top, prefs, args.limit),
+                    1 if name == "original" else repeat,
+                )
+                totals[name] += elapsed
+            expected = reference_top(destinations, prefs, args.limit)
+            assert found["indexed"] == expected, (found["indexed"], expected)
+            if np is not None:
+                assert found["matrix"] == expected, (found["matrix"], expected)
+                assert found["bm25_matrix"] == found["bm25"], (
+                    found["bm25_matrix"],
+                    found["bm25"],
+                )
+
+        ms = {name: total / len(PROFILES) * 1000 for name, total in totals.items()}
+        print(
+            f"{size:>7} destinations  build={build * 1000:.1f} ms"
+            f"  bm25 build={bm25_build * 1000:.1f} ms"
+        )
+        print(
+            "         "
+            + "  ".join(f"{name}={value:.2f} ms" for name, value in ms.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare serial and batched image resolution for a full itinerary.
+
+A local stand-in replaces the DuckDuckGo search: it sleeps for a fixed
+latency (plus jitter) per query, so the numbers reflect scheduling rather
+than network luck. The serial baseline resolves activity by activity the
+way parsing used to; the batch resolver deduplicates queries and searches
+them concurrently under a deadline.
+
+Usage: python scripts/bench_image_resolution.py --days 7 --per-day 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.images import resolve_activity_image, resolve_itinerary_images
+from app.models.domain import Activity, DayPlan, Itinerary
+
+REPEATED = ("Old Town Walk", "Local Market", "Sunset Viewpoint")
+
+
+class StandInSearch:
+    def __init__(self, latency: float, jitter: float, seed: int = 7):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str) -> str:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+        return f"https://images.example.com/{abs(hash(query))}.jpg"
+
+
+def build_itinerary(days: int, per_day: int) -> Itinerary:
+    plans = []
+    for day in range(1, days + 1):
+        names = [f"Sight {day}.{index}" for index in range(per_day)]
+        # Some activities recur across days, as real itineraries do.
+        names[0] = REPEATED[day % len(REPEATED)]
+        plans.append(
+            DayPlan(
+                day_number=day,
+                activities=[
+                    Activity(name=name, description=name, cost=10) for name in names
+                ],
+            )
+        )
+    return Itinerary(city="Lisbon", days=plans)
+
+
+def run_serial(itinerary: Itinerary, search: StandInSearch) -> None:
+    for day in itinerary.days:
+        for activity in day.activities:
+            activity.image_url = resolve_activity_image(
+                {"name": activity.name, "image_url": activity.image_url},
+                itinerary.city,
+                search,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--per-day", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.08)
+    parser.add_argument("--jitter", type=float, default=0.04)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--deadline", type=float, default=10.0)
+    args = parser.parse_args()
+
+    activities = args.days * args.per_day
+    print(
+        f"{args.days} days x {args.per_day} activities = {activities} activities, "
+        f"stand-in latency {args.latency * 1000:.0f}ms "
+        f"+ up to {args.jitter * 1000:.0f}ms"
+    )
+
+    search = StandInSearch(args.latency, args.jitter)
+    itinerary = build_itinerary(args.days, args.per_day)
+    started = time.perf_counter()
+    run_serial(itinerary, search)
+    serial = time.perf_counter() - started
+    print(f"serial:  {serial:6.3f}s  searches={search.calls}")
+
+    search = StandInSearch(args.latency, args.jitter)
+    itinerary = build_itinerary(args.days, args.per_day)
+    started = time.perf_counter()
+    resolve_itinerary_images(
+        itinerary,
+        search,
+        max_workers=args.workers,
+        deadline_seconds=args.deadline,
+    )
+    batched = time.perf_counter() - started
+    print(
+        f"batched: {batched:6.3f}s  searches={search.calls}  "
+        f"workers={args.workers}  speedup={serial / batched:.1f}x"
+    )
+
+    search = StandInSearch(args.latency * 20, 0)
+    itinerary = build_itinerary(args.days, args.per_day)
+    deadline = args.latency * 5
+    started = time.perf_counter()
+    resolve_itinerary_images(
+        itinerary, search, max_workers=args.workers, deadline_seconds=deadline
+    )
+    elapsed = time.perf_counter() - started
+    generated = sum(
+        "pollinations.ai" in (activity.image_url or "")
+        for day in itinerary.days
+        for activity in day.activities
+    )
+    print(
+        f"slow backend with {deadline:.2f}s deadline: returned in {elapsed:.3f}s, "
+        f"{generated}/{activities} activities on generated images"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Benchmark the streaming JSON extractor against the old slicing extractor.
+
+Usage: python scripts/bench_json_extract.py [--days 10 1000 5000] [--chunk 64]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.jsonstream import JsonStreamError, JsonStreamExtractor, extract_json
+
+
+def legacy_extract_json_payload(response_text: str) -> Any:
+    """extract_json_payload as it was before the streaming extractor."""
+    cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
+    start_idx = cleaned_text.find("{")
+    end_idx = cleaned_text.rfind("}")
+
+    if start_idx == -1:
+        start_idx = cleaned_text.find("[")
+        end_idx = cleaned_text.rfind("]")
+
+    if start_idx == -1:
+        return json.loads(cleaned_text)
+
+    candidate_json = cleaned_text[start_idx:]
+    try:
+        data, _ = json.JSONDecoder().raw_decode(candidate_json)
+        return data
+    except json.JSONDecodeError:
+        if end_idx == -1:
+            raise
+        return json.loads(cleaned_text[start_idx : end_idx + 1])
+
+
+def synthetic_response(days: int) -> str:
+    payload = {
+        "city": "Lisbon",
+        "vibe_rationale": "Tiles, trams and {curly} river light.",
+        "cost_breakdown": {"transport": 120, "stay": 400, "food": 150},
+        "days": [
+            {
+                "day_number": day,
+                "city": "Lisbon",
+                "activities": [
+                    {
+                        "name": f"Activity {day}.{slot}",
+                        "description": 'A "quoted" walk past miradouros\\n and cafes.',
+                        "cost": slot * 4.5,
+                        "duration_hours": "2 hours",
+                        "tags": ["Culture", "Food"],
+                    }
+                    for slot in range(4)
+                ],
+            }
+            for day in range(1, days + 1)
+        ],
+    }
+    return f"Here is your plan:\n```json\n{json.dumps(payload, indent=2)}\n```\n"
+
+
+def streamed(text: str, chunk_size: int) -> Any:
+    extractor = JsonStreamExtractor(watch=[("days", "*")])
+    for start in range(0, len(text), chunk_size):
+        extractor.feed(text[start : start + chunk_size])
+    return extractor.close()
+
+
+def push_whole(text: str) -> Any:
+    extractor = JsonStreamExtractor()
+    extractor.feed(text)
+    return extractor.close()
+
+
+def extract(text: str) -> Any:
+    return extract_json(text)[0]
+
+
+def measure(fn, *args, repeat: int = 3) -> tuple[float, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1_000_000
+
+
+def recovers_truncation(fn, text: str) -> bool:
+    try:
+        value = fn(text[: int(len(text) * 0.7)])
+    except (json.JSONDecodeError, JsonStreamError):
+        return False
+    return isinstance(value, dict) and bool(value.get("days"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[10, 1000, 5000])
+    parser.add_argument("--chunk", type=int, default=64, help="Streamed chunk size")
+    args = parser.parse_args()
+
+    print(
+        f"{'days':>6} {'size MB':>8} | {'impl':<16} {'best s':>8} {'peak MB':>8}"
+        f" {'truncated ok':>13}"
+    )
+    for days in args.days:
+        text = synthetic_response(days)
+        expected = legacy_extract_json_payload(text)
+        assert push_whole(text) == expected
+        assert extract(text) == expected
+        assert streamed(text, args.chunk) == expected
+
+        for name, fn, fn_args in [
+            ("legacy", legacy_extract_json_payload, (text,)),
+            ("extract_json", extract, (text,)),
+            ("push (whole)", push_whole, (text,)),
+            (f"push ({args.chunk}B)", streamed, (text, args.chunk)),
+        ]:
+            seconds, peak_mb = measure(fn, *fn_args)
+            truncated_ok = recovers_truncation(
+                lambda value, fn=fn, fn_args=fn_args: fn(value, *fn_args[1:]), text
+            )
+            print(
+                f"{days:>6} {len(text) / 1_000_000:>8.2f} | {name:<16}"
+                f" {seconds:>8.4f} {peak_mb:>8.2f} {truncated_ok!s:>13}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure PDF size and render time with and without image preparation.
+
+Builds an itinerary whose activities each point at a distinct large photo
+(synthetic, noisy JPEGs so they compress like real camera output) and
+renders it three ways: embedding the raw bytes as before, preparing the
+images first (cold), and preparing again with the prepared-image cache warm.
+
+Usage: python scripts/bench_pdf_images.py --days 7 --per-day 4 --width 4000
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image, ImageFilter
+
+from app.models.domain import Activity, DayPlan, Itinerary
+from app.services.pdf import PREPARED_IMAGES, build_pdf, prepare_pdf_images
+
+
+def photo(width: int, height: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    noise = Image.effect_noise((width // 4, height // 4), 60).convert("RGB")
+    tint = Image.new("RGB", noise.size, tuple(rng.randrange(40, 220) for _ in range(3)))
+    image = Image.blend(noise, tint, 0.5).resize((width, height))
+    image = image.filter(ImageFilter.GaussianBlur(1))
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=92)
+    return output.getvalue()
+
+
+def build_inputs(days: int, per_day: int, width: int):
+    height = width * 3 // 4
+    image_map = {}
+    plans = []
+    for day in range(1, days + 1):
+        activities = []
+        for index in range(per_day):
+            url = f"https://images.example.com/{day}-{index}.jpg"
+            image_map[url] = photo(width, height, day * 100 + index)
+            activities.append(
+                Activity(
+                    name=f"Sight {day}.{index}",
+                    description="A long afternoon exploring the old town.",
+                    cost=12.5,
+                    duration_str="2 hours",
+                    image_url=url,
+                )
+            )
+        plans.append(DayPlan(day_number=day, activities=activities))
+    return Itinerary(city="Lisbon", days=plans, total_cost=500), image_map
+
+
+def timed(label: str, itinerary: Itinerary, image_map: dict, prepare: bool) -> None:
+    started = time.perf_counter()
+    if prepare:
+        image_map = prepare_pdf_images(image_map)
+    prepared = time.perf_counter()
+    pdf_bytes = build_pdf(itinerary, image_map)
+    finished = time.perf_counter()
+    print(
+        f"{label:<18} pdf={len(pdf_bytes) / 1024 / 1024:7.2f} MB  "
+        f"prepare={prepared - started:6.2f}s  render={finished - prepared:6.2f}s  "
+        f"total={finished - started:6.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--per-day", type=int, default=4)
+    parser.add_argument("--width", type=int, default=4000)
+    args = parser.parse_args()
+
+    itinerary, image_map = build_inputs(args.days, args.per_day, args.width)
+    source_mb = sum(len(data) for data in image_map.values()) / 1024 / 1024
+    print(
+        f"{len(image_map)} images at {args.width}px, {source_mb:.1f} MB of source JPEG"
+    )
+
+    timed("raw bytes", itinerary, image_map, prepare=False)
+    PREPARED_IMAGES.clear()
+    timed("prepared (cold)", itinerary, image_map, prepare=True)
+    timed("prepared (cached)", itinerary, image_map, prepare=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Count model calls per plan for first-violation vs all-violation refinement.
+
+A fake model returns a plan seeded with defects and, on each refinement,
+fixes exactly the violations named in the prompt. Every non-empty
+combination of defects is planned twice: once feeding refine_plan only the
+first violation (the old behaviour) and once with the full list.
+
+Usage: python scripts/bench_refinement_calls.py
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import re
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_CACHE_TTL_SECONDS"] = "0"
+from app.core.agent import TravelAgent
+from app.models.domain import Preferences
+
+DEFECTS = ("destination_mismatch", "day_count", "empty_day", "over_budget")
+PREFERENCES = Preferences(city="Lisbon", budget=500, days=3, interests=["Food"])
+
+
+def plan_json(defects: set[str]) -> str:
+    day_count = PREFERENCES.days - 1 if "day_count" in defects else PREFERENCES.days
+    days = []
+    for day_number in range(1, day_count + 1):
+        activities = [
+            {
+                "name": f"Walk {day_number}",
+                "description": "Old town walk",
+                "cost": 10,
+                "duration_hours": 2,
+                "image_url": "https://example.com/walk.jpg",
+            }
+        ]
+        if "empty_day" in defects and day_number == 2:
+            activities = []
+        days.append({"day_number": day_number, "activities": activities})
+    activity_total = sum(a["cost"] for day in days for a in day["activities"])
+    breakdown = {
+        "transport": 80,
+        "stay": 900 if "over_budget" in defects else 200,
+        "food": 90,
+        "activities": activity_total,
+    }
+    breakdown["total"] = sum(breakdown.values())
+    return json.dumps(
+        {
+            "city": "Porto" if "destination_mismatch" in defects else "Lisbon",
+            "cost_breakdown": breakdown,
+            "days": days,
+        }
+    )
+
+
+class FakeModel:
+    def __init__(self, defects: set[str]):
+        self.defects = set(defects)
+        self.calls = 0
+        self.responses = SimpleNamespace(create=self.create)
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        named = set(re.findall(r"\[(\w+)\]", kwargs["input"]))
+        self.defects -= named
+        return SimpleNamespace(output_text=plan_json(self.defects))
+
+
+async def run_plan(defects: set[str], first_only: bool) -> tuple[int, bool]:
+    agent = TravelAgent()
+    model = FakeModel(defects)
+    agent.client = model
+
+    if first_only:
+        refine_plan = agent.refine_plan
+
+        async def refine_first_violation(
+            previous_plan, error, preferences, suggestions=None, violations=None
+        ):
+            first = (violations or [])[:1]
+            message = first[0].message if first else error
+            return await refine_plan(
+                previous_plan, message, preferences, suggestions, violations=first
+            )
+
+        agent.refine_plan = refine_first_violation
+
+    itinerary = await agent.plan_trip_async(PREFERENCES)
+    return model.calls, itinerary.valid
+
+
+async def main():
+    scenarios = [
+        set(combo)
+        for size in range(1, len(DEFECTS) + 1)
+        for combo in itertools.combinations(DEFECTS, size)
+    ]
+    print(f"{'defects':<55} {'first-only':>12} {'all-at-once':>12}")
+    totals = {True: [0, 0], False: [0, 0]}
+    for defects in scenarios:
+        row = []
+        for first_only in (True, False):
+            calls, valid = await run_plan(defects, first_only)
+            totals[first_only][0] += calls
+            totals[first_only][1] += valid
+            row.append(f"{calls}{'' if valid else ' (invalid)'}")
+        print(f"{', '.join(sorted(defects)):<55} {row[0]:>12} {row[1]:>12}")
+
+    count = len(scenarios)
+    for first_only, label in ((True, "first-only"), (False, "all-at-once")):
+        calls, valid = totals[first_only]
+        print(
+            f"{label:<12} avg LLM calls/plan: {calls / count:.2f}"
+            f"  valid plans: {valid}/{count}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
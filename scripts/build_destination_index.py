@@ -0,0 +1,30 @@
+"""Build the BM25 relevance index shipped as app/data/destination_bm25.json.
+
+Rerun after editing app/data/destinations.json; at startup a stale index is
+detected by its catalog fingerprint and rebuilt in memory instead.
+
+Usage: python scripts/build_destination_index.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.bm25 import BM25Index
+from app.core.destinations import (
+    RELEVANCE_INDEX_PATH,
+    _relevance_text,
+    load_destinations,
+)
+
+
+def main():
+    texts = [_relevance_text(item) for item in load_destinations()]
+    index = BM25Index.build(texts)
+    index.save(RELEVANCE_INDEX_PATH)
+    size = RELEVANCE_INDEX_PATH.stat().st_size
+    print(f"Wrote {RELEVANCE_INDEX_PATH} ({len(texts)} destinations, {size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
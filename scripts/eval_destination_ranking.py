@@ -0,0 +1,299 @@
+"""Compare the original, substring and BM25 rankings on hand-labelled queries.
+
+"original" is the per-destination scorer with the keyword maps as they were
+before BM25, "substring" a DestinationIndex without BM25 (the original
+scoring with today's expanded keyword maps) and "bm25" the index
+destination_index() builds. Each query lists the catalog cities judged
+relevant to it. For each scorer it reports precision@3, mean reciprocal
+rank and binary nDCG@3 over the queries, and the mean time to rank the
+catalog for one query.
+
+Usage: python scripts/eval_destination_ranking.py [--repeat 200] [--verbose]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.destinations import (
+    DestinationIndex,
+    destination_relevance,
+    load_destinations,
+)
+from app.models.domain import Preferences
+from tests.reference_scoring import BaselineRanker
+
+CUTOFF = 3
+
+JUDGMENTS = [
+    (
+        Preferences(
+            budget=3500, days=5, interests=["Adventure"], vibe="coral reef diving"
+        ),
+        {
+            "Ko Tao",
+            "Ambergris Caye",
+            "Roatan",
+            "Bonaire",
+            "Sipadan",
+            "Fiji",
+            "Palawan",
+            "Grand Cayman",
+            "Dahab",
+            "Maui",
+            "Bali",
+        },
+    ),
+    (
+        Preferences(
+            budget=2000, days=4, interests=["Food"], vibe="street food markets"
+        ),
+        {
+            "Bangkok",
+            "Hanoi",
+            "Palermo",
+            "Mumbai",
+            "Penang",
+            "Mexico City",
+            "Istanbul",
+            "Marrakech",
+            "Hoi An",
+        },
+    ),
+    (
+        Preferences(
+            budget=2500, days=4, interests=["Art"], vibe="museums and galleries"
+        ),
+        {
+            "Florence",
+            "Amsterdam",
+            "Madrid",
+            "Berlin",
+            "Vienna",
+            "Prague",
+            "Buenos Aires",
+        },
+    ),
+    (
+        Preferences(budget=2000, days=4, interests=["Art"], vibe="street art murals"),
+        {"Mexico City", "Buenos Aires", "Berlin", "Madrid", "Amsterdam"},
+    ),
+    (
+        Preferences(
+            budget=2000, days=4, interests=["History"], vibe="ancient ruins temples"
+        ),
+        {
+            "Rome",
+            "Athens",
+            "Cairo",
+            "Jerusalem",
+            "Siem Reap",
+            "Beirut",
+            "Amman",
+            "Kyoto",
+            "Playa del Carmen",
+            "Siwa Oasis",
+            "Dunhuang",
+            "Mexico City",
+            "Chiang Mai",
+        },
+    ),
+    (
+        Preferences(
+            budget=1500, days=3, interests=["Nightlife"], vibe="clubs bars party"
+        ),
+        {
+            "Las Vegas",
+            "Miami",
+            "Barcelona",
+            "Budapest",
+            "Belgrade",
+            "Pattaya",
+            "Playa del Carmen",
+            "Varna",
+        },
+    ),
+    (
+        Preferences(
+            budget=5000, days=5, interests=["Adventure"], vibe="skiing powder snow"
+        ),
+        {
+            "Park City",
+            "Niseko",
+            "Zermatt",
+            "Aspen",
+            "Whistler",
+            "Chamonix",
+            "Cortina d'Ampezzo",
+            "Lake Tahoe",
+        },
+    ),
+    (
+        Preferences(
+            budget=2000, days=4, interests=["Adventure"], vibe="desert camel dunes"
+        ),
+        {
+            "Merzouga",
+            "Siwa Oasis",
+            "Jaisalmer",
+            "Wadi Rum",
+            "Huacachina",
+            "Dubai",
+            "Alice Springs",
+            "Swakopmund",
+            "Dunhuang",
+            "Al Ain",
+        },
+    ),
+    (
+        Preferences(
+            budget=1500, days=5, interests=["Hiking"], vibe="mountain trekking"
+        ),
+        {
+            "Kathmandu",
+            "Cusco",
+            "Bovec",
+            "Medellin",
+            "Queenstown",
+            "Canmore",
+            "Huaraz",
+            "Pokhara",
+            "Tbilisi",
+            "Cape Town",
+        },
+    ),
+    (
+        Preferences(
+            budget=2000, days=5, interests=["Nature"], vibe="quiet relaxed beach"
+        ),
+        {
+            "Negril",
+            "South Padre Island",
+            "Hoi An",
+            "Dahab",
+            "Goa",
+            "Taghazout",
+            "Puerto Viejo",
+            "Palawan",
+            "Ko Tao",
+        },
+    ),
+    (
+        Preferences(budget=4000, days=6, interests=["Nature"], vibe="wildlife safari"),
+        {
+            "Maasai Mara",
+            "Kruger National Park",
+            "Monteverde",
+            "Yellowstone National Park",
+            "Amazon Rainforest",
+            "Galapagos Islands",
+            "Ranthambore National Park",
+            "Bwindi Impenetrable National Park",
+            "Okavango Delta",
+        },
+    ),
+    (
+        Preferences(
+            budget=8000,
+            days=4,
+            interests=["Shopping"],
+            vibe="luxury designer boutiques",
+        ),
+        {
+            "Paris",
+            "Milan",
+            "New York City",
+            "Tokyo",
+            "Dubai",
+            "Beverly Hills",
+            "Hong Kong",
+            "Singapore",
+            "Monaco",
+            "London",
+        },
+    ),
+    (
+        Preferences(
+            budget=800,
+            days=4,
+            interests=["History"],
+            vibe="medieval streets on a budget",
+        ),
+        {"Krakow", "Chiang Mai", "Lisbon", "Lake Atitlan"},
+    ),
+    (
+        Preferences(
+            budget=2500, days=4, interests=["Romantic"], vibe="canals and palaces"
+        ),
+        {"Amsterdam", "Vienna", "Prague", "Montreal"},
+    ),
+]
+
+
+def metrics(ranked: list[str], relevant: set[str]) -> tuple[float, float, float]:
+    precision = sum(city in relevant for city in ranked[:CUTOFF]) / CUTOFF
+    reciprocal = next(
+        (1 / rank for rank, city in enumerate(ranked, 1) if city in relevant), 0.0
+    )
+    dcg = sum(
+        1 / math.log2(rank + 1)
+        for rank, city in enumerate(ranked[:CUTOFF], 1)
+        if city in relevant
+    )
+    ideal = sum(
+        1 / math.log2(rank + 1) for rank in range(1, min(CUTOFF, len(relevant)) + 1)
+    )
+    return precision, reciprocal, dcg / ideal
+
+
+def evaluate(
+    index: DestinationIndex | BaselineRanker, repeat: int, verbose: bool
+) -> dict[str, float]:
+    totals = [0.0, 0.0, 0.0]
+    elapsed = 0.0
+    for prefs, relevant in JUDGMENTS:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            positions = index.top(prefs, len(index))
+        elapsed += (time.perf_counter() - started) / repeat
+        ranked = [index.destinations[position]["city"] for position in positions]
+        for total, value in enumerate(metrics(ranked, relevant)):
+            totals[total] += value
+        if verbose:
+            print(f"    {prefs.vibe!r:32} {ranked[:CUTOFF]}")
+    count = len(JUDGMENTS)
+    return {
+        f"P@{CUTOFF}": totals[0] / count,
+        "MRR": totals[1] / count,
+        f"nDCG@{CUTOFF}": totals[2] / count,
+        "ms/query": elapsed / count * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    destinations = load_destinations()
+    scorers = [
+        ("original", BaselineRanker(destinations)),
+        ("substring", DestinationIndex(destinations)),
+        ("bm25", DestinationIndex(destinations, relevance=destination_relevance())),
+    ]
+    for name, index in scorers:
+        if args.verbose:
+            print(f"{name}:")
+        results = evaluate(index, args.repeat, args.verbose)
+        print(
+            f"{name:>10}  "
+            + "  ".join(f"{key}={value:.3f}" for key, value in results.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Extend the local image index with past successful image searches.
+
+Reads the image search cache (the SQLite file from IMAGE_CACHE_PATH), keeps
+queries that found a renderable URL and are not already answered by the
+index, and appends them as learned entries to app/data/image_index.json.
+
+Usage: python scripts/extend_image_index.py --cache .cache/image_search.sqlite3
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.destinations import load_destinations
+from app.core.image_index import LEARNED_INDEX_PATH, ImageIndex, load_learned_images
+from app.core.images import IMAGE_CACHE_KEY_PREFIX, NO_IMAGE, is_renderable_image_url
+
+
+def cached_hits(path: str, namespace: str) -> list[tuple[str, str]]:
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT key, value FROM cache_entries "
+            "WHERE namespace = ? AND key LIKE ? AND value != ? AND expires_at > ?",
+            (namespace, IMAGE_CACHE_KEY_PREFIX + "%", NO_IMAGE, time.time()),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        (key[len(IMAGE_CACHE_KEY_PREFIX) :], value)
+        for key, value in rows
+        if is_renderable_image_url(value)
+    ]
+
+
+def detect_city(query: str, cities: list[str]) -> str | None:
+    # Queries are "<activity> <city>"; prefer the longest city named in them.
+    padded = f" {query} "
+    matches = [city for city in cities if f" {city.casefold()} " in padded]
+    return max(matches, key=len) if matches else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cache", default=os.environ.get("IMAGE_CACHE_PATH"))
+    parser.add_argument("--namespace", default="image_search")
+    parser.add_argument("--output", type=Path, default=LEARNED_INDEX_PATH)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    if not args.cache:
+        parser.error("--cache or IMAGE_CACHE_PATH is required")
+
+    destinations = load_destinations()
+    learned = load_learned_images(args.output)
+    index = ImageIndex.from_sources(destinations, learned)
+    cities = [item["city"] for item in destinations if item.get("city")]
+    known_queries = {record["query"] for record in learned}
+
+    added = []
+    for query, url in sorted(cached_hits(args.cache, args.namespace)):
+        if query in known_queries or index.lookup(query):
+            continue
+        city = detect_city(query, cities)
+        record = {"query": query, "city": city, "url": url}
+        if index.add_record(query, city, url, "learned") is None:
+            continue
+        added.append(record)
+        known_queries.add(query)
+
+    for record in added:
+        print(f"+ {record['query']!r} ({record['city'] or 'any city'})")
+    print(f"{len(added)} new entries, {len(learned) + len(added)} learned in total")
+
+    if added and not args.dry_run:
+        with args.output.open("w", encoding="utf-8") as fp:
+            json.dump(learned + added, fp, indent=2, ensure_ascii=False)
+            fp.write("\n")
+
+
+if __name__ == "__main__":
+    main()
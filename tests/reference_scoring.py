@@ -0,0 +1,178 @@
+"""The per-destination scorer DestinationIndex replaced, kept as a reference.
+
+``reference_score`` is the original ``_score_destination``: it scores one
+destination with plain substring checks over its full text. It uses the
+current keyword maps by default, which DestinationIndex must match exactly
+when it is built without a BM25 index. ``BaselineRanker`` ranks with the
+keyword maps as they were before the BM25 change, for the benchmark and
+evaluation scripts.
+"""
+
+import re
+from collections.abc import Sequence
+from typing import Any
+
+from app.core.destinations import (
+    INTEREST_KEYWORDS,
+    REMOTE_WORK_RISK_TERMS,
+    VIBE_KEYWORDS,
+    WORK_FRIENDLY_CITIES,
+    WORK_FRIENDLY_QUERY,
+    _clean_interest,
+    _destination_text,
+)
+from app.models.domain import Preferences
+
+BASELINE_INTEREST_KEYWORDS = {
+    "adventure": {"adventure", "hiking", "trek", "surf", "diving", "rafting"},
+    "art": {"art", "gallery", "museum", "architecture", "creative"},
+    "cafes": {"cafe", "cafes", "coffee", "street food", "food"},
+    "food": {"food", "cuisine", "street food", "cafe", "cafes", "dining"},
+    "history": {"history", "historic", "ancient", "heritage", "monastery"},
+    "nature": {"nature", "beach", "mountain", "forest", "lake", "wildlife"},
+    "nightlife": {"nightlife", "bars", "music", "lively"},
+    "romantic": {"romantic", "relaxed", "sunset", "charm"},
+    "shopping": {"market", "shopping", "shops", "boutique"},
+}
+
+BASELINE_VIBE_KEYWORDS = {
+    "ancient": {"ancient", "historic", "heritage", "temple", "medieval", "old town"},
+    "beach": {"beach", "coastal", "ocean", "island", "reef", "turquoise"},
+    "budget": {"budget", "affordable", "cheap", "shoestring", "reasonable"},
+    "cafes": {"cafe", "cafes", "coffee", "street food", "food"},
+    "chill": {"relaxed", "laid-back", "tranquil", "serene", "quiet"},
+    "city": {"city", "urban", "markets", "streets", "nightlife", "culture"},
+    "creative": {"art", "gallery", "murals", "architecture", "creative"},
+    "digital": {"cafe", "cafes", "city", "markets", "affordable", "culture"},
+    "foodie": {"food", "cuisine", "street food", "dining", "flavors"},
+    "luxury": {"luxury", "glamour", "high-end", "opulent", "designer"},
+    "mountain": {"mountain", "hike", "hiking", "trek", "alps", "andes"},
+    "quiet": {"tranquil", "serene", "laid-back", "relaxed", "hidden"},
+    "romantic": {"romantic", "sunset", "charm", "palaces", "canals"},
+}
+
+
+def reference_score(
+    item: dict[str, Any],
+    preferences: Preferences,
+    interest_keywords: dict[str, set[str]] = INTEREST_KEYWORDS,
+    vibe_keywords: dict[str, set[str]] = VIBE_KEYWORDS,
+) -> float:
+    text = _destination_text(item)
+    score = 0.0
+
+    if preferences.city:
+        city = str(item.get("city", "")).lower()
+        country = str(item.get("country", "")).lower()
+        requested = preferences.city.lower()
+        if requested == city:
+            score += 200
+        elif requested in city or requested in country:
+            score += 80
+
+    score += _text_score(preferences.vibe or "", text, weight=9)
+    score += _semantic_score(preferences.vibe or "", text, vibe_keywords, weight=6)
+    for interest in preferences.interests:
+        normalized_interest = _clean_interest(interest)
+        score += _text_score(normalized_interest, text, weight=8)
+        score += _keyword_score(normalized_interest, text, interest_keywords, weight=7)
+        score += _semantic_score(normalized_interest, text, vibe_keywords, weight=4)
+
+    estimated_cost = float(item.get("estimated_cost") or 0)
+    if estimated_cost and preferences.budget:
+        if estimated_cost <= preferences.budget:
+            score += 45
+            budget_room = max(preferences.budget - estimated_cost, 0)
+            score += max(0, 25 * (1 - budget_room / preferences.budget))
+            if estimated_cost <= preferences.budget * 0.75:
+                score += 8
+        else:
+            over_ratio = (estimated_cost - preferences.budget) / preferences.budget
+            score -= 85 + (over_ratio * 90)
+
+    if preferences.work_friendly:
+        score += _work_friendly_score(item, text, preferences, vibe_keywords)
+
+    return score
+
+
+def reference_top(
+    destinations: Sequence[dict[str, Any]],
+    preferences: Preferences,
+    limit: int,
+    **keyword_maps: dict[str, set[str]],
+) -> list[int]:
+    """Positions of the best ``limit`` destinations, ties in catalog order."""
+    scores = [
+        reference_score(item, preferences, **keyword_maps) for item in destinations
+    ]
+    ranked = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+    return ranked[:limit]
+
+
+class BaselineRanker:
+    """Ranks like recommend_destinations did before DestinationIndex."""
+
+    def __init__(self, destinations: Sequence[dict[str, Any]]):
+        self.destinations = destinations
+
+    def __len__(self) -> int:
+        return len(self.destinations)
+
+    def top(self, preferences: Preferences, limit: int) -> list[int]:
+        return reference_top(
+            self.destinations,
+            preferences,
+            limit,
+            interest_keywords=BASELINE_INTEREST_KEYWORDS,
+            vibe_keywords=BASELINE_VIBE_KEYWORDS,
+        )
+
+
+def _work_friendly_score(
+    item: dict[str, Any],
+    text: str,
+    preferences: Preferences,
+    vibe_keywords: dict[str, set[str]],
+) -> float:
+    score = 0.0
+    if item.get("city") in WORK_FRIENDLY_CITIES:
+        score += 28
+    score += _semantic_score(WORK_FRIENDLY_QUERY, text, vibe_keywords, weight=3)
+    if any(term in text for term in REMOTE_WORK_RISK_TERMS):
+        score -= 35
+    estimated_cost = float(item.get("estimated_cost") or 0)
+    if estimated_cost and estimated_cost <= preferences.budget:
+        score += 10
+    return score
+
+
+def _text_score(query: str, text: str, weight: float) -> float:
+    words = [word for word in re.findall(r"[a-z0-9]+", query.lower()) if len(word) > 2]
+    return sum(weight for word in words if word in text)
+
+
+def _keyword_score(
+    interest: str,
+    text: str,
+    keyword_map: dict[str, set[str]],
+    weight: float,
+) -> float:
+    keywords = keyword_map.get(interest, set())
+    return sum(weight for keyword in keywords if keyword in text)
+
+
+def _semantic_score(
+    query: str,
+    text: str,
+    keyword_map: dict[str, set[str]],
+    weight: float,
+) -> float:
+    query_words = {
+        word for word in re.findall(r"[a-z0-9]+", query.lower()) if len(word) > 2
+    }
+    score = 0.0
+    for word in query_words:
+        keywords = keyword_map.get(word, set())
+        score += sum(weight for keyword in keywords if keyword in text)
+    return score
@@ -1,11 +1,15 @@
+import asyncio
+import json
 import os
 import sys
-from unittest.mock import MagicMock, patch
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.core.agent import TravelAgent, budget_targets
+from app.core.agent import TravelAgent, budget_targets, response_cache_key
+from app.core.coalesce import PlanCoalescer
 from app.core.destinations import recommend_destinations
 from app.core.parser import parse_llm_response
 from app.core.prompts import (
@@ -14,6 +18,7 @@ from app.core.prompts import (
     json_repair_prompt,
     refinement_prompt,
 )
+from app.core.routing import CircuitBreaker, CircuitState, LatencyTracker, ModelRouter
 from app.models.domain import (
     Activity,
     CostBreakdown,
@@ -44,13 +49,19 @@ def planner():
     """Returns a TravelAgent instance with mocked OpenAI client."""
     with (
         patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
-        patch("app.core.agent.OpenAI") as mock_client,
+        patch("app.core.agent.AsyncOpenAI") as mock_client,
     ):
         agent = TravelAgent()
         agent.client = mock_client.return_value
+        agent.client.responses.create = AsyncMock()
+        agent.image_search = lambda _: None
         return agent
 
 
+async def collect_events(stream):
+    return [event async for event in stream]
+
+
 def test_initial_plan_success(planner):
     """Verifies that plan_trip parses a valid JSON response correctly."""
     mock_response = MagicMock()
@@ -101,7 +112,277 @@ def test_openai_model_candidate_fallback(planner):
     assert itinerary.city == "London"
 
 
-def test_invalid_schema_response_is_repaired_with_json_mode(planner):
+def test_identical_prompts_are_served_from_response_cache(planner):
+    mock_response = MagicMock()
+    mock_response.output_text = VALID_JSON_RESPONSE
+    planner.client.responses.create.return_value = mock_response
+
+    prefs = Preferences(city="London", budget=1000, days=1, interests=["History"])
+    first = planner.plan_trip(prefs)
+    second = planner.plan_trip(prefs)
+
+    assert first.city == second.city == "London"
+    assert planner.client.responses.create.call_count == 1
+    assert planner.response_cache.stats.hits == 1
+
+
+def test_response_cache_key_separates_models_and_request_flags():
+    base = response_cache_key(
+        "gpt-5.4-mini", "Plan   Lisbon", use_web_search=True, json_mode=False
+    )
+
+    assert base == response_cache_key(
+        "gpt-5.4-mini", "Plan Lisbon", use_web_search=True, json_mode=False
+    )
+    assert base != response_cache_key(
+        "gpt-5.4-nano", "Plan Lisbon", use_web_search=True, json_mode=False
+    )
+    assert base != response_cache_key(
+        "gpt-5.4-mini", "Plan Lisbon", use_web_search=False, json_mode=False
+    )
+    assert base != response_cache_key(
+        "gpt-5.4-mini", "Plan Lisbon", use_web_search=True, json_mode=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_slow_model_is_hedged_with_next_candidate(planner):
+    planner.router.latency = LatencyTracker(default_delay=0.05, min_delay=0.0)
+    fast_response = MagicMock()
+    fast_response.output_text = VALID_JSON_RESPONSE
+    cancelled = []
+
+    async def create(**kwargs):
+        if kwargs["model"] == "gpt-5.4-mini":
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(kwargs["model"])
+                raise
+        return fast_response
+
+    planner.client.responses.create.side_effect = create
+
+    started = time.perf_counter()
+    text = await planner._call_model_with_fallback("Plan London")
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0)
+
+    assert text == VALID_JSON_RESPONSE
+    assert elapsed < 1
+    models = [
+        call.kwargs["model"]
+        for call in planner.client.responses.create.call_args_list
+    ]
+    assert models == ["gpt-5.4-mini", "gpt-5.4-nano"]
+    assert cancelled == ["gpt-5.4-mini"]
+    slow = planner.router.latency.snapshot()["gpt-5.4-mini"]
+    assert slow["hedges_launched"] == 1
+    assert slow["censored_samples"] == slow["samples"] == 1
+    assert slow["p50_seconds"] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_plan_requests_race_models_for_initial_generation(planner):
+    planner.router.latency = LatencyTracker(default_delay=0.05, min_delay=0.0)
+    response = MagicMock()
+    response.output_text = VALID_JSON_RESPONSE
+
+    async def create(**kwargs):
+        if kwargs["model"] == "gpt-5.4-mini":
+            await asyncio.sleep(5)
+        return response
+
+    planner.client.responses.create.side_effect = create
+    prefs = Preferences(city="London", budget=1000, days=1, interests=["History"])
+
+    started = time.perf_counter()
+    itinerary = await PlanCoalescer(planner).plan(prefs)
+
+    assert itinerary.city == "London"
+    assert time.perf_counter() - started < 1
+    calls = planner.client.responses.create.call_args_list
+    assert [call.kwargs["model"] for call in calls[:2]] == [
+        "gpt-5.4-mini",
+        "gpt-5.4-nano",
+    ]
+    assert not any(call.kwargs.get("stream") for call in calls)
+
+
+@pytest.mark.asyncio
+async def test_unhedged_call_waits_for_slow_candidate(planner):
+    planner.router.latency = LatencyTracker(default_delay=0.01, min_delay=0.0)
+    response = MagicMock()
+    response.output_text = "{}"
+
+    async def create(**kwargs):
+        await asyncio.sleep(0.1)
+        return response
+
+    planner.client.responses.create.side_effect = create
+
+    text = await planner._call_model_with_fallback(
+        "Repair JSON", use_web_search=False, json_mode=True, hedge=False
+    )
+
+    assert text == "{}"
+    assert planner.client.responses.create.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failing_model_is_moved_out_of_the_hot_path(planner):
+    planner.router = ModelRouter(
+        ["gpt-5.4-mini", "gpt-5.4-nano"],
+        breaker_factory=lambda: CircuitBreaker(min_requests=2, open_seconds=60),
+    )
+    response = MagicMock()
+    response.output_text = "{}"
+
+    async def create(**kwargs):
+        if kwargs["model"] == "gpt-5.4-mini":
+            raise RuntimeError("429 Too Many Requests")
+        return response
+
+    planner.client.responses.create.side_effect = create
+
+    for attempt in range(3):
+        await planner._call_model_with_fallback(
+            f"Prompt {attempt}", use_web_search=False, hedge=False
+        )
+
+    models = [
+        call.kwargs["model"]
+        for call in planner.client.responses.create.call_args_list
+    ]
+    assert models == [
+        "gpt-5.4-mini",
+        "gpt-5.4-nano",
+        "gpt-5.4-nano",
+        "gpt-5.4-nano",
+    ]
+    assert planner.router.snapshot()["order"] == ["gpt-5.4-nano", "gpt-5.4-mini"]
+
+
+@pytest.mark.asyncio
+async def test_replacement_cancelled_before_starting_gives_back_its_probe(planner):
+    planner.router = ModelRouter(
+        ["gpt-5.4-mini", "gpt-5.4-nano", "gpt-4.1-mini"],
+        latency=LatencyTracker(default_delay=0.01, min_delay=0.0),
+        breaker_factory=lambda: CircuitBreaker(open_seconds=0),
+    )
+    planner.router.record_failure("gpt-4.1-mini", fatal=True)
+    response = MagicMock()
+    response.output_text = "{}"
+    both_running = asyncio.Event()
+
+    async def create(**kwargs):
+        if kwargs["model"] == "gpt-5.4-mini":
+            await both_running.wait()
+            raise RuntimeError("500 Internal Server Error")
+        # Let the first candidate fail in the same wake-up as this success.
+        both_running.set()
+        return response
+
+    planner.client.responses.create.side_effect = create
+
+    text = await planner._call_model_with_fallback("Plan", use_web_search=False)
+    await asyncio.sleep(0)
+
+    assert text == "{}"
+    models = [
+        call.kwargs["model"]
+        for call in planner.client.responses.create.call_args_list
+    ]
+    assert models == ["gpt-5.4-mini", "gpt-5.4-nano"]
+    breaker = planner.router.breakers["gpt-4.1-mini"]
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.is_available()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_plans_do_not_block_each_other(planner):
+    mock_response = MagicMock()
+    mock_response.output_text = VALID_JSON_RESPONSE
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.2)
+        return mock_response
+
+    planner.client.responses.create.side_effect = slow_create
+    prefs = Preferences(city="London", budget=1000, days=1, interests=["History"])
+
+    started = time.perf_counter()
+    itineraries = await asyncio.gather(
+        *(planner.plan_trip_async(prefs) for _ in range(5))
+    )
+    elapsed = time.perf_counter() - started
+
+    assert [itinerary.city for itinerary in itineraries] == ["London"] * 5
+    assert planner.client.responses.create.call_count == 5
+    assert elapsed < 0.6
+
+
+class FakeResponseStream:
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        for chunk in self.chunks:
+            yield MagicMock(type="response.output_text.delta", delta=chunk)
+            await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+
+
+def split_text(text, size=16):
+    return [text[start : start + size] for start in range(0, len(text), size)]
+
+
+@pytest.mark.asyncio
+async def test_streamed_plan_yields_day_before_final_itinerary(planner):
+    planner.client.responses.create.return_value = FakeResponseStream(
+        split_text(VALID_JSON_RESPONSE)
+    )
+    prefs = Preferences(city="London", budget=1000, days=1, interests=["History"])
+
+    events = await collect_events(planner.plan_trip_stream_async(prefs, stream_days=True))
+
+    day_index = next(i for i, event in enumerate(events) if isinstance(event, DayPlan))
+    assert events[day_index].activities[0].name == "Big Ben"
+    assert isinstance(events[-1], Itinerary)
+    assert events[-1].valid
+    assert day_index < len(events) - 1
+    assert planner.client.responses.create.call_args.kwargs["stream"] is True
+
+
+@pytest.mark.asyncio
+async def test_stream_failure_mid_output_restarts_on_next_candidate(planner):
+    chunks = split_text(VALID_JSON_RESPONSE)
+    planner.client.responses.create.side_effect = [
+        FakeResponseStream(chunks[:3], error=RuntimeError("connection reset")),
+        FakeResponseStream(chunks),
+    ]
+
+    deltas = [
+        delta async for delta in planner._stream_model_with_fallback("plan London")
+    ]
+
+    assert None in deltas
+    restart = deltas.index(None)
+    assert "".join(deltas[restart + 1 :]) == VALID_JSON_RESPONSE
+    assert planner.response_cache.get_first(
+        planner._response_cache_keys(
+            "plan London", use_web_search=True, json_mode=False
+        ).values()
+    )
+
+
+@pytest.mark.asyncio
+async def test_invalid_schema_response_is_repaired_with_json_mode(planner):
     invalid_response = MagicMock()
     invalid_response.output_text = '{"destination": "Rotterdam, Netherlands"}'
     repaired_response = MagicMock()
@@ -109,7 +390,7 @@ def test_invalid_schema_response_is_repaired_with_json_mode(planner):
     planner.client.responses.create.side_effect = [invalid_response, repaired_response]
 
     prefs = Preferences(city="London", budget=1000, days=1, interests=["History"])
-    itinerary = planner.generate_initial_plan(prefs)
+    itinerary = await planner.generate_initial_plan(prefs)
 
     assert itinerary.city == "London"
     assert planner.client.responses.create.call_count == 2
@@ -122,12 +403,34 @@ def test_invalid_schema_response_is_repaired_with_json_mode(planner):
     assert "tools" not in repair_kwargs
     assert repair_kwargs["text"] == {"format": {"type": "json_object"}}
     assert "Convert the following travel itinerary response" in repair_kwargs["input"]
+    assert planner.repair_stats.llm_escalations == 1
+
 
+@pytest.mark.asyncio
+async def test_malformed_json_is_repaired_locally_without_model_call(planner):
+    broken_response = MagicMock()
+    broken_response.output_text = VALID_JSON_RESPONSE.replace(
+        '"cost": 0.0, ', "'cost': 0.0, "
+    ).replace("]\n        }\n    ]", "],\n        }\n    ],")
+    planner.client.responses.create.return_value = broken_response
+
+    prefs = Preferences(city="London", budget=1000, days=1, interests=["History"])
+    itinerary = await planner.generate_initial_plan(prefs)
+
+    assert itinerary.city == "London"
+    assert itinerary.days[0].activities[0].name == "Big Ben"
+    assert planner.client.responses.create.call_count == 1
+    snapshot = planner.repair_stats.as_dict()
+    assert snapshot["local_repairs"] == 1
+    assert snapshot["llm_escalations"] == 0
+    assert snapshot["rules"] == {"single_quotes": 1, "trailing_commas": 1}
 
-def test_missing_openai_api_key_leaves_client_unset():
+
+@pytest.mark.asyncio
+async def test_missing_openai_api_key_leaves_client_unset():
     with (
         patch.dict(os.environ, {}, clear=True),
-        patch("app.core.agent.OpenAI") as mock_openai,
+        patch("app.core.agent.AsyncOpenAI") as mock_openai,
     ):
         planner = TravelAgent()
 
@@ -135,7 +438,7 @@ def test_missing_openai_api_key_leaves_client_unset():
     mock_openai.assert_not_called()
 
     with pytest.raises(RuntimeError, match="OPENAI_API_KEY"):
-        planner._call_model_with_fallback("Return JSON")
+        await planner._call_model_with_fallback("Return JSON")
 
 
 def test_constraint_checking(planner):
@@ -639,7 +942,8 @@ def test_constraint_checking_ignores_short_partial_destination_fragment(planner)
     assert itinerary.city == "Amsterdam, Rott"
 
 
-def test_plan_trip_stream_yields_status_events_then_itinerary(planner):
+@pytest.mark.asyncio
+async def test_plan_trip_stream_yields_status_events_then_itinerary(planner):
     itinerary = Itinerary(
         city="Porto",
         cost_breakdown=CostBreakdown(
@@ -667,8 +971,8 @@ def test_plan_trip_stream_yields_status_events_then_itinerary(planner):
     )
 
     with patch.object(planner, "generate_initial_plan", return_value=itinerary):
-        events = list(
-            planner.plan_trip_stream(
+        events = await collect_events(
+            planner.plan_trip_stream_async(
                 Preferences(city="Porto", budget=300, days=1, interests=["Views"])
             )
         )
@@ -678,7 +982,8 @@ def test_plan_trip_stream_yields_status_events_then_itinerary(planner):
     assert events[-1].city == "Porto"
 
 
-def test_local_budget_plan_stream_status_omits_dollar_symbol(planner):
+@pytest.mark.asyncio
+async def test_local_budget_plan_stream_status_omits_dollar_symbol(planner):
     itinerary = Itinerary(
         city="Tokyo",
         cost_breakdown=CostBreakdown(
@@ -700,8 +1005,8 @@ def test_local_budget_plan_stream_status_omits_dollar_symbol(planner):
     )
 
     with patch.object(planner, "generate_initial_plan", return_value=itinerary):
-        events = list(
-            planner.plan_trip_stream(
+        events = await collect_events(
+            planner.plan_trip_stream_async(
                 Preferences(
                     city="Tokyo",
                     local_budget=50000,
@@ -716,7 +1021,8 @@ def test_local_budget_plan_stream_status_omits_dollar_symbol(planner):
     assert "$" not in status_text
 
 
-def test_no_city_vibe_request_receives_destination_suggestions(planner):
+@pytest.mark.asyncio
+async def test_no_city_vibe_request_receives_destination_suggestions(planner):
     prefs = Preferences(
         budget=1500,
         days=1,
@@ -752,7 +1058,7 @@ def test_no_city_vibe_request_receives_destination_suggestions(planner):
         )
 
     with patch.object(planner, "generate_initial_plan", side_effect=fake_initial):
-        events = list(planner.plan_trip_stream(prefs))
+        events = await collect_events(planner.plan_trip_stream_async(prefs))
 
     result = events[-1]
     assert isinstance(result, Itinerary)
@@ -762,7 +1068,8 @@ def test_no_city_vibe_request_receives_destination_suggestions(planner):
     assert len(result.destination_suggestions) == 3
 
 
-def test_over_budget_final_plan_remains_invalid(planner):
+@pytest.mark.asyncio
+async def test_over_budget_final_plan_remains_invalid(planner):
     itinerary = Itinerary(
         city="Lisbon",
         cost_breakdown=CostBreakdown(
@@ -785,7 +1092,7 @@ def test_over_budget_final_plan_remains_invalid(planner):
         patch.object(planner, "generate_initial_plan", return_value=itinerary),
         patch.object(planner, "refine_plan", return_value=itinerary),
     ):
-        events = list(planner.plan_trip_stream(prefs))
+        events = await collect_events(planner.plan_trip_stream_async(prefs))
 
     result = events[-1]
     assert isinstance(result, Itinerary)
@@ -794,7 +1101,86 @@ def test_over_budget_final_plan_remains_invalid(planner):
     assert "exceeds budget" in result.validation_error
 
 
-def test_over_budget_plan_is_refined_to_valid_itinerary(planner):
+@pytest.mark.asyncio
+async def test_fixable_over_budget_plan_is_rebalanced_without_refinement(planner):
+    itinerary = Itinerary(
+        city="Lisbon",
+        cost_breakdown=CostBreakdown(transport=150, stay=230, food=100, activities=60),
+        days=[
+            DayPlan(
+                day_number=1,
+                activities=[
+                    Activity(name="Tram", description="Ride", cost=10),
+                    Activity(name="Fado dinner", description="Music", cost=50),
+                ],
+            )
+        ],
+    )
+    prefs = Preferences(city="Lisbon", budget=500, days=1, interests=["Food"])
+
+    with (
+        patch.object(planner, "generate_initial_plan", return_value=itinerary),
+        patch.object(planner, "refine_plan") as mock_refine,
+    ):
+        events = await collect_events(planner.plan_trip_stream_async(prefs))
+
+    result = events[-1]
+    assert result.valid is True
+    assert result.cost_breakdown.total <= 500
+    assert mock_refine.call_count == 0
+    assert any(
+        isinstance(event, str) and event.startswith("Budget rebalanced locally")
+        for event in events
+    )
+    assert planner.rebalance_stats.rebalanced == 1
+
+
+@pytest.mark.asyncio
+async def test_all_violations_are_sent_in_a_single_refinement(planner):
+    initial = Itinerary(
+        city="Lisbon",
+        cost_breakdown=CostBreakdown(transport=300, stay=300, food=100, activities=50),
+        days=[
+            DayPlan(
+                day_number=1,
+                activities=[Activity(name="Dinner", description="Meal", cost=50)],
+            ),
+            DayPlan(day_number=2, activities=[]),
+        ],
+    )
+    refined = Itinerary(
+        city="Lisbon",
+        cost_breakdown=CostBreakdown(transport=60, stay=200, food=90, activities=40),
+        days=[
+            DayPlan(
+                day_number=day,
+                activities=[Activity(name=f"Walk {day}", description="Walk", cost=40 / 3)],
+            )
+            for day in (1, 2, 3)
+        ],
+    )
+    prefs = Preferences(city="Lisbon", budget=500, days=3, interests=["Food"])
+
+    with (
+        patch.object(planner, "generate_initial_plan", return_value=initial),
+        patch.object(planner, "refine_plan", return_value=refined) as mock_refine,
+    ):
+        events = await collect_events(planner.plan_trip_stream_async(prefs))
+
+    assert events[-1].valid is True
+    assert mock_refine.call_count == 1
+    violations = mock_refine.call_args.kwargs["violations"]
+    assert {violation.code.value for violation in violations} == {
+        "day_count",
+        "empty_day",
+        "over_budget",
+        "activity_over_budget",
+    }
+    assert sum(1 for event in events if str(event).startswith("Constraint Violation")) == 4
+
+
+@pytest.mark.asyncio
+async def test_over_budget_plan_is_refined_to_valid_itinerary(planner):
     initial = Itinerary(
         city="Lisbon",
         cost_breakdown=CostBreakdown(
@@ -832,10 +1218,51 @@ def test_over_budget_plan_is_refined_to_valid_itinerary(planner):
         patch.object(planner, "generate_initial_plan", return_value=initial),
         patch.object(planner, "refine_plan", return_value=refined) as mock_refine,
     ):
-        events = list(planner.plan_trip_stream(prefs))
+        events = await collect_events(planner.plan_trip_stream_async(prefs))
 
     result = events[-1]
     assert isinstance(result, Itinerary)
     assert mock_refine.call_count == 1
     assert result.valid is True
     assert result.cost_breakdown.total == 400
+
+
+@pytest.mark.asyncio
+async def test_images_are_only_resolved_for_the_accepted_itinerary(planner):
+    def plan_response(activity_names):
+        response = MagicMock()
+        response.output_text = json.dumps(
+            {
+                "city": "Porto",
+                "cost_breakdown": {"transport": 50, "stay": 100, "food": 50},
+                "days": [
+                    {
+                        "day_number": number,
+                        "activities": [
+                            {"name": name, "cost": 10, "image_url": f"{name} photo"}
+                        ],
+                    }
+                    for number, name in enumerate(activity_names, start=1)
+                ],
+            }
+        )
+        return response
+
+    planner.client.responses.create.side_effect = [
+        plan_response(["Draft tram ride"]),
+        plan_response(["Ribeira walk", "Port cellar tour"]),
+    ]
+    queries = []
+    planner.image_search = lambda query: queries.append(query) or None
+    prefs = Preferences(city="Porto", budget=500, days=2, interests=["Food"])
+
+    itinerary = await planner.plan_trip_async(prefs)
+
+    assert itinerary.valid is True
+    assert planner.client.responses.create.call_count == 2
+    assert sorted(queries) == ["Port cellar tour photo", "Ribeira walk photo"]
+    assert all(
+        activity.image_url.startswith("https://")
+        for day in itinerary.days
+        for activity in day.activities
+    )
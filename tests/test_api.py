@@ -6,11 +6,21 @@ from unittest.mock import patch
 from fastapi.testclient import TestClient
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fast_api_server
+from app.services.artifacts import ArtifactCache
 from fast_api_server import agent, app
 
 client = TestClient(app)
 
 
+def stream_of(*events):
+    async def generator(prefs, **kwargs):
+        for event in events:
+            yield event
+
+    return generator
+
+
 def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
@@ -19,7 +29,7 @@ def test_health_check():
 
 def test_plan_endpoint_success():
     """Verifies POST /plan returns a valid itinerary."""
-    with patch.object(agent, "plan_trip") as mock_plan:
+    with patch.object(agent, "plan_trip_stream_async") as mock_plan:
         from app.models.domain import (
             CostBreakdown,
             DestinationSuggestion,
@@ -54,7 +64,7 @@ def test_plan_endpoint_success():
         )
         real_itinerary.total_cost = 100.0
 
-        mock_plan.return_value = real_itinerary
+        mock_plan.side_effect = stream_of("Planning", real_itinerary)
 
         response = client.post(
             "/plan",
@@ -82,8 +92,8 @@ def test_plan_endpoint_success():
 def test_plan_endpoint_allows_city_omitted_with_vibe():
     from app.models.domain import CostBreakdown, Itinerary
 
-    with patch.object(agent, "plan_trip") as mock_plan:
-        mock_plan.return_value = Itinerary(
+    with patch.object(agent, "plan_trip_stream_async") as mock_plan:
+        itinerary = Itinerary(
             city="Lisbon",
             recommended_destination="Lisbon",
             vibe_rationale="Coastal cafe pace with art streets.",
@@ -98,6 +108,7 @@ def test_plan_endpoint_allows_city_omitted_with_vibe():
             days=[],
             valid=True,
         )
+        mock_plan.side_effect = stream_of(itinerary)
 
         response = client.post(
             "/plan",
@@ -120,14 +131,15 @@ def test_plan_endpoint_allows_city_omitted_with_vibe():
 def test_plan_endpoint_accepts_local_budget_only():
     from app.models.domain import CostBreakdown, Itinerary
 
-    with patch.object(agent, "plan_trip") as mock_plan:
-        mock_plan.return_value = Itinerary(
+    with patch.object(agent, "plan_trip_stream_async") as mock_plan:
+        itinerary = Itinerary(
             city="Tokyo",
             recommended_destination="Tokyo",
             cost_breakdown=CostBreakdown(total=450, remaining_budget=50),
             days=[],
             valid=True,
         )
+        mock_plan.side_effect = stream_of(itinerary)
 
         response = client.post(
             "/plan",
@@ -179,7 +191,7 @@ def test_plan_endpoint_rejects_missing_budget_amount():
 def test_plan_stream_structure():
     """Verifies POST /plan_stream returns NDJSON events."""
 
-    def mock_generator(prefs):
+    async def mock_generator(prefs, **kwargs):
         yield "Status Update 1"
         from app.models.domain import CostBreakdown, Itinerary
 
@@ -191,7 +203,7 @@ def test_plan_stream_structure():
             valid=True,
         )
 
-    with patch.object(agent, "plan_trip_stream", side_effect=mock_generator):
+    with patch.object(agent, "plan_trip_stream_async", side_effect=mock_generator):
         response = client.post(
             "/plan_stream",
             json={
@@ -216,10 +228,40 @@ def test_plan_stream_structure():
         assert "destination_suggestions" in evt2["data"]
 
 
+def test_plan_stream_emits_day_events_before_result():
+    from app.models.domain import Activity, DayPlan, Itinerary
+
+    day = DayPlan(
+        day_number=1,
+        city="Stream City",
+        activities=[Activity(name="Walk", description="Old town", cost=10)],
+    )
+    itinerary = Itinerary(city="Stream City", days=[day], valid=True)
+    captured = {}
+
+    async def mock_generator(prefs, **kwargs):
+        captured.update(kwargs)
+        yield "Drafting"
+        yield day
+        yield itinerary
+
+    with patch.object(agent, "plan_trip_stream_async", side_effect=mock_generator):
+        response = client.post(
+            "/plan_stream",
+            json={"city": "Stream City", "budget": 500, "days": 1, "interests": []},
+        )
+
+    events = [json.loads(line) for line in response.text.strip().split("\n")]
+    assert [event["type"] for event in events] == ["status", "day", "result"]
+    assert events[1]["data"]["day_number"] == 1
+    assert events[1]["data"]["activities"][0]["name"] == "Walk"
+    assert captured == {"stream_days": True}
+
+
 def test_plan_stream_accepts_work_friendly_request():
     captured = {}
 
-    def mock_generator(prefs):
+    async def mock_generator(prefs, **kwargs):
         captured["prefs"] = prefs
         yield "Status Update 1"
         from app.models.domain import CostBreakdown, Itinerary
@@ -240,7 +282,7 @@ def test_plan_stream_accepts_work_friendly_request():
             valid=True,
         )
 
-    with patch.object(agent, "plan_trip_stream", side_effect=mock_generator):
+    with patch.object(agent, "plan_trip_stream_async", side_effect=mock_generator):
         response = client.post(
             "/plan_stream",
             json={
@@ -266,7 +308,7 @@ def test_api_error_handling():
     from app.core.agent import TravelAgent
 
     with patch.object(
-        TravelAgent, "plan_trip_stream", side_effect=Exception("Wait 429 Error")
+        TravelAgent, "plan_trip_stream_async", side_effect=Exception("Wait 429 Error")
     ):
         response = client.post(
             "/plan_stream",
@@ -286,7 +328,8 @@ def test_api_error_handling():
         assert "High traffic volume" in err_evt["message"]
 
 
-def test_calendar_endpoint_returns_downloadable_ics():
+def test_calendar_endpoint_returns_downloadable_ics(tmp_path, monkeypatch):
+    monkeypatch.setattr(fast_api_server, "artifact_cache", ArtifactCache(tmp_path))
     response = client.post(
         "/calendar?start_date=2026-01-15",
         json={
@@ -316,3 +359,25 @@ def test_calendar_endpoint_returns_downloadable_ics():
     assert response.headers["content-disposition"] == 'attachment; filename="Trip_to_Paris.ics"'
     assert "BEGIN:VCALENDAR" in response.text
     assert "SUMMARY:Eiffel Tower (Paris)" in response.text
+
+
+def test_metrics_are_hidden_unless_enabled():
+    with patch.object(fast_api_server, "metrics_enabled", False):
+        response = client.get("/metrics")
+
+    assert response.status_code == 404
+
+
+def test_metrics_reports_llm_cache_counters():
+    with patch.object(fast_api_server, "metrics_enabled", True):
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    cache_stats = response.json()["llm_cache"]
+    assert {"hits", "misses", "hit_rate", "memory_entries"}.issubset(cache_stats)
+    assert {"local_repairs", "llm_escalations", "rules"}.issubset(
+        response.json()["json_repair"]
+    )
+    assert {"hit_rate", "negative_hits", "errors"}.issubset(
+        response.json()["image_cache"]
+    )
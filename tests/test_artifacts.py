@@ -0,0 +1,114 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import fast_api_server
+from app.models.domain import Activity, DayPlan, Itinerary
+from app.services.artifacts import ArtifactCache, artifact_key, etag_matches
+
+
+def itinerary(cost=25.0):
+    activity = Activity(name="Eiffel Tower", description="Iron lady", cost=cost)
+    return Itinerary(city="Paris", days=[DayPlan(day_number=1, activities=[activity])])
+
+
+def test_artifact_key_is_canonical_and_covers_extras():
+    body = itinerary().model_dump(mode="json")
+    reordered = Itinerary.model_validate(dict(reversed(list(body.items()))))
+
+    assert artifact_key("pdf", itinerary()) == artifact_key("pdf", reordered)
+    assert artifact_key("pdf", itinerary()) != artifact_key("calendar", itinerary())
+    assert artifact_key("pdf", itinerary()) != artifact_key("pdf", itinerary(30))
+    assert artifact_key("calendar", itinerary(), "2026-01-15") != artifact_key(
+        "calendar", itinerary(), "2026-01-16"
+    )
+
+
+def test_etag_matches_lists_and_weak_tags():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"other"', '"abc"')
+
+
+def test_cache_survives_restart_and_evicts_oldest(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=10)
+    cache.put("old", b"12345")
+    os.utime(tmp_path / "old", (1, 1))
+    cache.put("new", b"123456")
+
+    reopened = ArtifactCache(tmp_path, max_bytes=10)
+    assert reopened.get("new") == b"123456"
+    assert reopened.get("old") is None
+    assert cache.stats.evictions == 1
+    assert reopened.snapshot()["hits"] == 1
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(fast_api_server, "artifact_cache", ArtifactCache(tmp_path))
+    return TestClient(fast_api_server.app)
+
+
+def test_calendar_is_served_from_cache_and_revalidated(client):
+    body = itinerary().model_dump(mode="json")
+
+    first = client.post("/calendar?start_date=2026-01-15", json=body)
+    second = client.post("/calendar?start_date=2026-01-15", json=body)
+    revalidated = client.post(
+        "/calendar?start_date=2026-01-15",
+        json=body,
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    other_date = client.post("/calendar?start_date=2026-01-16", json=body)
+
+    assert second.content == first.content
+    assert revalidated.status_code == 304
+    assert not revalidated.content
+    assert other_date.headers["etag"] != first.headers["etag"]
+    stats = fast_api_server.artifact_cache.snapshot()
+    assert (stats["hits"], stats["misses"], stats["not_modified"]) == (1, 2, 1)
+
+
+def test_identical_pdf_requests_render_once(client, monkeypatch):
+    renders = []
+
+    async def fake_render_pdf(itinerary, **kwargs):
+        renders.append(itinerary.city)
+        return b"%PDF-stub"
+
+    monkeypatch.setattr(fast_api_server, "render_pdf", fake_render_pdf)
+    body = itinerary().model_dump(mode="json")
+
+    first = client.post("/pdf", json=body)
+    second = client.post("/pdf", json=body)
+
+    assert first.status_code == second.status_code == 200
+    assert second.content == b"%PDF-stub"
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["content-type"] == "application/pdf"
+    assert renders == ["Paris"]
+
+
+def test_pdf_with_missing_images_is_not_cached(client, monkeypatch):
+    renders = []
+
+    async def fake_render_pdf(itinerary, missing_images, **kwargs):
+        renders.append(itinerary.city)
+        missing_images.append("https://example.com/down.jpg")
+        return b"%PDF-placeholders"
+
+    monkeypatch.setattr(fast_api_server, "render_pdf", fake_render_pdf)
+    body = itinerary().model_dump(mode="json")
+
+    first = client.post("/pdf", json=body)
+    second = client.post("/pdf", json=body)
+
+    assert first.status_code == second.status_code == 200
+    assert "etag" not in first.headers
+    assert first.headers["cache-control"] == "no-store"
+    assert renders == ["Paris", "Paris"]
+    stats = fast_api_server.artifact_cache.snapshot()
+    assert (stats["stores"], stats["incomplete"]) == (0, 2)
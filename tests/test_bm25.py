@@ -0,0 +1,77 @@
+import json
+
+from app.core.bm25 import BM25Index, document_terms, load_or_build, query_terms
+from app.core.destinations import (
+    RELEVANCE_INDEX_PATH,
+    DestinationIndex,
+    _relevance_text,
+    destination_relevance,
+    load_destinations,
+)
+from app.models.domain import Preferences
+
+
+def test_terms_are_whole_words_with_plurals_folded():
+    assert document_terms("Cafés and galleries, the old towns") == [
+        "cafe",
+        "gallery",
+        "old",
+        "town",
+        "old town",
+    ]
+    assert query_terms("Street Food") == ["street food"]
+    assert query_terms("the beaches") == ["beach"]
+    assert "art" not in document_terms("Part of the party")
+
+
+def test_rare_and_repeated_terms_score_higher():
+    index = BM25Index.build(
+        ["quiet beach town", "beach beach beach", "busy city", "city art museums"]
+    )
+
+    scores = index.scores({"beach": 1.0})
+    assert scores[1] > scores[0] > 0
+    assert scores[2] == scores[3] == 0
+    assert index.scores({"art": 1.0})[3] > index.scores({"city": 1.0})[3]
+
+
+def test_index_round_trips_and_stale_files_are_rebuilt(tmp_path, caplog):
+    texts = ["quiet beach town", "busy city"]
+    path = tmp_path / "bm25.json"
+    BM25Index.build(texts).save(path)
+
+    loaded = load_or_build(path, texts)
+    assert loaded.to_dict() == json.loads(path.read_text())
+
+    rebuilt = load_or_build(path, texts + ["mountain village"])
+    assert rebuilt.size == 3
+    assert "stale" in caplog.text
+    assert load_or_build(tmp_path / "missing.json", texts).size == 2
+
+
+def test_shipped_index_matches_catalog():
+    texts = [_relevance_text(item) for item in load_destinations()]
+
+    assert json.loads(RELEVANCE_INDEX_PATH.read_text()) == (
+        BM25Index.build(texts).to_dict()
+    )
+    assert destination_relevance().size == len(texts)
+
+
+def test_bm25_scoring_ignores_matches_inside_words():
+    destinations = [
+        {
+            "city": "Alpha",
+            "description": "Part of the party scene",
+            "estimated_cost": 900,
+        },
+        {"city": "Beta", "description": "Street art everywhere", "estimated_cost": 900},
+    ]
+    texts = [_relevance_text(item) for item in destinations]
+    substring = DestinationIndex(destinations)
+    bm25 = DestinationIndex(destinations, relevance=BM25Index.build(texts))
+    prefs = Preferences(budget=1000, days=2, vibe="art")
+
+    assert substring.scores(prefs)[0] == substring.scores(prefs)[1]
+    assert bm25.scores(prefs)[1] > bm25.scores(prefs)[0]
+    assert bm25.tags == [[], ["Art"]]
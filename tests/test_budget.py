@@ -0,0 +1,106 @@
+from app.core.budget import MAX_CATEGORY_CUT, rebalance_itinerary
+from app.models.domain import Activity, CostBreakdown, DayPlan, Itinerary
+
+TARGETS = {"transport": 125, "stay": 175, "food": 100, "activities": 100, "total": 500}
+
+
+def make_itinerary(transport, stay, food, day_activities):
+    days = [
+        DayPlan(
+            day_number=index + 1,
+            activities=[
+                Activity(name=name, description=name, cost=cost, duration_hours=hours)
+                for name, cost, hours in activities
+            ],
+        )
+        for index, activities in enumerate(day_activities)
+    ]
+    activity_total = sum(cost for day in day_activities for _, cost, _ in day)
+    return Itinerary(
+        city="Lisbon",
+        days=days,
+        cost_breakdown=CostBreakdown(
+            transport=transport,
+            stay=stay,
+            food=food,
+            activities=activity_total,
+            total=transport + stay + food + activity_total,
+        ),
+    )
+
+
+def test_categories_over_target_are_trimmed_first():
+    itinerary = make_itinerary(150, 230, 100, [[("Tram", 10, 1)]])
+
+    plan, changes = rebalance_itinerary(itinerary, 450, TARGETS)
+
+    assert plan.cost_breakdown.total <= 450
+    assert plan.cost_breakdown.food == 100
+    assert plan.days[0].activities[0].name == "Tram"
+    assert changes == [
+        "Reduced transport from 150 to 137.5",
+        "Reduced stay from 230 to 202.5",
+    ]
+    assert itinerary.cost_breakdown.stay == 230
+
+
+def test_expensive_optional_activities_are_dropped_before_deep_category_cuts():
+    itinerary = make_itinerary(
+        125,
+        175,
+        100,
+        [
+            [("Fado dinner", 90, 3), ("Tile museum", 10, 2)],
+            [("Sintra day trip", 60, 8), ("Belem walk", 0, 2), ("Pasteis", 5, 0.5)],
+        ],
+    )
+
+    plan, changes = rebalance_itinerary(itinerary, 500, TARGETS)
+
+    names = [[activity.name for activity in day.activities] for day in plan.days]
+    assert names == [["Tile museum"], ["Sintra day trip", "Belem walk", "Pasteis"]]
+    assert changes == ["Dropped Fado dinner on day 1"]
+    assert plan.cost_breakdown.activities == 75
+    assert plan.cost_breakdown.total == 475
+    assert plan.cost_breakdown.remaining_budget == 25
+
+
+def test_catalog_swaps_keep_days_full():
+    itinerary = make_itinerary(
+        125, 175, 100, [[("Seine cruise", 15, 1.5), ("Fancy French Dinner", 150, 2.5)]]
+    )
+    pool = [
+        Activity(
+            name="Montmartre Walking Tour", description="Walk", cost=0, duration_hours=2
+        )
+    ]
+
+    plan, changes = rebalance_itinerary(itinerary, 450, TARGETS, pool)
+
+    assert [activity.name for activity in plan.days[0].activities] == [
+        "Seine cruise",
+        "Montmartre Walking Tour",
+    ]
+    assert changes == [
+        "Swapped Fancy French Dinner for Montmartre Walking Tour on day 1"
+    ]
+
+
+def test_unfixable_budget_returns_none():
+    itinerary = make_itinerary(300, 300, 100, [[("Dinner", 50, 2)]])
+    floor = (300 + 300 + 100) * (1 - MAX_CATEGORY_CUT) + 50
+
+    assert floor > 500
+    assert rebalance_itinerary(itinerary, 500, TARGETS) is None
+
+
+def test_inconsistent_sums_are_rebuilt_without_cuts():
+    itinerary = make_itinerary(100, 150, 80, [[("Tram", 10, 1)]])
+    itinerary.cost_breakdown.activities = 999
+    itinerary.cost_breakdown.total = 12
+
+    plan, changes = rebalance_itinerary(itinerary, 500, TARGETS)
+
+    assert changes == []
+    assert plan.cost_breakdown.activities == 10
+    assert plan.cost_breakdown.total == 340
@@ -0,0 +1,114 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.core.cache import MemoryCache, SQLiteCache, TieredCache, cache_from_env
+
+
+def test_memory_tier_evicts_least_recently_used_entry():
+    cache = TieredCache(60, memory=MemoryCache(max_entries=2))
+
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats.evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = TieredCache(10)
+
+    with patch("app.core.cache.time.time", return_value=1000.0):
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+    with patch("app.core.cache.time.time", return_value=1011.0):
+        assert cache.get("key") is None
+
+
+def test_per_entry_ttl_overrides_default():
+    cache = TieredCache(3600)
+
+    with patch("app.core.cache.time.time", return_value=1000.0):
+        cache.set("short", "", ttl_seconds=5)
+        assert cache.get("short") == ""
+
+    with patch("app.core.cache.time.time", return_value=1006.0):
+        assert cache.get("short") is None
+
+
+def test_disk_tier_survives_new_process_and_warms_memory(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    first = TieredCache(60, disk=SQLiteCache(path, "test"))
+    first.set("key", "value")
+
+    second = TieredCache(60, disk=SQLiteCache(path, "test"))
+
+    assert second.get("key") == "value"
+    assert second.stats.disk_hits == 1
+    assert second.get("key") == "value"
+    assert second.stats.memory_hits == 1
+
+
+def test_disk_tier_is_size_bounded_and_namespaced(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    disk = SQLiteCache(path, "bounded", max_entries=2)
+    other = SQLiteCache(path, "other")
+    cache = TieredCache(60, memory=MemoryCache(max_entries=1), disk=disk)
+    other.set("a", "untouched", expires_at=9e12, now=0)
+
+    with patch("app.core.cache.time.time", side_effect=[1.0, 2.0, 3.0]):
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.set("c", "3")
+
+    assert len(disk) == 2
+    assert disk.get("a", now=4.0) is None
+    assert other.get("a", now=4.0) == ("untouched", 9e12)
+
+
+@pytest.mark.asyncio
+async def test_async_access_runs_the_disk_tier_off_the_event_loop(tmp_path):
+    disk = SQLiteCache(tmp_path / "cache.sqlite3", "async")
+    cache = TieredCache(60, disk=disk)
+    threads = []
+    disk_set = disk.set
+
+    def recording_set(*args):
+        threads.append(threading.current_thread())
+        return disk_set(*args)
+
+    disk.set = recording_set
+    await cache.set_async("key", "value")
+    cache.memory.clear()
+
+    assert await cache.get_first_async(["missing", "key"]) == ("key", "value")
+    assert cache.stats.disk_hits == 1
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_get_first_counts_one_lookup():
+    cache = TieredCache(60)
+    cache.set("second", "hit")
+
+    assert cache.get_first(["first", "second"]) == ("second", "hit")
+    assert cache.get_first(["missing", "also-missing"]) is None
+    assert cache.snapshot()["hits"] == 1
+    assert cache.snapshot()["misses"] == 1
+    assert cache.snapshot()["hit_rate"] == 0.5
+
+
+def test_cache_from_env_enables_disk_and_zero_ttl_disables(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEST_CACHE_PATH", str(tmp_path / "env.sqlite3"))
+    cache = cache_from_env("TEST", "env", default_ttl_seconds=60)
+    assert cache.disk is not None
+
+    monkeypatch.setenv("TEST_CACHE_TTL_SECONDS", "0")
+    disabled = cache_from_env("TEST", "env", default_ttl_seconds=60)
+    disabled.set("key", "value")
+    assert disabled.get("key") is None
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.core.coalesce import PlanCoalescer, preferences_key
+from app.models.domain import Itinerary, Preferences
+
+
+class SlowAgent:
+    def __init__(self, delay: float = 0.05, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+        self.runs = 0
+        self.stream_days = []
+
+    async def plan_trip_stream_async(self, preferences, *, stream_days=False):
+        self.runs += 1
+        self.stream_days.append(stream_days)
+        yield f"Planning {preferences.city}"
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        yield "Finalizing"
+        yield Itinerary(city=preferences.city or "Unknown", days=[], valid=True)
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+def test_preferences_key_ignores_case_spacing_and_interest_order():
+    first = Preferences(
+        city=" Lisbon ", budget=800, days=3, interests=["Food", "art"], vibe="Quiet  cafes"
+    )
+    second = Preferences(
+        city="lisbon", budget=800, days=3, interests=["Art", "food"], vibe="quiet cafes"
+    )
+    different = Preferences(city="Lisbon", budget=900, days=3, interests=["Food"])
+
+    assert preferences_key(first) == preferences_key(second)
+    assert preferences_key(first) != preferences_key(different)
+
+
+def test_usd_and_local_budget_requests_are_not_coalesced():
+    usd = Preferences(city="Tokyo", budget=5000, days=2)
+    local = Preferences(city="Tokyo", local_budget=5000, days=2)
+
+    assert preferences_key(usd) != preferences_key(local)
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_run():
+    agent = SlowAgent()
+    coalescer = PlanCoalescer(agent)
+    prefs = Preferences(city="Lisbon", budget=800, days=3, interests=["Food"])
+
+    leader = asyncio.create_task(collect(coalescer.stream(prefs)))
+    await asyncio.sleep(0.01)
+    followers = [
+        asyncio.create_task(collect(coalescer.stream(prefs))) for _ in range(4)
+    ]
+    results = await asyncio.gather(leader, *followers)
+
+    assert agent.runs == 1
+    assert coalescer.snapshot() == {"in_flight": 0, "leaders": 1, "followers": 4}
+    for events in results:
+        assert events[:2] == ["Planning Lisbon", "Finalizing"]
+        assert isinstance(events[-1], Itinerary)
+    itineraries = [events[-1] for events in results]
+    assert len({id(itinerary) for itinerary in itineraries}) == len(itineraries)
+
+
+@pytest.mark.asyncio
+async def test_different_preferences_and_later_requests_run_separately():
+    agent = SlowAgent(delay=0.01)
+    coalescer = PlanCoalescer(agent)
+
+    await asyncio.gather(
+        coalescer.plan(Preferences(city="Lisbon", budget=800, days=3)),
+        coalescer.plan(Preferences(city="Porto", budget=800, days=3)),
+    )
+    await coalescer.plan(Preferences(city="Lisbon", budget=800, days=3))
+
+    assert agent.runs == 3
+
+
+@pytest.mark.asyncio
+async def test_leader_failure_is_fanned_out_to_every_waiter():
+    agent = SlowAgent(error=RuntimeError("429 quota"))
+    coalescer = PlanCoalescer(agent)
+    prefs = Preferences(city="Lisbon", budget=800, days=3)
+
+    results = await asyncio.gather(
+        coalescer.plan(prefs), coalescer.plan(prefs), return_exceptions=True
+    )
+
+    assert agent.runs == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert coalescer.snapshot()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_plan_requests_skip_day_streaming_but_join_streamed_runs():
+    agent = SlowAgent(delay=0.02)
+    coalescer = PlanCoalescer(agent)
+    prefs = Preferences(city="Lisbon", budget=800, days=3)
+
+    await coalescer.plan(prefs)
+    streamed = asyncio.create_task(collect(coalescer.stream(prefs)))
+    await asyncio.sleep(0.005)
+    await asyncio.gather(streamed, coalescer.plan(prefs))
+
+    assert agent.stream_days == [False, True]
+    assert coalescer.snapshot()["followers"] == 1
@@ -0,0 +1,150 @@
+import pytest
+
+from app.core.destination_lookup import DestinationLookup, normalize_place
+from app.core.destinations import (
+    recommend_destinations,
+    requested_destination_terms,
+    requested_route_city_terms,
+)
+from app.core.validation import covers_requested_destinations
+from app.models.domain import DayPlan, Itinerary, Preferences
+
+CATALOG = [
+    {"city": "New York City", "country": "USA"},
+    {"city": "Kraków", "country": "Poland"},
+    {"city": "Mexico City", "country": "Mexico"},
+    {"city": "Cancun", "country": "Mexico"},
+    {"city": "Singapore", "country": "Singapore"},
+]
+
+
+def test_normalize_place_folds_case_accents_and_punctuation():
+    assert normalize_place("  Kraków ") == "krakow"
+    assert normalize_place("Chiang-Mai") == "chiang mai"
+    assert normalize_place("Cortina d'Ampezzo") == "cortina d ampezzo"
+
+
+def test_lookup_recognizes_cities_countries_and_aliases():
+    lookup = DestinationLookup(CATALOG)
+
+    assert lookup.is_city("krakow") and lookup.is_city("Cracow")
+    assert lookup.is_city("NYC") and lookup.canonical("new york") == "new york city"
+    assert lookup.is_country("usa") and lookup.is_country("United States of America")
+    assert lookup.is_city("Singapore") and lookup.is_country("Singapore")
+    assert lookup.canonical("Rotterdam") is None
+
+
+def test_lookup_finds_multi_word_names_in_text():
+    lookup = DestinationLookup(CATALOG)
+
+    assert lookup.names_in("Two nights in Mexico City, then NYC") == [
+        "mexico city",
+        "new york city",
+    ]
+    assert lookup.positions["mexico"] == (2, 3)
+    assert lookup.positions["mexico city"] == (2,)
+
+
+def test_mentions_accepts_other_spellings_as_whole_words():
+    lookup = DestinationLookup(CATALOG)
+
+    assert lookup.mentions("New York City", "NYC")
+    assert lookup.mentions("Krakow Old Town", "Kraków")
+    assert not lookup.mentions("Brussels", "United States of America")
+
+
+def test_catalog_helpers_use_aliases():
+    assert requested_destination_terms("Amsterdam, Rott") == ["Amsterdam"]
+    assert requested_route_city_terms("NYC, Holland") == ["NYC"]
+    assert (
+        recommend_destinations(Preferences(city="Bombay", budget=1000, days=3))[0].city
+        == "Mumbai"
+    )
+
+    itinerary = Itinerary(
+        city="New York City",
+        days=[DayPlan(day_number=1, city="New York City", activities=[])],
+    )
+    assert covers_requested_destinations(itinerary, "NYC")
+
+
+def test_fuzzy_lookup_ranks_close_spellings():
+    lookup = DestinationLookup(
+        CATALOG + [{"city": "Lisbon", "country": "Portugal"}, {"city": "Kyoto"}]
+    )
+
+    assert lookup.fuzzy("Lisbn") == [("lisbon", pytest.approx(5 / 6))]
+    assert lookup.fuzzy("Kyotto")[0][0] == "kyoto"
+    assert lookup.fuzzy("Sinagpore")[0][0] == "singapore"
+    assert lookup.fuzzy("New Yrok") == [("new york city", pytest.approx(0.875))]
+    assert lookup.fuzzy("Portland") == []
+    assert lookup.fuzzy("Lisb") == []
+
+
+def test_resolve_corrects_clear_typos_but_not_nearby_places():
+    lookup = DestinationLookup(
+        CATALOG
+        + [{"city": "Chiang Mai"}, {"city": "Paris"}, {"city": "Dubai"}]
+        + [{"city": "Lisbon"}, {"city": "Kyoto"}]
+    )
+
+    assert lookup.resolve("New York Ctiy") == "new york city"
+    assert lookup.resolve("Krakw") == "krakow"
+    assert lookup.resolve("Lisbn") == "lisbon"
+    assert lookup.resolve("Kyotto") == "kyoto"
+    assert lookup.resolve("Dubia") == "dubai"
+    assert lookup.resolve("Paros") is None
+    assert lookup.resolve("Chiang Rai") is None
+    assert lookup.resolve("Portland") is None
+
+
+def itinerary_in(city):
+    return Itinerary(city=city, days=[DayPlan(day_number=1, city=city, activities=[])])
+
+
+@pytest.mark.parametrize(
+    ("requested", "neighbour"), [("Paros", "Paris"), ("Chiang Rai", "Chiang Mai")]
+)
+def test_places_near_a_catalog_name_keep_the_users_spelling(requested, neighbour):
+    assert requested_destination_terms(requested) == [requested]
+    assert requested_route_city_terms(f"Athens, {requested}") == ["Athens", requested]
+    assert covers_requested_destinations(itinerary_in(requested), requested)
+    assert not covers_requested_destinations(itinerary_in(neighbour), requested)
+
+    suggestions = recommend_destinations(
+        Preferences(city=requested, budget=1500, days=4)
+    )
+    assert neighbour not in [item.city for item in suggestions]
+
+
+def test_clear_typos_still_find_catalog_destinations():
+    assert requested_destination_terms("Rotterdam, Amsterdm") == [
+        "Rotterdam",
+        "Amsterdm",
+    ]
+    assert covers_requested_destinations(
+        itinerary_in("Playa del Carmen"), "Playa del Carmne"
+    )
+    suggestion = recommend_destinations(
+        Preferences(city="Playa del Carmne", budget=2000, days=3)
+    )
+    assert [item.city for item in suggestion] == ["Playa del Carmen"]
+
+
+@pytest.mark.parametrize(
+    ("requested", "city"),
+    [
+        ("Lisbn", "Lisbon"),
+        ("Kyotto", "Kyoto"),
+        ("Amsterdm", "Amsterdam"),
+        ("Barcelna", "Barcelona"),
+        ("Pragu", "Prague"),
+    ],
+)
+def test_short_single_edit_typos_find_catalog_destinations(requested, city):
+    suggestions = recommend_destinations(
+        Preferences(city=requested, budget=2000, days=3)
+    )
+
+    assert city in [item.city for item in suggestions]
+    assert covers_requested_destinations(itinerary_in(city), requested)
@@ -1,9 +1,16 @@
+import pytest
+
 from app.core.destinations import (
+    DestinationIndex,
+    DestinationMatrix,
+    destination_relevance,
+    load_destinations,
     recommend_destinations,
     requested_destination_terms,
     requested_route_city_terms,
 )
 from app.models.domain import Preferences
+from tests.reference_scoring import reference_score, reference_top
 
 
 def test_vibe_and_interests_select_expected_destinations():
@@ -133,3 +140,93 @@ def test_recommendation_count_is_capped_to_three():
     )
 
     assert len(recommend_destinations(prefs)) == 3
+
+
+@pytest.mark.parametrize(
+    "prefs",
+    [
+        Preferences(budget=1500, days=3, interests=["Food", "Art"], vibe="ancient"),
+        Preferences(budget=700, days=3, interests=["🎶 Nightlife"], vibe="bars bars"),
+        Preferences(budget=800, days=3, vibe="quiet digital cafes", work_friendly=True),
+        Preferences(city="Lisbon", budget=2000, days=5, interests=["History"]),
+        Preferences(budget=300, days=2, interests=["Nature", "nature"], vibe=""),
+    ],
+)
+def test_destination_index_scores_match_reference_scoring(prefs):
+    destinations = load_destinations()
+    index = DestinationIndex(destinations)
+
+    assert index.scores(prefs) == [
+        reference_score(item, prefs) for item in destinations
+    ]
+    assert index.top(prefs, 5) == reference_top(destinations, prefs, 5)
+
+
+def test_destination_index_hits_list_each_destination_once():
+    index = DestinationIndex(
+        [
+            {"city": "Alpha", "rationale": "cafe after cafe"},
+            {"city": "Beta"},
+            {"city": "Gamma", "description": "Coffee and cafes"},
+        ]
+    )
+
+    assert index.hits("cafe") == (0, 2)
+    assert index.hits("a") == (0, 1, 2)
+    assert index.hits("zzz") == ()
+    assert index.tags == [["Cafes", "Food"], [], ["Cafes", "Food"]]
+
+
+def test_bm25_destination_index_skips_the_substring_corpus():
+    index = DestinationIndex(load_destinations(), relevance=destination_relevance())
+
+    assert index._corpus == "" and index._starts == []
+    assert index.hits("cafes") == index.hits("cafe")
+    assert index.hits("art") == tuple(
+        sorted(set(destination_relevance().postings("art")[0]))
+    )
+
+
+MATRIX_PREFERENCES = [
+    Preferences(budget=1500, days=3, interests=["Food", "Art"], vibe="ancient"),
+    Preferences(budget=700, days=3, interests=["Nightlife"], vibe="music bars city"),
+    Preferences(budget=800, days=3, vibe="quiet digital cafes", work_friendly=True),
+    Preferences(city="Lisbon", budget=2000, days=5, interests=["History"]),
+    Preferences(budget=400, days=2, interests=["Nature"], vibe="turquoise reef"),
+]
+
+
+@pytest.mark.parametrize("prefs", MATRIX_PREFERENCES)
+def test_destination_matrix_matches_reference_scoring(prefs):
+    np = pytest.importorskip("numpy")
+    destinations = load_destinations()
+    index = DestinationIndex(destinations)
+    matrix = DestinationMatrix(index)
+
+    scores = matrix.scores(prefs)
+
+    assert isinstance(scores, np.ndarray)
+    assert scores.tolist() == [reference_score(item, prefs) for item in destinations]
+    assert matrix.top(prefs, 5) == index.top(prefs, 5)
+
+
+def test_destination_matrix_breaks_ties_in_catalog_order():
+    pytest.importorskip("numpy")
+    destinations = [
+        {"city": f"Town {position}", "estimated_cost": 500} for position in range(6)
+    ]
+    prefs = Preferences(budget=1000, days=2)
+    matrix = DestinationMatrix(DestinationIndex(destinations))
+
+    assert matrix.top(prefs, 3) == [0, 1, 2]
+    assert matrix.top(prefs, 10) == [0, 1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("prefs", MATRIX_PREFERENCES)
+def test_destination_matrix_matches_bm25_scoring(prefs):
+    pytest.importorskip("numpy")
+    index = DestinationIndex(load_destinations(), relevance=destination_relevance())
+    matrix = DestinationMatrix(index)
+
+    assert matrix.scores(prefs).tolist() == pytest.approx(index.scores(prefs))
+    assert matrix.top(prefs, 5) == index.top(prefs, 5)
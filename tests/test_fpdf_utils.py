@@ -1,9 +1,20 @@
 import pytest
 from unittest.mock import AsyncMock, patch
 from app.models.domain import Itinerary, DayPlan, Activity
-from app.services.pdf import generate_pdf, itinerary_money
+from app.services.image_proxy import PDF_IMAGE_MAX_BYTES, PDF_IMAGE_PX
+from app.services.pdf import (
+    PdfRenderPool,
+    PdfRenderSaturated,
+    generate_pdf,
+    itinerary_money,
+    prepare_pdf_image,
+)
+from PIL import Image
+import asyncio
+import io
 import sys
 import os
+import threading
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -55,13 +66,11 @@ async def test_generate_pdf_mixed_costs():
         total_cost=25.0,  # Only sums numeric
     )
 
-    # Mock aiohttp
-    with patch("aiohttp.ClientSession.get") as mock_get:
-        mock_resp = AsyncMock()
-        mock_resp.status = 200
-        mock_resp.read.return_value = b"fakeimagebytes"
-        mock_get.return_value.__aenter__.return_value = mock_resp
-
+    # Mock the image downloads
+    with patch(
+        "app.services.http.SharedHttpClient.get_bytes",
+        AsyncMock(return_value=b"fakeimagebytes"),
+    ):
         # Run generation
         try:
             response = await generate_pdf(itinerary)
@@ -76,6 +85,121 @@ async def test_generate_pdf_mixed_costs():
             pytest.fail(f"PDF Generation failed: {e}")
 
 
+def jpeg_with_exif(width, height):
+    image = Image.new("RGB", (width, height), (30, 120, 200))
+    exif = Image.Exif()
+    exif[0x010F] = "Camera Maker"
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=95, exif=exif)
+    return output.getvalue()
+
+
+def test_prepare_pdf_image_fits_slot_and_strips_metadata():
+    original = jpeg_with_exif(4000, 2000)
+
+    prepared = prepare_pdf_image(original)
+
+    with Image.open(io.BytesIO(prepared)) as image:
+        assert image.format == "JPEG"
+        assert image.size == PDF_IMAGE_PX
+        assert not image.getexif()
+    assert len(prepared) <= PDF_IMAGE_MAX_BYTES
+    assert prepare_pdf_image(original) is prepared
+
+
+def test_prepare_pdf_image_keeps_bytes_pillow_cannot_read():
+    svg = b"<svg xmlns='http://www.w3.org/2000/svg'></svg>"
+
+    assert prepare_pdf_image(svg) == svg
+
+
+def small_itinerary():
+    activity = Activity(name="Harbour walk", description="Along the quay", cost=0)
+    return Itinerary(
+        city="Lisbon", days=[DayPlan(day_number=1, activities=[activity])]
+    )
+
+
+@pytest.mark.asyncio
+async def test_render_pool_builds_pdf_in_worker_process():
+    pool = PdfRenderPool(max_workers=1, max_queue=0)
+    try:
+        pdf_bytes = await pool.render(small_itinerary(), {})
+    finally:
+        pool.shutdown()
+
+    assert pdf_bytes.startswith(b"%PDF")
+    assert pool.snapshot()["rendered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_render_pool_replaces_a_pool_broken_by_a_dead_worker():
+    pool = PdfRenderPool(max_workers=1, max_queue=0)
+    try:
+        await pool.render(small_itinerary(), {})
+        broken = pool.executor()
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+
+        pdf_bytes = await pool.render(small_itinerary(), {})
+
+        assert pdf_bytes.startswith(b"%PDF")
+        assert pool.executor() is not broken
+    finally:
+        pool.shutdown()
+
+    assert pool.snapshot()["restarts"] == 1
+    assert pool.snapshot()["failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_render_pool_rejects_work_beyond_its_queue():
+    release = threading.Event()
+
+    def slow_renderer(spec):
+        release.wait(5)
+        return b"%PDF-stub"
+
+    pool = PdfRenderPool(
+        max_workers=1, max_queue=1, use_processes=False, renderer=slow_renderer
+    )
+    itinerary = small_itinerary()
+    running = [asyncio.create_task(pool.render(itinerary, {})) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(PdfRenderSaturated) as excinfo:
+        await generate_pdf(itinerary, render_pool=pool)
+    assert excinfo.value.retry_after_seconds >= 1
+
+    release.set()
+    assert await asyncio.gather(*running) == [b"%PDF-stub", b"%PDF-stub"]
+    pool.shutdown()
+    assert pool.snapshot()["rejected"] == 1
+    assert pool.snapshot()["pending"] == 0
+
+
+def test_pdf_endpoint_returns_503_with_retry_after_when_saturated(
+    tmp_path, monkeypatch
+):
+    from fastapi.testclient import TestClient
+
+    import fast_api_server
+    from app.services.artifacts import ArtifactCache
+
+    pool = PdfRenderPool(max_workers=1, max_queue=0, use_processes=False)
+    pool.pending = 1
+    monkeypatch.setattr(fast_api_server, "pdf_render_pool", pool)
+    monkeypatch.setattr(fast_api_server, "artifact_cache", ArtifactCache(tmp_path))
+
+    response = TestClient(fast_api_server.app).post(
+        "/pdf", json=small_itinerary().model_dump(mode="json")
+    )
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+
 if __name__ == "__main__":
     # Allow running directly
     import asyncio
@@ -206,7 +206,7 @@ class TestFuzzyParser(unittest.TestCase):
 
         assert itinerary.days[0].city == "Rotterdam"
         assert itinerary.days[1].city == "Amsterdam"
-        assert image_queries == ["Markthal Rotterdam", "Canal walk Amsterdam"]
+        assert sorted(image_queries) == ["Canal walk Amsterdam", "Markthal Rotterdam"]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from app.services.http import ByteLRU, HttpFetchError, SharedHttpClient
+
+
+def test_byte_lru_evicts_by_total_size():
+    cache = ByteLRU(max_bytes=10)
+
+    cache.set("a", b"1234")
+    cache.set("b", b"5678")
+    assert cache.get("a") == b"1234"
+    cache.set("c", b"90ab")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    assert cache.size_bytes == 8
+    assert cache.stats.evictions == 1
+
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None
+
+
+@pytest_asyncio.fixture
+async def image_server():
+    async def small(request):
+        return web.Response(body=b"x" * 100)
+
+    app = web.Application()
+    app.router.add_get("/small", small)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_shared_client_reuses_one_session(image_server):
+    client = SharedHttpClient(limit_per_host=2)
+    try:
+        first = await client.get_bytes(image_server + "/small")
+        session = client.session()
+        second = await client.get_bytes(image_server + "/small")
+
+        assert first == second == b"x" * 100
+        assert client.session() is session
+        assert session.connector.limit_per_host == 2
+
+        with pytest.raises(HttpFetchError):
+            await client.get_bytes(image_server + "/small", max_bytes=50)
+        with pytest.raises(HttpFetchError):
+            await client.get_bytes(image_server + "/missing")
+    finally:
+        await client.close()
+
+    assert session.closed
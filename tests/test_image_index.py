@@ -0,0 +1,113 @@
+from app.core.image_index import ImageIndex, default_image_index
+from app.core.images import resolve_itinerary_images
+from app.models.domain import Activity, DayPlan, Itinerary
+
+DESTINATIONS = [
+    {
+        "city": "Prague",
+        "image_key": "Prague Charles Bridge sunrise",
+        "image_urls": ["https://example.com/charles-bridge.jpg"],
+    },
+    {
+        "city": "Rome",
+        "image_key": "Colosseum Rome sunny day aerial view",
+        "image_urls": ["https://example.com/colosseum.jpg"],
+    },
+]
+
+
+def test_curated_landmarks_match_on_name_and_city():
+    index = ImageIndex.from_sources(DESTINATIONS)
+
+    assert index.lookup("Charles Bridges at dawn", "Prague") == (
+        "https://example.com/charles-bridge.jpg"
+    )
+    assert index.lookup("Colosseum guided tour Rome") == (
+        "https://example.com/colosseum.jpg"
+    )
+    assert index.lookup("Charles Bridge replica", "Las Vegas") is None
+    assert index.lookup("Dinner in Trastevere", "Rome") is None
+    assert index.snapshot()["hits"] == 2
+    assert index.snapshot()["misses"] == 2
+
+
+def test_generic_scenery_words_do_not_match_a_landmark():
+    index = ImageIndex.from_sources(
+        [
+            {
+                "city": "Cusco",
+                "image_key": "Cusco cityscape Andes mountains",
+                "image_urls": ["https://example.com/cusco.jpg"],
+            },
+            {
+                "city": "Pattaya",
+                "image_key": "Pattaya beach cityscape sunset",
+                "image_urls": ["https://example.com/pattaya.jpg"],
+            },
+        ]
+    )
+
+    assert index.lookup("Mountain biking Cusco", "Cusco") is None
+    assert index.lookup("Hotel check-in Pattaya beach road", "Pattaya") is None
+    assert index.lookup("Sunset beaches walk", "Pattaya") is None
+    assert (
+        index.lookup("Andes day hike Cusco", "Cusco") == "https://example.com/cusco.jpg"
+    )
+    assert len(index.entries) == 1
+
+
+def test_default_index_ignores_generic_activities():
+    index = default_image_index()
+
+    assert index.lookup("Mountain biking Cusco", "Cusco") is None
+    assert index.lookup("Hotel check-in Pattaya beach road", "Pattaya") is None
+    assert index.lookup("Street food tour Hanoi", "Hanoi") is None
+    assert index.lookup("Seven Mile Beach sunset", "Negril") is not None
+
+
+def test_learned_entries_without_city_need_every_token():
+    index = ImageIndex.from_sources(
+        [],
+        [{"query": "gelato tasting", "city": None, "url": "https://example.com/g.jpg"}],
+    )
+
+    assert index.lookup("Gelato tasting Florence") == "https://example.com/g.jpg"
+    assert index.lookup("Gelato shop") is None
+
+
+def test_indexed_activities_skip_the_live_search():
+    itinerary = Itinerary(
+        city="Prague",
+        days=[
+            DayPlan(
+                day_number=1,
+                activities=[
+                    Activity(name="Charles Bridge Walk", description="Walk", cost=0),
+                    Activity(name="Beer hall dinner", description="Dinner", cost=20),
+                ],
+            )
+        ],
+    )
+    queries = []
+
+    def fake_image_search(query):
+        queries.append(query)
+
+    searches = resolve_itinerary_images(
+        itinerary,
+        fake_image_search,
+        image_index=ImageIndex.from_sources(DESTINATIONS),
+    )
+
+    assert searches == 1
+    assert queries == ["Beer hall dinner Prague"]
+    assert itinerary.days[0].activities[0].image_url == (
+        "https://example.com/charles-bridge.jpg"
+    )
+
+
+def test_default_index_is_seeded_from_destinations():
+    index = default_image_index()
+
+    assert len(index.entries) >= 85
+    assert index.lookup("Charles Bridge", "Prague") is not None
@@ -0,0 +1,353 @@
+import asyncio
+import io
+import os
+import shutil
+import socket
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import fast_api_server
+from app.models.domain import Activity, DayPlan, Itinerary
+from app.services import pdf as pdf_module
+from app.services.http import SharedHttpClient
+from app.services.image_proxy import (
+    PDF_IMAGE_PX,
+    ImageDiskCache,
+    ImageProxy,
+    ImageProxyError,
+    proxied_image_path,
+)
+from app.services.pdf import generate_pdf
+
+
+def png_bytes(width=2000, height=1500, color=(200, 40, 40)):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(output, "PNG")
+    return output.getvalue()
+
+
+class FakeUpstream:
+    def __init__(self, data: bytes, delay: float = 0.0):
+        self.data = data
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, url: str) -> bytes:
+        self.calls.append(url)
+        await asyncio.sleep(self.delay)
+        return self.data
+
+
+class LoopbackResolver(AbstractResolver):
+    """Resolves every host name to 127.0.0.1, like a hostile DNS record."""
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        return [
+            {
+                "hostname": host,
+                "host": "127.0.0.1",
+                "port": port,
+                "family": socket.AF_INET,
+                "proto": 0,
+                "flags": socket.AI_NUMERICHOST,
+            }
+        ]
+
+    async def close(self):
+        pass
+
+
+@pytest_asyncio.fixture
+async def upstream_server():
+    requested = []
+
+    async def photo(request):
+        requested.append(request.path)
+        return web.Response(body=png_bytes(40, 30), content_type="image/png")
+
+    async def redirect(request):
+        requested.append(request.path)
+        raise web.HTTPFound(request.query["to"])
+
+    app = web.Application()
+    app.router.add_get("/photo.png", photo)
+    app.router.add_get("/redirect", redirect)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://images.example:{port}", requested
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_variants_are_resized_and_served_from_disk(tmp_path):
+    upstream = FakeUpstream(png_bytes())
+    proxy = ImageProxy(ImageDiskCache(tmp_path), fetcher=upstream)
+
+    card = await proxy.get("https://example.com/big.png", "card")
+    pdf = await proxy.get("https://example.com/big.png", "pdf")
+    original = await proxy.get("https://example.com/big.png", "original")
+
+    with Image.open(io.BytesIO(card.content)) as image:
+        assert image.format == "JPEG"
+        assert image.size == (800, 600)
+    with Image.open(io.BytesIO(pdf.content)) as image:
+        assert image.size == PDF_IMAGE_PX
+    assert original.media_type == "image/png"
+    assert upstream.calls == ["https://example.com/big.png"]
+
+    # A new process reuses the files on disk.
+    restarted = ImageProxy(ImageDiskCache(tmp_path), fetcher=upstream)
+    again = await restarted.get("https://example.com/big.png", "card")
+    assert again.content == card.content
+    assert again.etag == card.etag
+    assert upstream.calls == ["https://example.com/big.png"]
+    assert restarted.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_upstream_fetch(tmp_path):
+    upstream = FakeUpstream(png_bytes(), delay=0.05)
+    proxy = ImageProxy(ImageDiskCache(tmp_path), fetcher=upstream)
+
+    images = await asyncio.gather(
+        *(proxy.get("https://example.com/big.png", "card") for _ in range(5))
+    )
+
+    assert len(upstream.calls) == 1
+    assert len({image.content for image in images}) == 1
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_files_are_evicted(tmp_path):
+    sizes = {}
+    for name, color in (("a", (255, 0, 0)), ("b", (0, 255, 0))):
+        sizes[name] = len(png_bytes(color=color))
+    # Room for one image plus the small refs that point at it.
+    cache = ImageDiskCache(tmp_path, max_bytes=max(sizes.values()) + 512)
+    proxy = ImageProxy(cache, fetcher=FakeUpstream(png_bytes(color=(255, 0, 0))))
+
+    await proxy.get("https://example.com/a.png", "original")
+    for path in (tmp_path / "objects").iterdir():
+        os.utime(path, (1, 1))
+    proxy.fetcher = FakeUpstream(png_bytes(color=(0, 255, 0)))
+    await proxy.get("https://example.com/b.png", "original")
+
+    assert cache.get_ref("https://example.com/a.png") is None
+    assert cache.get_ref("https://example.com/b.png") is not None
+    assert proxy.stats.evictions == 1
+    # The ref left pointing at the evicted object is dropped too.
+    assert len(list((tmp_path / "refs").iterdir())) == 1
+
+
+def test_disk_cache_bounds_refs_and_indexes_files_once(tmp_path):
+    cache = ImageDiskCache(tmp_path, max_bytes=1000)
+    digest, _ = cache.put_original("https://example.com/a.png", b"x" * 100, "image/png")
+    for number in range(50):
+        cache.put_original(f"https://example.com/{number}.png", b"x" * 100, "image/png")
+
+    refs = list((tmp_path / "refs").iterdir())
+    assert 0 < len(refs) < 50
+    assert cache.files.size_bytes <= 1000
+    assert cache.files.size_bytes == sum(
+        path.stat().st_size for path in tmp_path.rglob("*") if path.is_file()
+    )
+    assert cache.get_ref("https://example.com/49.png") == (digest, "image/png")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "url",
+    [
+        "file:///etc/passwd",
+        "http://localhost:8000/metrics",
+        "http://127.0.0.1/admin",
+        "http://10.0.0.5/image.png",
+    ],
+)
+async def test_internal_and_non_http_urls_are_rejected(tmp_path, url):
+    proxy = ImageProxy(ImageDiskCache(tmp_path), fetcher=FakeUpstream(png_bytes()))
+
+    with pytest.raises(ImageProxyError) as error:
+        await proxy.get(url, "card")
+
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_redirects_are_followed_only_to_allowed_hosts(tmp_path, upstream_server):
+    base, requested = upstream_server
+    http_client = SharedHttpClient(resolver_factory=LoopbackResolver)
+    proxy = ImageProxy(ImageDiskCache(tmp_path), http_client=http_client)
+    try:
+        image = await proxy.get(f"{base}/redirect?to=/photo.png", "original")
+        assert image.media_type == "image/png"
+        assert requested == ["/redirect", "/photo.png"]
+
+        with pytest.raises(ImageProxyError) as error:
+            await proxy.get(
+                f"{base}/redirect?to=http://169.254.169.254/latest/meta-data/",
+                "original",
+            )
+        assert error.value.status_code == 502
+        assert requested == ["/redirect", "/photo.png", "/redirect"]
+    finally:
+        await http_client.close()
+
+
+@pytest.mark.asyncio
+async def test_host_names_resolving_to_private_addresses_are_not_fetched(
+    tmp_path, upstream_server
+):
+    base, requested = upstream_server
+    http_client = SharedHttpClient(public_only=True, resolver_factory=LoopbackResolver)
+    proxy = ImageProxy(ImageDiskCache(tmp_path), http_client=http_client)
+    try:
+        with pytest.raises(ImageProxyError) as error:
+            await proxy.get(f"{base}/photo.png", "original")
+    finally:
+        await http_client.close()
+
+    assert error.value.status_code == 502
+    assert requested == []
+    assert proxy.stats.upstream_errors == 1
+
+
+def test_img_endpoint_sets_cache_headers_and_honours_etag(tmp_path, monkeypatch):
+    upstream = FakeUpstream(png_bytes())
+    monkeypatch.setattr(
+        fast_api_server,
+        "image_proxy",
+        ImageProxy(ImageDiskCache(tmp_path), fetcher=upstream),
+    )
+    client = TestClient(fast_api_server.app)
+    path = proxied_image_path("https://example.com/big.png", "card")
+
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert "max-age" in response.headers["cache-control"]
+
+    cached = client.get(path, headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    assert client.get(path.replace("card", "poster")).status_code == 400
+    assert len(upstream.calls) == 1
+
+
+def test_img_endpoint_reports_non_image_upstream_as_bad_gateway(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        fast_api_server,
+        "image_proxy",
+        ImageProxy(ImageDiskCache(tmp_path), fetcher=FakeUpstream(b"<html></html>")),
+    )
+    client = TestClient(fast_api_server.app)
+
+    response = client.get(proxied_image_path("https://example.com/page.html"))
+
+    assert response.status_code == 502
+
+
+@pytest.mark.asyncio
+async def test_repeated_pdf_exports_reuse_image_bytes(tmp_path):
+    upstream = FakeUpstream(png_bytes())
+    proxy = ImageProxy(ImageDiskCache(tmp_path), fetcher=upstream)
+    itinerary = Itinerary(
+        city="Lisbon",
+        days=[
+            DayPlan(
+                day_number=day,
+                activities=[
+                    Activity(
+                        name="Tram 28",
+                        description="Ride",
+                        cost=3,
+                        image_url="https://example.com/tram.png",
+                    )
+                ],
+            )
+            for day in (1, 2, 3)
+        ],
+    )
+
+    first = await generate_pdf(itinerary, image_proxy=proxy)
+    shutil.rmtree(tmp_path)
+    second = await generate_pdf(itinerary, image_proxy=proxy)
+
+    assert first.body.startswith(b"%PDF")
+    assert second.body.startswith(b"%PDF")
+    assert upstream.calls == ["https://example.com/tram.png"]
+    assert proxy.memory.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_pdf_exports_embed_the_pdf_variant_without_recompressing(
+    tmp_path, monkeypatch
+):
+    proxy = ImageProxy(ImageDiskCache(tmp_path), fetcher=FakeUpstream(png_bytes()))
+    monkeypatch.setattr(pdf_module, "prepare_pdf_images", pytest.fail)
+    itinerary = Itinerary(
+        city="Lisbon",
+        days=[
+            DayPlan(
+                day_number=1,
+                activities=[
+                    Activity(
+                        name="Tram 28",
+                        description="Ride",
+                        cost=3,
+                        image_url="https://example.com/tram.png",
+                    )
+                ],
+            )
+        ],
+    )
+
+    images = await pdf_module.fetch_proxied_images(itinerary, proxy)
+    response = await generate_pdf(itinerary, image_proxy=proxy)
+
+    variant = await proxy.get("https://example.com/tram.png", "pdf")
+    assert images == {"https://example.com/tram.png": variant.content}
+    assert response.body.startswith(b"%PDF")
+
+
+@pytest.mark.asyncio
+async def test_pdf_exports_without_proxy_use_the_shared_client(upstream_server):
+    base, requested = upstream_server
+    http_client = SharedHttpClient(resolver_factory=LoopbackResolver)
+    itinerary = Itinerary(
+        city="Lisbon",
+        days=[
+            DayPlan(
+                day_number=1,
+                activities=[
+                    Activity(
+                        name="Tram 28",
+                        description="Ride",
+                        cost=3,
+                        image_url=f"{base}/photo.png",
+                    )
+                ],
+            )
+        ],
+    )
+    try:
+        await generate_pdf(itinerary, http_client=http_client)
+        session = http_client.session()
+        await generate_pdf(itinerary, http_client=http_client)
+
+        assert requested == ["/photo.png", "/photo.png"]
+        assert http_client.session() is session
+        assert not session.closed
+    finally:
+        await http_client.close()
@@ -1,11 +1,17 @@
 import json
 import os
+import threading
+import time
 import urllib.error
 import urllib.request
+from unittest.mock import patch
 
 import pytest
 
+from app.core.cache import SQLiteCache, TieredCache
+from app.core.images import CachedImageSearch, resolve_itinerary_images
 from app.core.parser import parse_llm_response
+from app.models.domain import Activity, DayPlan, Itinerary
 
 
 class TestImageSystem:
@@ -99,6 +105,160 @@ class TestImageSystem:
         assert "pollinations.ai" in activity.image_url
         assert "Test%20Activity%20Test%20City%20landmark%20photo" in activity.image_url
 
+    def test_deferred_resolution_only_searches_unrenderable_images(self):
+        raw_response = json.dumps(
+            {
+                "city": "Test City",
+                "days": [
+                    {
+                        "day_number": 1,
+                        "activities": [
+                            {
+                                "name": "Has URL",
+                                "cost": 10,
+                                "image_url": "https://example.com/real.jpg",
+                            },
+                            {"name": "Needs Image", "cost": 10},
+                        ],
+                    }
+                ],
+            }
+        )
+        queries = []
+
+        def fake_image_search(query):
+            queries.append(query)
+            return "https://example.com/found.jpg"
+
+        itinerary = parse_llm_response(
+            raw_response, image_search=fake_image_search, resolve_images=False
+        )
+        assert queries == []
+        assert itinerary.days[0].activities[1].image_url is None
+
+        lookups = resolve_itinerary_images(itinerary, fake_image_search)
+
+        assert lookups == 1
+        assert queries == ["Needs Image Test City"]
+        assert [a.image_url for a in itinerary.days[0].activities] == [
+            "https://example.com/real.jpg",
+            "https://example.com/found.jpg",
+        ]
+
+    def test_batch_resolution_deduplicates_queries(self):
+        itinerary = Itinerary(
+            city="Test City",
+            days=[
+                DayPlan(
+                    day_number=day,
+                    activities=[
+                        Activity(name="Old Town Walk", description="Walk", cost=0),
+                        Activity(name=f"Museum {day}", description="Art", cost=5),
+                    ],
+                )
+                for day in (1, 2, 3)
+            ],
+        )
+        queries = []
+        lock = threading.Lock()
+
+        def fake_image_search(query):
+            with lock:
+                queries.append(query)
+            return f"https://example.com/{len(query)}.jpg"
+
+        lookups = resolve_itinerary_images(itinerary, fake_image_search)
+
+        assert lookups == 4
+        assert sorted(queries) == [
+            "Museum 1 Test City",
+            "Museum 2 Test City",
+            "Museum 3 Test City",
+            "Old Town Walk Test City",
+        ]
+        walk_images = {day.activities[0].image_url for day in itinerary.days}
+        assert walk_images == {"https://example.com/23.jpg"}
+
+    def test_batch_resolution_falls_back_after_deadline(self):
+        itinerary = Itinerary(
+            city="Test City",
+            days=[
+                DayPlan(
+                    day_number=1,
+                    activities=[
+                        Activity(name="Fast", description="Quick", cost=0),
+                        Activity(name="Slow", description="Stuck", cost=0),
+                    ],
+                )
+            ],
+        )
+        release = threading.Event()
+
+        def fake_image_search(query):
+            if query.startswith("Slow"):
+                release.wait(5)
+            return "https://example.com/found.jpg"
+
+        started = time.perf_counter()
+        try:
+            resolve_itinerary_images(
+                itinerary, fake_image_search, deadline_seconds=0.2
+            )
+        finally:
+            release.set()
+
+        assert time.perf_counter() - started < 2
+        fast, slow = itinerary.days[0].activities
+        assert fast.image_url == "https://example.com/found.jpg"
+        assert "pollinations.ai" in slow.image_url
+
+    def test_cached_search_reuses_hits_across_workers(self, tmp_path):
+        calls = []
+
+        def fake_search(query):
+            calls.append(query)
+            return "https://example.com/eiffel.jpg"
+
+        path = tmp_path / "images.sqlite3"
+        first = CachedImageSearch(
+            TieredCache(60, disk=SQLiteCache(path, "images")), fake_search
+        )
+        second = CachedImageSearch(
+            TieredCache(60, disk=SQLiteCache(path, "images")), fake_search
+        )
+
+        assert first("Eiffel Tower Visit Paris") == "https://example.com/eiffel.jpg"
+        assert first("eiffel tower  visit paris") == "https://example.com/eiffel.jpg"
+        assert second("Eiffel Tower Visit Paris") == "https://example.com/eiffel.jpg"
+        assert calls == ["Eiffel Tower Visit Paris"]
+        assert first.snapshot()["hit_rate"] == 0.5
+        assert second.cache.stats.disk_hits == 1
+
+    def test_empty_and_failed_searches_are_negative_cached(self):
+        def fake_search(query):
+            if query == "broken":
+                raise RuntimeError("rate limited")
+
+        search = CachedImageSearch(
+            TieredCache(60),
+            fake_search,
+            negative_ttl_seconds=30,
+            error_ttl_seconds=5,
+        )
+
+        with patch("app.core.cache.time.time", return_value=1000.0):
+            assert search("nothing") is None
+            assert search("broken") is None
+        with patch("app.core.cache.time.time", return_value=1010.0):
+            assert search("nothing") is None
+            search.search = lambda query: "https://example.com/recovered.jpg"
+            assert search("broken") == "https://example.com/recovered.jpg"
+
+        stats = search.snapshot()
+        assert stats["empty_results"] == 1
+        assert stats["errors"] == 1
+        assert stats["negative_hits"] == 1
+
     @pytest.mark.integration
     @pytest.mark.skipif(
         os.environ.get("RUN_REAL_IMAGE_SEARCH") != "1",
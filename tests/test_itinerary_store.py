@@ -0,0 +1,130 @@
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import fast_api_server
+from app.core.cache import SQLiteCache, TieredCache
+from app.models.domain import Activity, DayPlan, Itinerary
+from app.services.artifacts import ArtifactCache
+from app.services.itinerary_store import ITINERARY_ID_LENGTH, ItineraryStore
+
+
+def itinerary(city="Lisbon"):
+    activity = Activity(name="Tram 28", description="Up to Alfama", cost=3)
+    return Itinerary(
+        city=city, days=[DayPlan(day_number=1, activities=[activity])], valid=True
+    )
+
+
+def test_saved_itineraries_get_stable_short_ids():
+    store = ItineraryStore(TieredCache(60))
+
+    first = store.save(itinerary())
+
+    assert len(first) == ITINERARY_ID_LENGTH
+    assert store.save(itinerary()) == first
+    assert store.save(itinerary("Porto")) != first
+    assert store.get(first) == itinerary()
+    assert store.get("missing") is None
+
+
+def test_itineraries_are_read_back_from_disk(tmp_path):
+    path = tmp_path / "itineraries.sqlite3"
+    itinerary_id = ItineraryStore(
+        TieredCache(60, disk=SQLiteCache(path, "itineraries"))
+    ).save(itinerary())
+
+    reopened = ItineraryStore(TieredCache(60, disk=SQLiteCache(path, "itineraries")))
+
+    assert reopened.get(itinerary_id) == itinerary()
+    assert reopened.snapshot()["disk_hits"] == 1
+    assert reopened.get(itinerary_id) is reopened.get(itinerary_id)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        fast_api_server, "itinerary_store", ItineraryStore(TieredCache(60))
+    )
+    monkeypatch.setattr(fast_api_server, "artifact_cache", ArtifactCache(tmp_path))
+    return TestClient(fast_api_server.app)
+
+
+def test_streamed_result_id_serves_artifacts_without_reupload(client, monkeypatch):
+    async def planned(prefs, **kwargs):
+        yield itinerary()
+
+    with patch.object(
+        fast_api_server.agent, "plan_trip_stream_async", side_effect=planned
+    ):
+        response = client.post(
+            "/plan_stream",
+            json={"city": "Lisbon", "budget": 500, "days": 1, "interests": ["Food"]},
+        )
+    result = json.loads(response.text.strip().split("\n")[-1])
+    itinerary_id = result["id"]
+
+    async def fake_render_pdf(stored, **kwargs):
+        return f"%PDF {stored.city}".encode()
+
+    monkeypatch.setattr(fast_api_server, "render_pdf", fake_render_pdf)
+
+    stored = client.get(f"/itineraries/{itinerary_id}")
+    pdf = client.get(f"/itineraries/{itinerary_id}/pdf")
+    calendar = client.get(
+        f"/itineraries/{itinerary_id}/calendar", params={"start_date": "2026-03-01"}
+    )
+    revalidated = client.get(
+        f"/itineraries/{itinerary_id}/pdf",
+        headers={"If-None-Match": pdf.headers["etag"]},
+    )
+
+    assert stored.json()["city"] == "Lisbon"
+    assert pdf.content == b"%PDF Lisbon"
+    assert (
+        pdf.headers["content-disposition"] == "attachment; filename=Trip_to_Lisbon.pdf"
+    )
+    assert "DTSTART;VALUE=DATE:20260301" in calendar.text
+    assert revalidated.status_code == 304
+
+
+def test_unknown_itinerary_id_is_not_found(client):
+    assert client.get("/itineraries/0123456789abcdef/pdf").status_code == 404
+    assert client.get("/itineraries/0123456789abcdef/calendar").status_code == 404
+
+
+def test_store_is_used_off_the_event_loop_thread(client, monkeypatch):
+    store = fast_api_server.itinerary_store
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def recorded(method):
+        def wrapper(*args):
+            threads.append(threading.get_ident())
+            return method(*args)
+
+        return wrapper
+
+    monkeypatch.setattr(store, "save", recorded(store.save))
+    monkeypatch.setattr(store, "get", recorded(store.get))
+
+    async def planned(prefs, **kwargs):
+        nonlocal loop_thread
+        loop_thread = threading.get_ident()
+        yield itinerary()
+
+    with patch.object(
+        fast_api_server.agent, "plan_trip_stream_async", side_effect=planned
+    ):
+        response = client.post(
+            "/plan_stream",
+            json={"city": "Lisbon", "budget": 500, "days": 1, "interests": ["Food"]},
+        )
+    itinerary_id = json.loads(response.text.strip().split("\n")[-1])["id"]
+    assert client.get(f"/itineraries/{itinerary_id}").status_code == 200
+
+    assert len(threads) == 2
+    assert loop_thread not in threads
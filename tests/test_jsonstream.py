@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from app.core.jsonstream import JsonStreamError, JsonStreamExtractor, extract_json
+from app.core.parser import extract_json_payload
+
+DOCUMENT = {
+    "city": "Kyoto",
+    "notes": 'Braces {inside} strings, "escaped" quotes and \\ slashes',
+    "days": [
+        {"day_number": 1, "activities": [{"name": "Fushimi Inari", "cost": 0}]},
+        {"day_number": 2, "activities": [{"name": "Nishiki", "cost": 12.5}]},
+    ],
+    "valid": True,
+    "validation_error": None,
+}
+
+
+def test_chunked_feed_matches_json_loads_at_every_split():
+    text = f"Sure! Here it is:\n```json\n{json.dumps(DOCUMENT, indent=2)}\n```\nEnjoy."
+    for size in (1, 2, 5, 17, 4096):
+        extractor = JsonStreamExtractor()
+        for start in range(0, len(text), size):
+            extractor.feed(text[start : start + size])
+        assert extractor.close() == DOCUMENT
+        assert not extractor.truncated
+
+
+def test_watched_paths_are_reported_when_they_close():
+    text = json.dumps(DOCUMENT)
+    extractor = JsonStreamExtractor(watch=[("days", "*"), ("days", "*", "activities")])
+    second_day = text.index('{"day_number": 2')
+
+    early = extractor.feed(text[:second_day])
+    late = extractor.feed(text[second_day:])
+
+    assert [path for path, _ in early] == [("days", 0, "activities"), ("days", 0)]
+    assert [path for path, _ in late] == [("days", 1, "activities"), ("days", 1)]
+    assert late[-1][1] == DOCUMENT["days"][1]
+
+
+def test_truncated_output_is_closed_without_partial_array_elements():
+    text = json.dumps(DOCUMENT)
+    cut = text.index("Nishiki") + 3
+
+    value, truncated = extract_json(text[:cut])
+
+    assert truncated
+    assert value["city"] == "Kyoto"
+    assert value["days"] == DOCUMENT["days"][:1]
+
+
+def test_brace_in_leading_prose_does_not_hide_the_payload():
+    value, truncated = extract_json('Fill in {city} below: {"city": "Oslo", "days": []}')
+
+    assert value == {"city": "Oslo", "days": []}
+    assert not truncated
+
+
+def test_malformed_payload_raises():
+    with pytest.raises(JsonStreamError):
+        extract_json('{"city": "Oslo", "days": [1, 2,]}')
+    with pytest.raises(JsonStreamError):
+        extract_json("no json here")
+
+
+def test_extract_json_payload_falls_back_to_array_root():
+    assert extract_json_payload("Result: [1, 2, 3]") == [1, 2, 3]
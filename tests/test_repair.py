@@ -0,0 +1,92 @@
+import json
+
+from app.core.parser import parse_llm_response
+from app.core.repair import RepairStats, repair_itinerary_json
+
+
+def repaired_payload(text):
+    result = repair_itinerary_json(text)
+    assert result is not None
+    return json.loads(result.text), result.rules
+
+
+def test_syntax_rules_fix_common_model_mistakes():
+    text = """Here's the plan:
+    ```json
+    {
+      city: 'Porto',
+      // the model likes comments
+      "days": [
+        {"day_number": 1, "activities": [
+          {"name": "Ribeira walk", "description": "Don't skip the 'bridge'", "cost": 12 [1],
+           "free": False, "notes": None,}
+        ]}
+      ],
+    }
+    ```"""
+
+    payload, rules = repaired_payload(text)
+
+    assert payload["city"] == "Porto"
+    activity = payload["days"][0]["activities"][0]
+    assert activity["description"] == "Don't skip the 'bridge'"
+    assert activity["cost"] == 12
+    assert activity["free"] is False
+    assert activity["notes"] is None
+    assert set(rules) == {
+        "single_quotes",
+        "comments",
+        "citation_markers",
+        "python_literals",
+        "unquoted_keys",
+        "trailing_commas",
+    }
+
+
+def test_citations_missing_commas_and_truncation_are_repaired():
+    text = (
+        '{"city": "Oslo" 【3†source】\n'
+        '"days": [\n'
+        '  {"day_number": 1, "activities": [{"name": "Fjord cruise", "cost": 40}]}\n'
+        '  {"day_number": 2, "activities": [{"name": "Munch Museum", "co'
+    )
+
+    payload, rules = repaired_payload(text)
+
+    assert [day["day_number"] for day in payload["days"]] == [1]
+    assert rules == ["citation_markers", "missing_commas", "truncated_tail"]
+
+
+def test_wrapped_and_aliased_payloads_are_unwrapped():
+    wrapped, wrapped_rules = repaired_payload(
+        '{"itinerary": {"city": "Rome", "days": [{"day_number": 1, "activities": []}]}}'
+    )
+    aliased, aliased_rules = repaired_payload(
+        '{"city": "Rome", "schedule": [{"day": 1, "plan": [{"activity": "Forum"}]}]}'
+    )
+
+    assert wrapped["city"] == "Rome"
+    assert wrapped_rules == ["unwrapped_payload"]
+    assert aliased_rules == ["alias_schema"]
+    itinerary = parse_llm_response(json.dumps(aliased), image_search=lambda _: None)
+    assert itinerary.days[0].activities[0].name == "Forum"
+
+
+def test_unrepairable_payloads_are_left_for_the_model():
+    assert repair_itinerary_json("I could not plan this trip.") is None
+    assert repair_itinerary_json('{"destination": "Rotterdam"}') is None
+    assert repair_itinerary_json('{"city": "Rome", "days": [1,, 2]}') is None
+
+
+def test_repair_stats_report_rule_counts_and_rate():
+    stats = RepairStats()
+    stats.record_local_repair(["trailing_commas", "truncated_tail"])
+    stats.record_local_repair(["trailing_commas"])
+    stats.record_escalation()
+
+    snapshot = stats.as_dict()
+
+    assert snapshot["local_repairs"] == 2
+    assert snapshot["llm_escalations"] == 1
+    assert snapshot["local_repair_rate"] == 0.6667
+    assert snapshot["rules"] == {"trailing_commas": 2, "truncated_tail": 1}
@@ -0,0 +1,169 @@
+from app.core.routing import CircuitBreaker, CircuitState, LatencyTracker, ModelRouter
+
+
+def test_hedge_delay_uses_default_until_enough_samples():
+    tracker = LatencyTracker(min_samples=3, default_delay=15.0)
+    tracker.record("gpt-5.4-mini", 4.0)
+    tracker.record("gpt-5.4-mini", 5.0)
+
+    assert tracker.hedge_delay("gpt-5.4-mini") == 15.0
+    assert tracker.hedge_delay("never-called") == 15.0
+
+
+def test_hedge_delay_tracks_observed_percentile_with_clamping():
+    tracker = LatencyTracker(percentile=0.9, min_samples=5, min_delay=2.0, max_delay=30.0)
+    for seconds in [3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0]:
+        tracker.record("gpt-5.4-mini", seconds)
+
+    assert tracker.hedge_delay("gpt-5.4-mini") == 11.0
+
+    for _ in range(10):
+        tracker.record("gpt-5.4-nano", 0.1)
+    assert tracker.hedge_delay("gpt-5.4-nano") == 2.0
+
+
+def test_latency_window_is_rolling():
+    tracker = LatencyTracker(window=3, min_samples=1, min_delay=0.0)
+    for seconds in [50.0, 1.0, 1.0, 1.0]:
+        tracker.record("gpt-5.4-mini", seconds)
+
+    assert tracker.latency_percentile("gpt-5.4-mini", 1.0) == 1.0
+
+
+def test_snapshot_reports_hedges_and_percentiles():
+    tracker = LatencyTracker(min_samples=1, min_delay=0.0)
+    tracker.record("gpt-5.4-mini", 2.0)
+    tracker.record_hedge("gpt-5.4-mini")
+
+    snapshot = tracker.snapshot()["gpt-5.4-mini"]
+    assert snapshot["samples"] == 1
+    assert snapshot["p50_seconds"] == 2.0
+    assert snapshot["hedges_launched"] == 1
+
+
+def test_censored_samples_raise_the_hedge_delay():
+    tracker = LatencyTracker(percentile=0.5, min_samples=2, min_delay=0.0)
+    tracker.record("gpt-5.4-mini", 1.0)
+    tracker.record_censored("gpt-5.4-mini", 8.0)
+    tracker.record_censored("gpt-5.4-mini", 9.0)
+
+    assert tracker.hedge_delay("gpt-5.4-mini") == 8.0
+    assert tracker.snapshot()["gpt-5.4-mini"]["censored_samples"] == 2
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_opens_on_error_rate_and_half_opens_after_cooldown():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        min_requests=4, error_rate_threshold=0.5, open_seconds=30, clock=clock
+    )
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow_request() is False
+
+    clock.now = 31
+    assert breaker.allow_request() is True
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() is False
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.error_rate() == 0.0
+
+
+def test_failed_half_open_probe_reopens_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_requests=1, open_seconds=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 11
+    assert breaker.allow_request() is True
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.times_opened == 2
+
+
+def test_released_probe_can_be_claimed_again():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_requests=1, open_seconds=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 11
+    assert breaker.allow_request() is True
+
+    breaker.release()
+
+    assert breaker.allow_request() is True
+
+
+def test_old_outcomes_fall_out_of_the_window():
+    clock = FakeClock()
+    breaker = CircuitBreaker(window_seconds=60, min_requests=3, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now = 61
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.request_count() == 1
+
+
+def test_fatal_failure_opens_immediately():
+    breaker = CircuitBreaker(min_requests=10)
+
+    breaker.record_failure(fatal=True)
+
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_router_keeps_preference_order_until_health_diverges():
+    router = ModelRouter(
+        ["primary", "secondary", "tertiary"],
+        breaker_factory=lambda: CircuitBreaker(min_requests=10, error_rate_threshold=0.9),
+    )
+    router.record_success("secondary", 1.0)
+    router.record_failure("primary")
+    for _ in range(9):
+        router.record_success("primary", 1.0)
+
+    assert router.ordered_candidates() == ["primary", "secondary", "tertiary"]
+
+    for _ in range(5):
+        router.record_failure("primary")
+
+    assert router.ordered_candidates() == ["secondary", "tertiary", "primary"]
+
+
+def test_single_early_failure_does_not_demote_preferred_model():
+    router = ModelRouter(["primary", "secondary"])
+
+    router.record_failure("primary")
+
+    assert router.ordered_candidates() == ["primary", "secondary"]
+
+
+def test_router_skips_open_circuits_and_reports_state():
+    router = ModelRouter(
+        ["primary", "secondary"],
+        breaker_factory=lambda: CircuitBreaker(min_requests=2),
+    )
+    router.record_failure("primary")
+    router.record_failure("primary")
+
+    assert router.ordered_candidates() == ["secondary"]
+    snapshot = router.snapshot()
+    assert snapshot["order"] == ["secondary"]
+    assert snapshot["models"]["primary"]["state"] == "open"
+    assert snapshot["models"]["primary"]["error_rate"] == 1.0
@@ -0,0 +1,56 @@
+from app.core.streaming import DayStreamParser
+
+STREAMED_PLAN = """```json
+{
+  "city": "Lisbon",
+  "notes": "Use {braces} and \\"quotes\\" freely",
+  "days": [
+    {"day_number": 1, "city": "Lisbon", "activities": [
+      {"name": "Tram 28", "description": "Ride [the] classic line", "cost": "$3", "duration_hours": 1}
+    ]},
+    {"day": 2, "plan": [{"activity": "Belem tower", "cost_usd": 10}]}
+  ],
+  "cost_breakdown": {"activities": 13}
+}
+```"""
+
+
+def feed_in_chunks(parser, text, size):
+    days = []
+    for start in range(0, len(text), size):
+        days.extend(parser.feed(text[start : start + size]))
+    return days
+
+
+def test_days_are_emitted_as_soon_as_their_object_closes():
+    parser = DayStreamParser("Lisbon")
+    first_day_end = STREAMED_PLAN.index("]},") + 2
+
+    days = parser.feed(STREAMED_PLAN[:first_day_end])
+
+    assert [day.day_number for day in days] == [1]
+    assert days[0].activities[0].cost == 3
+    assert days[0].total_cost == 3
+    assert parser.feed(STREAMED_PLAN[first_day_end:])[0].day_number == 2
+
+
+def test_chunk_boundaries_do_not_change_the_result():
+    for size in (1, 3, 7, 64):
+        days = feed_in_chunks(DayStreamParser("Lisbon"), STREAMED_PLAN, size)
+        assert [day.day_number for day in days] == [1, 2]
+        assert days[1].activities[0].name == "Belem tower"
+        assert days[1].activities[0].image_url.startswith(
+            "https://image.pollinations.ai/"
+        )
+
+
+def test_nested_or_invalid_day_objects_are_skipped():
+    parser = DayStreamParser()
+    text = (
+        '{"meta": {"days": [{"day_number": 9, "activities": []}]},'
+        ' "days": [{"day_number": "x"}, {"day_number": 3, "activities": []}]}'
+    )
+
+    days = parser.feed(text)
+
+    assert [day.day_number for day in days] == [3]
@@ -0,0 +1,85 @@
+from app.core.prompts import refinement_prompt, violations_checklist
+from app.core.validation import ViolationCode, validate_itinerary
+from app.models.domain import Activity, CostBreakdown, DayPlan, Itinerary, Preferences
+
+
+def broken_itinerary():
+    return Itinerary(
+        city="Lisbon",
+        cost_breakdown=CostBreakdown(transport=200, stay=400, food=100, activities=30),
+        days=[
+            DayPlan(
+                day_number=1,
+                activities=[Activity(name="Tram", description="Ride", cost=30)],
+            ),
+            DayPlan(day_number=2, activities=[]),
+        ],
+    )
+
+
+def test_every_violation_is_reported_in_one_pass():
+    prefs = Preferences(city="Lisbon", budget=500, days=3, interests=[])
+
+    violations = validate_itinerary(broken_itinerary(), prefs)
+
+    assert [violation.code for violation in violations] == [
+        ViolationCode.DAY_COUNT,
+        ViolationCode.EMPTY_DAY,
+        ViolationCode.OVER_BUDGET,
+    ]
+    assert violations[1].day_index == 1
+    assert violations[2].message == "Total cost 730 exceeds budget 500."
+
+
+def test_activity_violations_carry_day_and_activity_positions():
+    itinerary = broken_itinerary()
+    itinerary.days[1].activities = [
+        Activity(name="Walk", description="Alfama", cost=0),
+        Activity(name="Yacht", description="Sunset cruise", cost=400),
+    ]
+    itinerary.cost_breakdown.activities = 430
+    prefs = Preferences(city="Lisbon", budget=500, days=2, interests=[])
+
+    violations = validate_itinerary(itinerary, prefs)
+
+    located = [
+        (violation.code, violation.day_index, violation.activity_index)
+        for violation in violations
+    ]
+    assert located == [
+        (ViolationCode.OVER_BUDGET, None, None),
+        (ViolationCode.ACTIVITY_OVER_BUDGET, 1, 1),
+    ]
+    assert violations[1].message == (
+        "Day 2 activity 'Yacht' costs 400, over the daily activity budget of 50."
+    )
+    checklist = violations_checklist(violations, prefs)
+    assert "[activity_over_budget] (days[1].activities[1])" in checklist
+
+
+def test_valid_itinerary_has_no_violations():
+    itinerary = broken_itinerary()
+    itinerary.days = itinerary.days[:1]
+    itinerary.cost_breakdown = CostBreakdown(
+        transport=100, stay=200, food=80, activities=30
+    )
+    prefs = Preferences(city="Lisbon", budget=500, days=1, interests=[])
+
+    assert validate_itinerary(itinerary, prefs) == []
+
+
+def test_refinement_prompt_lists_all_violations_with_locations():
+    prefs = Preferences(city="Lisbon", budget=500, days=3, interests=[])
+    itinerary = broken_itinerary()
+    violations = validate_itinerary(itinerary, prefs)
+
+    prompt = refinement_prompt(
+        itinerary, "combined", prefs, [], [], None, violations=violations
+    )
+
+    assert "ALL VIOLATIONS (3)" in prompt
+    assert "1. [day_count] Itinerary has 2 days, expected 3." in prompt
+    assert "2. [empty_day] (days[1]) Day 2 must include" in prompt
+    assert "Return exactly 3 DayPlan objects" in prompt
+    assert "3. [over_budget]" in prompt
+    assert violations_checklist([], prefs) == ""